@@ -0,0 +1,60 @@
+import os
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
+from typing import List, Optional
+
+from app.core.profiling import PROFILE_FORMATS, slow_request_profiler
+from app.schemas.profiling import ProfileSummary, ProfilingSettings
+
+# Every admin route needs a matching X-Admin-Token header; without a configured token they are all closed
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin routes are disabled: ADMIN_TOKEN is not set")
+    if not (x_admin_token and secrets.compare_digest(x_admin_token, ADMIN_TOKEN)):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiling", response_model=ProfilingSettings)
+def get_profiling_settings_endpoint():
+    return slow_request_profiler.settings()
+
+@router.put("/profiling", response_model=ProfilingSettings)
+def update_profiling_settings_endpoint(settings: ProfilingSettings):
+    # Switch slow-request profiling on or off, or retune it, without a restart
+    if settings.enabled and (settings.threshold_ms is None or settings.threshold_ms < 0):
+        raise HTTPException(status_code=422, detail="threshold_ms must be given and not negative.")
+    if not 1 <= settings.keep <= 1000:
+        raise HTTPException(status_code=422, detail="keep must be between 1 and 1000.")
+    if not 1 <= settings.interval_ms <= 1000:
+        raise HTTPException(status_code=422, detail="interval_ms must be between 1 and 1000.")
+    threshold = settings.threshold_ms / 1000 if settings.enabled else None
+    slow_request_profiler.configure(threshold, settings.keep, settings.interval_ms / 1000)
+    return slow_request_profiler.settings()
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+def list_profiles_endpoint():
+    # Newest first
+    return slow_request_profiler.summaries()
+
+@router.get("/profiles/{profile_id}")
+def get_profile_endpoint(profile_id: int, format: str = Query("collapsed")):
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(PROFILE_FORMATS)}.")
+    profile = slow_request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        return Response(profile.pstats_dump(), media_type="application/octet-stream",
+                        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'})
+    if format == "text":
+        return PlainTextResponse(profile.pstats_text())
+    return PlainTextResponse(profile.collapsed())
+
+@router.delete("/profiles", status_code=204)
+def clear_profiles_endpoint():
+    slow_request_profiler.clear()
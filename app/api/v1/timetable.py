@@ -1,87 +1,383 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
-from app.schemas.room import RoomRead
+from app.core.contracts import check_contracts
+from app.core.database import get_async_db, get_db
+from app.models.student_group import LETTER_PATTERN
+from app.models.student_year import MAX_YEAR, MIN_YEAR
+from app.schemas.room import RoomRead, RoomRecommendation
 from app.schemas.student_group import StudentGroupRead
 from app.schemas.student_year import StudentYearRead
 from app.schemas.subject import SubjectRead
-from app.services.timetable_service import TimetableService
+from app.services.async_timetable_service import AsyncTimetableService
+from app.services.cache_service import CachedPage, all_cache_stats
+from app.services.occupancy_service import OCCUPANCY_COLLECTIONS
+from app.services.timetable_service import EXPORT_FORMATS, TimetableService
+from app.services.version_service import etag_matches, read_async_versions
 
 from app.schemas.teacher import TeacherCreate, TeacherRead
-from app.schemas.schedule_entry import ScheduleEntryCreate, ScheduleEntryRead
+from app.schemas.schedule_entry import (
+    ScheduleBulkResult, ScheduleChangeSet, ScheduleEntryCreate, ScheduleEntryExpanded, ScheduleEntryRead,
+    ScheduleValidationResult,
+)
+from app.schemas.timetable import AvailabilityWindow, TimetableGenerateRequest, TimetableGenerateResponse
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def conditional_get(*collections: str):
+    """Dependency answering ``If-None-Match`` with 304 from the version counters alone.
+
+    Otherwise it stamps ``ETag``/``Last-Modified`` on the response and returns them,
+    for endpoints that build their own ``Response``.
+    """
+    async def check(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> dict:
+        validators = (await read_async_versions(db, *collections)).headers(*collections)
+        if etag_matches(request.headers.get("if-none-match"), validators["ETag"]):
+            raise HTTPException(status_code=304, headers=validators)
+        response.headers.update(validators)
+        return validators
+    return check
+
+def schedule_filters(
+    day_of_week: Optional[str] = None,
+    room_id: Optional[int] = None,
+    teacher_id: Optional[int] = None,
+    subject_id: Optional[int] = None,
+    student_group_id: Optional[int] = None,
+    class_type: Optional[str] = None,
+    from_hour: Optional[int] = Query(None, ge=8, le=20),
+    to_hour: Optional[int] = Query(None, ge=8, le=20),
+) -> dict:
+    # Shared query parameters of the schedule listings; all of them are applied in SQL
+    return dict(
+        day_of_week=day_of_week,
+        room_id=room_id,
+        teacher_id=teacher_id,
+        subject_id=subject_id,
+        student_group_id=student_group_id,
+        class_type=class_type,
+        from_hour=from_hour,
+        to_hour=to_hour,
+    )
+
+def _page_response(page: CachedPage, validators: dict) -> Response:
+    # The body is already JSON: skip response_model validation and re-serialization
+    response = Response(content=page.body, media_type="application/json", headers=validators)
+    if page.next_after_id is not None:
+        response.headers["X-Next-After-Id"] = str(page.next_after_id)
+    return response
+
+def _set_next_cursor(response: Response, result: list, limit: Optional[int]):
+    # A full page means there may be more: hand back the keyset cursor for the next one
+    if limit is not None and len(result) == limit:
+        response.headers["X-Next-After-Id"] = str(result[-1].id)
+
 @router.post("/teachers/", response_model=TeacherRead)
-def create_teacher_endpoint(teacher: TeacherCreate, db: Session = Depends(get_db)):
+async def create_teacher_endpoint(teacher: TeacherCreate, db: AsyncSession = Depends(get_async_db)):
     assert teacher is not None, "TeacherCreate payload is required"  #  Precondition
-    service = TimetableService(db)
-    result = service.create_teacher(teacher)
+    service = AsyncTimetableService(db)
+    result = await service.create_teacher(teacher)
     assert result.name == teacher.name, "Teacher creation postcondition failed"  #  Postcondition
     return result
 
 @router.get("/teachers/", response_model=List[TeacherRead])
-def list_teachers_endpoint(db: Session = Depends(get_db)):
-    service = TimetableService(db)
-    result = service.list_teachers()
-    assert isinstance(result, list), "Teachers must be returned as a list"  #  Postcondition
-    return result
+async def list_teachers_endpoint(
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    validators: dict = Depends(conditional_get("teachers")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    page = await service.list_reference_page("teachers", after_id=after_id, limit=limit, etag=validators["ETag"])
+    assert isinstance(page.body, bytes), "Cached page must hold a serialized body"  #  Postcondition
+    return _page_response(page, validators)
 
 @router.get("/years/", response_model=List[StudentYearRead])
-def list_years_endpoint(db: Session = Depends(get_db)):
-    service = TimetableService(db)
-    result = service.list_years()
-    assert all(y.year >= 1 for y in result), "Invalid year value found"  #  Postcondition
-    return result
+async def list_years_endpoint(
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    validators: dict = Depends(conditional_get("years")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    page = await service.list_reference_page("years", after_id=after_id, limit=limit, etag=validators["ETag"])
+    assert isinstance(page.body, bytes), "Cached page must hold a serialized body"  #  Postcondition
+    return _page_response(page, validators)
 
 @router.get("/groups/", response_model=List[StudentGroupRead])
-def list_groups_endpoint(db: Session = Depends(get_db)):
-    service = TimetableService(db)
-    result = service.list_groups()
-    assert all(g.letter for g in result), "Group with empty letter found"  #  Postcondition
-    return result
+async def list_groups_endpoint(
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    validators: dict = Depends(conditional_get("groups")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    page = await service.list_reference_page("groups", after_id=after_id, limit=limit, etag=validators["ETag"])
+    assert isinstance(page.body, bytes), "Cached page must hold a serialized body"  #  Postcondition
+    return _page_response(page, validators)
 
 @router.get("/subjects/", response_model=List[SubjectRead])
-def list_subjects_endpoint(db: Session = Depends(get_db)):
-    service = TimetableService(db)
-    result = service.list_subjects()
-    assert all(s.name for s in result), "Subject with no name found"  #  Postcondition
-    return result
+async def list_subjects_endpoint(
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    validators: dict = Depends(conditional_get("subjects")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    page = await service.list_reference_page("subjects", after_id=after_id, limit=limit, etag=validators["ETag"])
+    assert isinstance(page.body, bytes), "Cached page must hold a serialized body"  #  Postcondition
+    return _page_response(page, validators)
 
 @router.get("/rooms/", response_model=List[RoomRead])
-def list_rooms_endpoint(db: Session = Depends(get_db)):
-    service = TimetableService(db)
-    result = service.list_rooms()
-    assert all(isinstance(r.is_course_room, bool) for r in result), "Room type inconsistency"  #  Postcondition
-    return result
+async def list_rooms_endpoint(
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    validators: dict = Depends(conditional_get("rooms")),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    page = await service.list_reference_page("rooms", after_id=after_id, limit=limit, etag=validators["ETag"])
+    assert isinstance(page.body, bytes), "Cached page must hold a serialized body"  #  Postcondition
+    return _page_response(page, validators)
 
 @router.post("/schedule/", response_model=ScheduleEntryRead)
-def create_schedule_entry_endpoint(entry: ScheduleEntryCreate, db: Session = Depends(get_db)):
+async def create_schedule_entry_endpoint(entry: ScheduleEntryCreate, db: AsyncSession = Depends(get_async_db)):
     assert entry is not None, "ScheduleEntryCreate payload is required"  #  Precondition
-    service = TimetableService(db)
-    result = service.create_schedule_entry(entry)
+    service = AsyncTimetableService(db)
+    result = await service.create_schedule_entry(entry)
     assert result.start_hour == entry.start_hour, "Mismatch in start_hour after creation"  #  Postcondition
     return result
 
-@router.get("/schedule/", response_model=List[ScheduleEntryRead])
-def list_schedule_entries_endpoint(group_name: str = None, db: Session = Depends(get_db)):
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+async def _read_ndjson(request: Request) -> list:
+    # Parse line by line as the body streams in; a bad line becomes a per-row error
+    rows, buffer = [], b""
+
+    def parse(line: bytes):
+        if line.strip():
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(ValueError("Invalid JSON line."))
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            parse(line)
+    parse(buffer)
+    return rows
+
+@router.post("/schedule/bulk", response_model=ScheduleBulkResult)
+async def bulk_create_schedule_entries_endpoint(request: Request, all_or_nothing: bool = False,
+                                                db: Session = Depends(get_db)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        rows = await _read_ndjson(request)
+    else:
+        try:
+            rows = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Body must be a JSON array or NDJSON.")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=422, detail="Body must be a JSON array of schedule entries.")
+    service = TimetableService(db)
+    result = await run_in_threadpool(service.bulk_create_schedule_entries, rows, all_or_nothing)
+    assert all_or_nothing or result["created"] + len(result["errors"]) == len(rows), "Rows unaccounted for"  #  Postcondition
+    return result
+
+@router.post("/schedule/validate", response_model=ScheduleValidationResult)
+async def validate_schedule_changes_endpoint(changes: ScheduleChangeSet, db: Session = Depends(get_db)):
     service = TimetableService(db)
+    result = await run_in_threadpool(service.validate_schedule_changes, changes.add, changes.delete)
+    assert result["valid"] == (not result["errors"]), "Validity must match the error list"  #  Postcondition
+    return result
+
+@router.get("/schedule/", response_model=List[ScheduleEntryRead],
+            dependencies=[Depends(conditional_get("schedule", "groups"))])
+async def list_schedule_entries_endpoint(
+    response: Response,
+    group_name: str = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    filters: dict = Depends(schedule_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
     if group_name:
         assert isinstance(group_name, str) and group_name.strip(), "Group name must be non-empty string"  #  Precondition
-        result = service.list_schedule_entries_by_group(group_name)
-        assert all(e.student_group_id for e in result), "Entries without group_id found"  #  Postcondition
+        result = await service.list_schedule_entries_by_group(group_name)
+        if check_contracts():
+            assert all(e.student_group_id for e in result), "Entries without group_id found"  #  Postcondition
         return result
-    result = service.list_schedule_entries()
+    result = await service.list_schedule_entries(
+        after_id=after_id,
+        limit=limit,
+        **filters,
+    )
+    _set_next_cursor(response, result, limit)
     assert isinstance(result, list), "Schedule list must be of type list"  #  Postcondition
     return result
 
+@router.get("/years/{year}/groups/{letter}/schedule", response_model=List[ScheduleEntryRead],
+            dependencies=[Depends(conditional_get("schedule", "groups"))])
+async def group_timetable_endpoint(
+    year: int = Path(..., ge=MIN_YEAR, le=MAX_YEAR),
+    letter: str = Path(..., pattern=LETTER_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    result = await service.get_group_timetable(year, letter)
+    if check_contracts():
+        assert all(e.student_group_id is None or e.student_group_id > 0 for e in result), "Invalid group in timetable"  #  Postcondition
+    return result
+
+@router.get("/schedule/expanded", response_model=List[ScheduleEntryExpanded],
+            dependencies=[Depends(conditional_get("schedule", "teachers", "rooms", "groups", "subjects"))])
+async def list_schedule_entries_expanded_endpoint(
+    response: Response,
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    filters: dict = Depends(schedule_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    result = await service.list_schedule_entries(after_id=after_id, limit=limit, expand=True, **filters)
+    _set_next_cursor(response, result, limit)
+    if check_contracts():
+        assert all(e.subject is not None and e.room is not None for e in result), "Related rows not loaded"  #  Postcondition
+    return result
+
+@router.get("/years/{year}/groups/{letter}/schedule/expanded", response_model=List[ScheduleEntryExpanded],
+            dependencies=[Depends(conditional_get("schedule", "teachers", "rooms", "groups", "subjects"))])
+async def group_timetable_expanded_endpoint(
+    year: int = Path(..., ge=MIN_YEAR, le=MAX_YEAR),
+    letter: str = Path(..., pattern=LETTER_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    result = await service.get_group_timetable(year, letter, expand=True)
+    if check_contracts():
+        assert all(e.subject is not None and e.room is not None for e in result), "Related rows not loaded"  #  Postcondition
+    return result
+
+@router.get("/schedule/export")
+def export_schedule_endpoint(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: dict = Depends(schedule_filters),
+    validators: dict = Depends(conditional_get("schedule")),
+    db: Session = Depends(get_db),
+):
+    # The stream outlives the request-scoped session, so it reads through its own
+    # session on the same engine and closes it once the last chunk is sent
+    stream_db = Session(bind=db.get_bind())
+    try:
+        chunks = TimetableService(stream_db).export_schedule_entries(
+            format,
+            **filters,
+        )
+    except Exception:
+        stream_db.close()
+        raise
+
+    def body():
+        try:
+            yield from chunks
+        finally:
+            stream_db.close()
+
+    headers = {"Content-Disposition": f'attachment; filename="schedule.{format}"', **validators}
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[format], headers=headers)
+
+@router.get("/schedule/audit")
+def audit_schedule_endpoint(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    validators: dict = Depends(conditional_get("schedule", "rooms", "groups")),
+    db: Session = Depends(get_db),
+):
+    # Streamed like the export: the report can be as large as the schedule
+    stream_db = Session(bind=db.get_bind())
+    chunks = TimetableService(stream_db).audit_report(format)
+
+    def body():
+        try:
+            yield from chunks
+        finally:
+            stream_db.close()
+
+    headers = {"Content-Disposition": f'attachment; filename="schedule-audit.{format}"', **validators}
+    return StreamingResponse(body(), media_type=EXPORT_FORMATS[format], headers=headers)
+
 @router.delete("/schedule/{schedule_id}", status_code=204)
-def delete_schedule_entry_endpoint(schedule_id: int, db: Session = Depends(get_db)):
+async def delete_schedule_entry_endpoint(schedule_id: int, db: AsyncSession = Depends(get_async_db)):
     assert isinstance(schedule_id, int) and schedule_id > 0, "schedule_id must be a positive integer"  #  Precondition
-    service = TimetableService(db)
-    success = service.delete_schedule_entry(schedule_id)
+    service = AsyncTimetableService(db)
+    success = await service.delete_schedule_entry(schedule_id)
     if not success:
         raise HTTPException(status_code=404, detail="Schedule entry not found")
-    assert success is True, "Expected schedule entry deletion to succeed"  #  Postcondition
\ No newline at end of file
+    assert success is True, "Expected schedule entry deletion to succeed"  #  Postcondition
+
+@router.post("/generate", response_model=TimetableGenerateResponse)
+def generate_timetable_endpoint(request: TimetableGenerateRequest, db: Session = Depends(get_db)):
+    assert request is not None, "TimetableGenerateRequest payload is required"  #  Precondition
+    service = TimetableService(db)
+    result = service.generate_timetable(request)
+    assert isinstance(result["entries"], list), "Generated entries must be a list"  #  Postcondition
+    return result
+
+@router.get("/availability", response_model=List[AvailabilityWindow],
+            dependencies=[Depends(conditional_get(*OCCUPANCY_COLLECTIONS))])
+async def availability_endpoint(
+    room_id: Optional[int] = Query(None, ge=1),
+    teacher_id: Optional[int] = Query(None, ge=1),
+    student_group_id: Optional[int] = Query(None, ge=1),
+    is_course_room: Optional[bool] = None,
+    from_day: str = "Monday",
+    to_day: str = "Friday",
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AsyncTimetableService(db)
+    result = await service.find_availability(
+        room_id=room_id,
+        teacher_id=teacher_id,
+        student_group_id=student_group_id,
+        is_course_room=is_course_room,
+        from_day=from_day,
+        to_day=to_day,
+    )
+    assert isinstance(result, list), "Availability must be a list"  #  Postcondition
+    return result
+
+@router.get("/rooms/recommend", response_model=List[RoomRecommendation],
+            dependencies=[Depends(conditional_get("schedule", "rooms"))])
+async def recommend_rooms_endpoint(
+    day_of_week: str,
+    class_type: str,
+    start_hour: int = Query(..., ge=8, le=18),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Free rooms of the class type's kind for a 2-hour class, least used first.
+
+    Reflects every schedule and room write committed before the request, by any
+    worker; a recommended room is not held and may be booked by someone else first.
+    """
+    service = AsyncTimetableService(db)
+    result = await service.recommend_rooms(day_of_week, start_hour, class_type)
+    if check_contracts():
+        assert all(r["room_id"] > 0 for r in result), "Invalid room id recommended"  #  Postcondition
+    return result
+
+@router.get("/cache/stats")
+def cache_stats_endpoint():
+    # Hit/miss/invalidation counters of the reference-data cache, per collection
+    return all_cache_stats()
@@ -0,0 +1,172 @@
+import argparse
+import json
+import sys
+
+from app.core.database import SessionLocal, engine
+from app.core.migrations import applied_versions, load_migrations, migrate as apply_migrations
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.schemas.timetable import MAX_WORKERS, TimetableGenerateRequest
+from app.services.timetable_service import AUDIT_COLUMNS, EXPORT_FORMATS, TimetableService, batched
+
+
+def generate(args) -> int:
+    request = TimetableGenerateRequest(
+        seed=args.seed,
+        max_backtracks=args.max_backtracks,
+        persist=args.persist,
+        seminar_class_type=args.seminar_class_type,
+        time_budget=args.budget,
+        workers=min(args.workers, MAX_WORKERS) if args.workers else None,
+    )
+    db = SessionLocal()
+    try:
+        result = TimetableService(db).generate_timetable(request)
+    finally:
+        db.close()
+
+    summary = {key: value for key, value in result.items() if key != "entries"}
+    summary["placed"] = len(result["entries"])
+    summary["unplaced"] = len(result["unplaced"])
+    print(json.dumps(summary))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+    return 0 if not result["unplaced"] else 1
+
+
+def audit(args) -> int:
+    db = SessionLocal()
+    issues = 0
+
+    def counted(rows):
+        nonlocal issues
+        for row in rows:
+            issues += 1
+            yield row
+
+    service = TimetableService(db)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        batches = batched(counted(service.audit_schedule()), args.batch_size)
+        for chunk in service.render_chunks(batches, args.format, AUDIT_COLUMNS):
+            output.write(chunk)
+        output.flush()
+    finally:
+        if args.output:
+            output.close()
+        db.close()
+    print(json.dumps({"issues": issues}), file=sys.stderr)
+    return 0 if not issues else 1
+
+
+def rebuild_slots(args) -> int:
+    db = SessionLocal()
+    try:
+        result = ScheduleEntryRepository(db).rebuild_slots(args.batch_size)
+    finally:
+        db.close()
+    print(json.dumps(result))
+    return 0 if not result["conflicting"] else 1
+
+
+def migrate(args) -> int:
+    if args.status:
+        applied = applied_versions(engine)
+        for migration in load_migrations():
+            print(f"{'applied' if migration.version in applied else 'pending':>8}  {migration.name}  {migration.description}")
+        return 0
+    print(json.dumps({"applied": apply_migrations(engine, args.target)}))
+    return 0
+
+
+def seed(args) -> int:
+    from app.seeder.seed_data import seed_data
+    print(json.dumps({"seeded": seed_data()}))
+    return 0
+
+
+def synthesize(args) -> int:
+    from app.seeder.synthetic_data import generate_university
+
+    def progress(totals):
+        if totals["faculties"] % args.progress_every == 0:
+            print(json.dumps(totals), file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        totals = generate_university(
+            db,
+            faculties=args.faculties,
+            entries=args.entries,
+            teachers=args.teachers,
+            rooms=args.rooms,
+            groups_per_year=args.groups_per_year,
+            subjects_per_year=args.subjects_per_year,
+            seminar_teachers=args.seminar_teachers,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            progress=progress,
+        )
+    finally:
+        db.close()
+    print(json.dumps(totals))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Timetable maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Generate a conflict-free timetable for the database contents")
+    gen.add_argument("--budget", type=float, default=None,
+                     help="Wall-clock seconds for parallel multi-start solving, at most GENERATE_MAX_TIME_BUDGET "
+                          "(single run if omitted)")
+    gen.add_argument("--workers", type=int, default=None, help="Solver processes (default and maximum: CPU count)")
+    gen.add_argument("--seed", type=int, default=None)
+    gen.add_argument("--max-backtracks", type=int, default=1000)
+    gen.add_argument("--seminar-class-type", choices=["Seminar", "Laboratory"], default="Seminar")
+    gen.add_argument("--persist", action="store_true", help="Save the generated entries")
+    gen.add_argument("--output", help="Write the full result as JSON to this file")
+    gen.set_defaults(handler=generate)
+
+    aud = commands.add_parser("audit", help="Report double-bookings and room-type violations in the stored schedule")
+    aud.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    aud.add_argument("--batch-size", type=int, default=1000, help="Issues encoded per output chunk")
+    aud.add_argument("--output", help="Write the report to this file instead of stdout")
+    aud.set_defaults(handler=audit)
+
+    slots = commands.add_parser("rebuild-slots", help="Refill the schedule_slots occupancy table from the schedule")
+    slots.add_argument("--batch-size", type=int, default=5000, help="Slot rows per INSERT")
+    slots.set_defaults(handler=rebuild_slots)
+
+    mig = commands.add_parser("migrate", help="Apply the pending schema migrations")
+    mig.add_argument("--target", type=int, default=None, help="Stop after this version (default: the latest)")
+    mig.add_argument("--status", action="store_true", help="List applied and pending migrations, change nothing")
+    mig.set_defaults(handler=migrate)
+
+    sd = commands.add_parser("seed", help="Fill an empty, migrated database with demo data")
+    sd.set_defaults(handler=seed)
+
+    syn = commands.add_parser("synthesize", help="Fill an empty, migrated database with large synthetic faculties")
+    size = syn.add_mutually_exclusive_group(required=True)
+    size.add_argument("--faculties", type=int, help="Independent faculties to generate")
+    size.add_argument("--entries", type=int, help="Generate faculties until this many schedule entries exist")
+    syn.add_argument("--teachers", type=int, default=120, help="Teachers per faculty")
+    syn.add_argument("--rooms", type=int, default=90, help="Rooms per faculty, a tenth of them course rooms")
+    syn.add_argument("--groups-per-year", type=int, default=30, help="Student groups in each of the three years")
+    syn.add_argument("--subjects-per-year", type=int, default=12)
+    syn.add_argument("--seminar-teachers", type=int, default=4, help="Seminar/lab teachers of each subject")
+    syn.add_argument("--seed", type=int, default=0)
+    syn.add_argument("--batch-size", type=int, default=20000, help="Schedule entries per INSERT batch")
+    syn.add_argument("--progress-every", type=int, default=50, help="Report totals every N faculties on stderr")
+    syn.set_defaults(handler=synthesize)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import os
+import random
+
+# How much of the expensive contract checking runs: postconditions that walk a
+# whole result list or need another database round-trip.
+#   full    - every call (the default, and what the tests run with)
+#   sampled - a random CONTRACT_SAMPLE_RATE fraction of calls
+#   off     - never; cheap preconditions still run
+CONTRACT_MODES = ("full", "sampled", "off")
+CONTRACTS = os.getenv("CONTRACTS", "full").strip().lower()
+CONTRACT_SAMPLE_RATE = float(os.getenv("CONTRACT_SAMPLE_RATE", "0.01"))
+
+_mode = "full"
+_sample_rate = 1.0
+
+
+def set_contract_mode(mode: str, sample_rate: float = CONTRACT_SAMPLE_RATE):
+    global _mode, _sample_rate
+    assert mode in CONTRACT_MODES, f"Contract mode must be one of {', '.join(CONTRACT_MODES)}"  #  Precondition
+    assert 0 <= sample_rate <= 1, "sample_rate must be between 0 and 1"  #  Precondition
+    _mode = mode
+    _sample_rate = sample_rate
+
+
+def contract_mode() -> str:
+    return _mode
+
+
+def check_contracts() -> bool:
+    """Whether this call should run its expensive postconditions."""
+    if _mode == "full":
+        return True
+    if _mode == "off":
+        return False
+    return random.random() < _sample_rate
+
+
+set_contract_mode(CONTRACTS)
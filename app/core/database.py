@@ -1,19 +1,148 @@
-from sqlalchemy import create_engine
+import os
+import random
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None or not value.strip() else int(value)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+DB_ECHO = _env_bool("DB_ECHO", False)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)  # seconds; -1 disables
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+# Attempts left to a write transaction that lost a race (serialization failure, locked database)
+DB_WRITE_RETRIES = _env_int("DB_WRITE_RETRIES", 5)
+
+# SQLite tuning, applied to every new connection
+SQLITE_BUSY_TIMEOUT = _env_int("SQLITE_BUSY_TIMEOUT", 5000)  # ms to wait on a locked database
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # NORMAL is durable enough under WAL
+SQLITE_CACHE_SIZE = _env_int("SQLITE_CACHE_SIZE", -64000)  # negative = KiB, i.e. 64 MB page cache
+SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.split("?")[0] in ("sqlite://", "sqlite:///:memory:")
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record, in_memory: bool = False):
+    assert SQLITE_SYNCHRONOUS.upper() in ("OFF", "NORMAL", "FULL", "EXTRA"), "Invalid SQLITE_SYNCHRONOUS"  #  Precondition
+    cursor = dbapi_connection.cursor()
+    try:
+        if not in_memory:
+            # WAL lets readers proceed while one writer commits, which is what several
+            # uvicorn workers sharing one file need
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS.upper()}")
+        cursor.execute(f"PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size={int(SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def _server_pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
 
-DATABASE_URL = "sqlite:///./test.db"
+def make_engine(url: str = DATABASE_URL, echo: bool = DB_ECHO) -> Engine:
+    """Build the engine for ``url``: tuned SQLite (WAL) or a pre-pinged QueuePool for servers like PostgreSQL."""
+    assert isinstance(url, str) and url.strip(), "Database URL must be a non-empty string"  #  Precondition
+    if url.startswith("sqlite"):
+        in_memory = _is_memory_sqlite(url)
+        engine = create_engine(url, echo=echo, connect_args={"check_same_thread": False})
+        event.listen(engine, "connect", lambda conn, record: _set_sqlite_pragmas(conn, record, in_memory))
+    else:
+        engine = create_engine(url, echo=echo, poolclass=QueuePool, **_server_pool_options())
+    assert engine.url.drivername.split("+")[0] == url.split(":")[0].split("+")[0], "Engine built for a different backend"  #  Postcondition
+    return engine
 
-engine = create_engine(DATABASE_URL, echo=True, connect_args={"check_same_thread": False})
+def async_url(url: str) -> str:
+    """The asyncio-driver flavour of a database URL (aiosqlite for SQLite, psycopg 3 for PostgreSQL)."""
+    scheme, rest = url.split(":", 1)
+    backend, _, driver = scheme.partition("+")
+    if backend == "sqlite":
+        return "sqlite+aiosqlite:" + rest
+    if backend == "postgresql" and driver not in ("asyncpg", "psycopg"):
+        return "postgresql+psycopg:" + rest
+    return url
+
+def make_async_engine(url: str = DATABASE_URL, echo: bool = DB_ECHO) -> AsyncEngine:
+    """Async counterpart of ``make_engine`` with the same pool settings and SQLite pragmas."""
+    assert isinstance(url, str) and url.strip(), "Database URL must be a non-empty string"  #  Precondition
+    url = os.getenv("ASYNC_DATABASE_URL") or async_url(url)
+    if url.startswith("sqlite"):
+        in_memory = _is_memory_sqlite(url.replace("+aiosqlite", ""))
+        engine = create_async_engine(url, echo=echo)
+        event.listen(engine.sync_engine, "connect", lambda conn, record: _set_sqlite_pragmas(conn, record, in_memory))
+    else:
+        engine = create_async_engine(url, echo=echo, **_server_pool_options())
+    return engine
+
+def is_write_conflict(error: DBAPIError) -> bool:
+    """True when re-running the transaction may succeed: a serialization failure or
+    deadlock on PostgreSQL, or a database still locked after ``busy_timeout`` on SQLite."""
+    orig = getattr(error, "orig", None)
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if sqlstate in ("40001", "40P01"):
+        return True
+    return "database is locked" in str(orig)
+
+def retry_delay(attempt: int) -> float:
+    """Jittered exponential backoff (seconds) before retry number ``attempt``."""
+    return random.uniform(0, 0.01 * 2 ** attempt)
+
+def database_key(bind) -> str:
+    """Identify the database behind an engine (sync or async) independently of its driver."""
+    url = bind.url
+    return url.set(drivername=url.get_backend_name()).render_as_string(hide_password=False)
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def create_db_and_tables():
-    from app.models import teacher, room, student_group, subject, schedule_entry
-    Base.metadata.create_all(bind=engine)
-    
+# Created lazily: the asyncio driver is only imported once an async route runs
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker | None = None
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = make_async_engine()
+    return _async_engine
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        # expire_on_commit=False: returned objects are serialized after commit, and an
+        # expired attribute would need a lazy load that AsyncSession cannot do implicitly
+        _async_sessionmaker = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
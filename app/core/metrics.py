@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.database import Base
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+# Histogram upper bounds; +Inf is always added
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+UNMATCHED_ROUTE = "unmatched"  # keeps label cardinality bounded for 404s
+
+
+class RequestStats:
+    """Database work done on behalf of one request, filled in by the SQLAlchemy hooks."""
+
+    __slots__ = ("db_time", "queries", "rows")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.rows = 0
+
+    def server_timing(self, wall: float) -> str:
+        return (f'total;dur={wall * 1000:.2f}, '
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries, {self.rows} rows"')
+
+
+# Set by the middleware for the duration of a request; copied into the threadpool
+# and into SQLAlchemy's asyncio greenlets, and shared by reference from there
+_current_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.db_time += time.perf_counter() - starts.pop()
+    stats.queries += 1
+
+
+def _on_load(target, context):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def install_query_hooks():
+    """Time every cursor execution and count hydrated ORM instances, on all engines (sync and async)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Base, "load", _on_load, propagate=True)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """A labelled Prometheus histogram kept in process memory."""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple, buckets: tuple):
+        assert list(buckets) == sorted(buckets), "Buckets must be ascending"  #  Precondition
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class RequestMetrics:
+    """Per-endpoint request histograms and counters, rendered in the Prometheus text format.
+
+    Values are per process: with several uvicorn workers each scrape reaches one of them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}  # (method, route, status) -> count
+        self.duration = Histogram("http_request_duration_seconds", "Wall time from request to last body byte.",
+                                  ("method", "route"), DURATION_BUCKETS)
+        self.db_duration = Histogram("http_request_db_seconds", "Time spent in database cursor executions.",
+                                     ("method", "route"), DURATION_BUCKETS)
+        self.queries = Histogram("http_request_queries", "SQL statements executed per request.",
+                                 ("method", "route"), QUERY_BUCKETS)
+        self.rows = Histogram("http_request_rows_hydrated", "ORM instances loaded per request.",
+                              ("method", "route"), ROW_BUCKETS)
+
+    def observe(self, method: str, route: str, status: int, wall: float, stats: RequestStats):
+        assert wall >= 0, "wall time must not be negative"  #  Precondition
+        labels = (method, route)
+        with self._lock:
+            key = (method, route, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self.duration.observe(labels, wall)
+            self.db_duration.observe(labels, stats.db_time)
+            self.queries.observe(labels, stats.queries)
+            self.rows.observe(labels, stats.rows)
+
+    def render(self) -> str:
+        with self._lock:
+            lines = ["# HELP http_requests_total Requests handled.", "# TYPE http_requests_total counter"]
+            for key, count in sorted(self._requests.items()):
+                lines.append(f"http_requests_total{_format_labels(('method', 'route', 'status'), key)} {count}")
+            for histogram in (self.duration, self.db_duration, self.queries, self.rows):
+                lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+
+def route_label(scope) -> str:
+    """The matched route's path template (``/schedule/{schedule_id}``), never the raw path."""
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    # Routes of an included router may carry only their own part of the path;
+    # the matched request path supplies the prefix segments in front of it
+    path = scope["path"]
+    depth = template.count("/")
+    prefix = path.rsplit("/", depth)[0] if path.count("/") > depth else ""
+    return prefix + template
+
+
+class MetricsMiddleware:
+    """ASGI middleware measuring each HTTP request and adding a ``Server-Timing`` header.
+
+    The header is written with the response start, so for streamed responses it
+    covers the work done before the first byte; the histograms cover the whole body.
+    """
+
+    def __init__(self, app, metrics: "RequestMetrics | None" = None):
+        self.app = app
+        self.metrics = metrics if metrics is not None else request_metrics
+        install_query_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self.metrics.observe(scope["method"], route_label(scope), status, time.perf_counter() - start, stats)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,79 @@
+"""Versioned schema migrations, run out of band with ``python -m app.cli migrate``.
+
+Each module ``app/migrations/vNNNN_<name>.py`` holds one version: a
+``DESCRIPTION`` and an ``upgrade(connection)``. Applied versions are recorded in
+``schema_migrations``; every migration runs in one transaction together with its
+record, so an interrupted run resumes at the first version not recorded. Drivers
+that commit DDL on their own (pysqlite) make that weaker, which is why upgrades
+only create what is missing and can safely run twice.
+"""
+import importlib
+import pkgutil
+import re
+import time
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, insert, select
+from sqlalchemy.engine import Engine
+
+import app.migrations
+
+_MODULE_NAME = re.compile(r"^v(\d{4})_\w+$")
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", String, nullable=False),  # UTC, ISO 8601
+)
+
+
+class Migration:
+    def __init__(self, version: int, module):
+        self.version = version
+        self.name = module.__name__.rsplit(".", 1)[-1]
+        self.description = module.DESCRIPTION
+        self.upgrade = module.upgrade
+
+
+def load_migrations() -> list[Migration]:
+    """Every migration in ``app/migrations``, in version order."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(app.migrations.__path__):
+        match = _MODULE_NAME.match(module_info.name)
+        if match:
+            module = importlib.import_module(f"{app.migrations.__name__}.{module_info.name}")
+            migrations.append(Migration(int(match.group(1)), module))
+    migrations.sort(key=lambda m: m.version)
+    assert [m.version for m in migrations] == list(range(1, len(migrations) + 1)), "Migration versions must be 1..N without gaps"  #  Postcondition
+    return migrations
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(schema_migrations.name):
+            return set()
+        return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> list[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in load_migrations() if m.version not in applied]
+
+
+def migrate(engine: Engine, target: int | None = None) -> list[int]:
+    """Apply the pending migrations up to ``target`` (default: all); returns the versions applied."""
+    assert target is None or target >= 0, "target must not be negative"  #  Precondition
+    schema_migrations.create(engine, checkfirst=True)
+    applied = []
+    for migration in pending_migrations(engine):
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            ))
+        applied.append(migration.version)
+    return applied
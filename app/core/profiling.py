@@ -0,0 +1,251 @@
+import asyncio
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from app.core.metrics import route_label
+
+# Off unless a threshold is given; all three can also be changed at runtime through /admin/profiling
+PROFILE_SLOW_REQUESTS_MS = os.getenv("PROFILE_SLOW_REQUESTS_MS")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_FORMATS = ("collapsed", "pstats", "text")
+
+MAX_STACK_DEPTH = 128
+# A thread whose innermost Python frame is in one of these modules is waiting for work
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py")
+
+
+def _stack(frame) -> tuple:
+    """``(filename, first line, function)`` keys from the outermost frame to ``frame``."""
+    keys = []
+    while frame is not None and len(keys) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        keys.append((code.co_filename, code.co_firstlineno, code.co_name))
+        frame = frame.f_back
+    keys.reverse()
+    return tuple(keys)
+
+
+def _is_idle(frame) -> bool:
+    return os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES
+
+
+def _running_task(loop):
+    # The task a loop is executing, read from another thread; None where the
+    # interpreter does not expose it, and the loop thread is then attributed whole
+    current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+    return current_tasks.get(loop) if current_tasks is not None else None
+
+
+class RequestProfile:
+    """Stack samples taken while one request was in flight."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, interval: float):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = None
+        self.interval = interval
+        self.captured_at = time.time()
+        self.duration = 0.0
+        self.samples = 0
+        self.stacks = Counter()  # stack tuple -> samples
+        try:
+            self.loop = asyncio.get_running_loop()
+            self.task = asyncio.current_task()
+        except RuntimeError:
+            self.loop = self.task = None
+        self.thread = threading.get_ident()
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id, "method": self.method, "path": self.path, "route": self.route, "status": self.status,
+            "duration_ms": round(self.duration * 1000, 2), "samples": self.samples,
+            "captured_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.captured_at)),
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format (``outer;inner count``), read by flamegraph.pl and speedscope."""
+        lines = []
+        for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            frames = ";".join(f"{name} ({'/'.join(filename.split(os.sep)[-2:])}:{line})"
+                              for filename, line, name in stack)
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def create_stats(self):
+        """Fill ``self.stats`` in the layout ``pstats.Stats`` and ``cProfile`` use.
+
+        Sampled, not traced: call counts are the samples a function appeared in and
+        times are samples times the interval.
+        """
+        stats = {}
+        for stack, count in self.stacks.items():
+            elapsed = count * self.interval
+            for function in set(stack):
+                cc, nc, tt, ct, callers = stats.get(function, (0, 0, 0.0, 0.0, {}))
+                stats[function] = (cc + count, nc + count, tt, ct + elapsed, callers)
+            leaf = stack[-1]
+            cc, nc, tt, ct, callers = stats[leaf]
+            stats[leaf] = (cc, nc, tt + elapsed, ct, callers)
+            for caller, callee in set(zip(stack, stack[1:])):
+                callers = stats[callee][4]
+                c_nc, c_cc, c_tt, c_ct = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (c_nc + count, c_cc + count, c_tt, c_ct + elapsed)
+        self.stats = stats
+
+    def pstats_dump(self) -> bytes:
+        """The profile as a ``.prof`` file for ``pstats``, snakeviz or gprof2dot."""
+        self.create_stats()
+        return marshal.dumps(self.stats)
+
+    def pstats_text(self, limit: int = 40) -> str:
+        output = io.StringIO()
+        pstats.Stats(self, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests and keeps the profiles of the slow ones.
+
+    One daemon thread wakes every ``interval`` seconds while profiled requests are
+    in flight. A request owns its event-loop thread while its task is the one
+    running; busy threadpool and driver threads cannot be told apart, so their
+    samples go to every request in flight. Only requests that took at least
+    ``threshold`` seconds are kept, the newest ``keep`` of them.
+    """
+
+    def __init__(self, threshold: float | None = None, keep: int = PROFILE_KEEP, interval: float = 0.005):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._active = set()
+        self._sampler = None
+        self.profiles = deque(maxlen=keep)
+        self.configure(threshold, keep, interval)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold is not None
+
+    def configure(self, threshold: float | None, keep: int, interval: float):
+        assert threshold is None or threshold >= 0, "threshold must not be negative"  #  Precondition
+        assert 1 <= keep <= 1000, "keep must be between 1 and 1000"  #  Precondition
+        assert 0.001 <= interval <= 1, "interval must be between 1 ms and 1 s"  #  Precondition
+        with self._lock:
+            self.threshold = threshold
+            self.interval = interval
+            if keep != self.profiles.maxlen:
+                self.profiles = deque(self.profiles, maxlen=keep)
+
+    def settings(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": None if self.threshold is None else self.threshold * 1000,
+            "keep": self.profiles.maxlen,
+            "interval_ms": self.interval * 1000,
+        }
+
+    def start(self, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(method, path, self.interval)
+        with self._lock:
+            self._active.add(profile)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._sampler.start()
+        self._wake.set()
+        return profile
+
+    def finish(self, profile: RequestProfile, duration: float) -> bool:
+        """Stop sampling ``profile``; True when it was slow enough to keep."""
+        profile.duration = duration
+        with self._lock:
+            self._active.discard(profile)
+            keep = self.threshold is not None and duration >= self.threshold and profile.samples > 0
+            if keep:
+                self.profiles.append(profile)
+        return keep
+
+    def get(self, profile_id: int) -> RequestProfile | None:
+        with self._lock:
+            return next((p for p in self.profiles if p.id == profile_id), None)
+
+    def summaries(self) -> list[dict]:
+        with self._lock:
+            return [p.summary() for p in reversed(self.profiles)]
+
+    def clear(self):
+        with self._lock:
+            self.profiles.clear()
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                # Under the lock, so a profile is never written to once finish() returned it
+                active = list(self._active)
+                if active:
+                    self.sample(active, sys._current_frames(), own)
+            if not active:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            time.sleep(self.interval)
+
+    def sample(self, active: list, frames: dict, own: int | None = None):
+        """Attribute one snapshot of every thread's stack to the ``active`` profiles."""
+        request_threads = {profile.thread for profile in active}
+        shared = [_stack(frame) for thread, frame in frames.items()
+                  if thread != own and thread not in request_threads and not _is_idle(frame)]
+        running = {profile.loop: _running_task(profile.loop) for profile in active if profile.loop is not None}
+        for profile in active:
+            stacks = list(shared)
+            frame = frames.get(profile.thread)
+            owns_thread = profile.loop is None or running[profile.loop] in (None, profile.task)
+            if frame is not None and owns_thread and not _is_idle(frame):
+                stacks.append(_stack(frame))
+            for stack in stacks:
+                profile.stacks[stack] += 1
+            profile.samples += 1 if stacks else 0
+
+
+class ProfilingMiddleware:
+    """ASGI middleware handing every HTTP request to ``profiler`` while profiling is on."""
+
+    def __init__(self, app, profiler: SlowRequestProfiler | None = None):
+        self.app = app
+        self.profiler = profiler if profiler is not None else slow_request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        profile = self.profiler.start(scope["method"], scope["path"])
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profile.route = route_label(scope)
+            self.profiler.finish(profile, time.perf_counter() - start)
+
+
+slow_request_profiler = SlowRequestProfiler(
+    threshold=None if not PROFILE_SLOW_REQUESTS_MS else float(PROFILE_SLOW_REQUESTS_MS) / 1000,
+    keep=PROFILE_KEEP,
+    interval=PROFILE_INTERVAL_MS / 1000,
+)
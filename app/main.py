@@ -1,10 +1,11 @@
 from fastapi import FastAPI
-from app.api.v1 import timetable
+from app.api.v1 import admin, timetable
 from contextlib import asynccontextmanager
-from app.core.database import create_db_and_tables
-from app.seeder.seed_data import seed_data
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from app.core.metrics import METRICS_ENABLED, MetricsMiddleware, request_metrics
+from app.core.profiling import ProfilingMiddleware
 
 app = FastAPI()
 
@@ -15,12 +16,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# A pass-through until slow-request profiling is switched on (PROFILE_SLOW_REQUESTS_MS or PUT /admin/profiling)
+app.add_middleware(ProfilingMiddleware)
+if METRICS_ENABLED:
+    # Added last so it is outermost: the timings include CORS and error handling
+    app.add_middleware(MetricsMiddleware)
 
-@app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
-    seed_data()
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+# No startup hook: the schema is migrated (python -m app.cli migrate) and seeded
+# (python -m app.cli seed) out of band, so a new worker serves without touching the database
 
 app.include_router(timetable.router, prefix="/api/v1/timetable")
+app.include_router(admin.router, prefix="/admin")
 # app.mount("/", StaticFiles(directory="app/frontend", html=True), name="frontend")
 
@@ -0,0 +1,100 @@
+"""Initial schema: reference tables and schedule entries with their lookup indexes.
+
+The tables are declared here rather than taken from ``app.models`` so the
+migration keeps creating this version of the schema when the models move on.
+Tables and indexes are created only where missing, which also brings databases
+made by the old ``create_all`` at startup up to this version.
+"""
+from sqlalchemy import (
+    Boolean, CheckConstraint, Column, Enum, ForeignKey, Index, Integer, MetaData, String, Table,
+)
+
+DESCRIPTION = "Initial schema"
+
+metadata = MetaData()
+
+Table(
+    "teachers", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, nullable=False),
+    CheckConstraint("name IS NOT NULL", name="teacher_name_not_null"),
+    CheckConstraint("name != ''", name="teacher_name_not_empty"),
+)
+
+Table(
+    "rooms", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, unique=True, nullable=False),
+    Column("is_course_room", Boolean, nullable=False),
+    CheckConstraint("name IS NOT NULL", name="room_name_not_null"),
+    CheckConstraint("name != ''", name="room_name_not_empty"),
+    CheckConstraint("is_course_room IN (0, 1)", name="room_is_course_room_valid"),
+)
+
+Table(
+    "student_years", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("year", Integer, nullable=False),
+    CheckConstraint("year IS NOT NULL", name="year_not_null"),
+    CheckConstraint("year >= 1 AND year <= 3", name="valid_student_year"),
+)
+
+Table(
+    "student_groups", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("student_year_id", Integer, ForeignKey("student_years.id"), nullable=False),
+    Column("letter", String, nullable=False),
+    CheckConstraint("letter IS NOT NULL", name="student_group_letter_not_null"),
+    CheckConstraint("letter != ''", name="student_group_letter_not_empty"),
+    CheckConstraint("length(letter) = 2", name="student_group_letter_length"),
+    CheckConstraint("substr(letter, 1, 1) BETWEEN 'A' AND 'Z'", name="student_group_letter_first_char"),
+    CheckConstraint("substr(letter, 2, 1) BETWEEN '0' AND '9'", name="student_group_letter_second_char"),
+    CheckConstraint("student_year_id IS NOT NULL", name="student_group_student_year_not_null"),
+    CheckConstraint("student_year_id > 0", name="student_group_student_year_positive"),
+    Index("ix_student_groups_year_letter", "student_year_id", "letter"),
+)
+
+Table(
+    "subjects", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("course_teacher_id", Integer, ForeignKey("teachers.id"), nullable=False),
+    Column("student_year_id", Integer, ForeignKey("student_years.id"), nullable=False, index=True),
+    Column("name", String, unique=True, nullable=False),
+    CheckConstraint("name IS NOT NULL", name="subject_name_not_null"),
+    CheckConstraint("course_teacher_id IS NOT NULL", name="course_teacher_not_null"),
+    CheckConstraint("student_year_id IS NOT NULL", name="student_year_not_null"),
+)
+
+Table(
+    "subject_teacher_association", metadata,
+    Column("subject_id", Integer, ForeignKey("subjects.id")),
+    Column("teacher_id", Integer, ForeignKey("teachers.id")),
+)
+
+Table(
+    "schedule_entries", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("day_of_week", String, nullable=False),
+    Column("start_hour", Integer, nullable=False),
+    Column("end_hour", Integer, nullable=False),
+    Column("subject_id", Integer, ForeignKey("subjects.id"), nullable=False),
+    Column("room_id", Integer, ForeignKey("rooms.id"), nullable=False),
+    Column("student_group_id", Integer, ForeignKey("student_groups.id"), nullable=True, index=True),
+    Column("teacher_id", Integer, ForeignKey("teachers.id"), nullable=False),
+    Column("class_type", Enum("Course", "Seminar", "Laboratory", name="classtypeenum"), nullable=False),
+    CheckConstraint("start_hour >= 8 AND start_hour < 20", name="start_hour_valid"),
+    CheckConstraint("end_hour > start_hour AND end_hour <= 20", name="end_hour_valid"),
+    CheckConstraint("end_hour - start_hour = 2", name="class_duration_2h"),
+    CheckConstraint("day_of_week IN ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')", name="valid_weekday"),
+    Index("ix_schedule_entries_room_slot", "room_id", "day_of_week", "start_hour", "end_hour"),
+    Index("ix_schedule_entries_teacher_slot", "teacher_id", "day_of_week", "start_hour", "end_hour"),
+    Index("ix_schedule_entries_subject_group", "subject_id", "student_group_id"),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
+    # create_all skips the indexes of tables that already exist
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
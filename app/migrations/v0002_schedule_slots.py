@@ -0,0 +1,100 @@
+"""The schedule_slots occupancy table, filled from the schedule already stored.
+
+The backfill is written out here rather than delegated to
+``ScheduleEntryRepository.rebuild_slots`` so replaying this version keeps doing
+what it did when it shipped, whatever the repository becomes.
+"""
+from sqlalchemy import (
+    CheckConstraint, Column, ForeignKey, Integer, MetaData, PrimaryKeyConstraint, String, Table, insert, inspect,
+    select,
+)
+
+DESCRIPTION = "schedule_slots occupancy table"
+
+BATCH_SIZE = 5000
+
+metadata = MetaData()
+
+# Read by the backfill and referenced by the foreign key; created by v0001
+schedule_entries = Table(
+    "schedule_entries", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("day_of_week", String),
+    Column("start_hour", Integer),
+    Column("end_hour", Integer),
+    Column("subject_id", Integer),
+    Column("room_id", Integer),
+    Column("teacher_id", Integer),
+    Column("student_group_id", Integer),
+)
+subjects = Table("subjects", metadata, Column("id", Integer, primary_key=True), Column("student_year_id", Integer))
+student_groups = Table(
+    "student_groups", metadata, Column("id", Integer, primary_key=True), Column("student_year_id", Integer),
+)
+
+schedule_slots = Table(
+    "schedule_slots", metadata,
+    Column("resource_type", String, nullable=False),
+    Column("resource_id", Integer, nullable=False),
+    Column("day_of_week", String, nullable=False),
+    Column("hour", Integer, nullable=False),
+    Column("schedule_entry_id", Integer, ForeignKey("schedule_entries.id", ondelete="CASCADE"), nullable=False,
+           index=True),
+    PrimaryKeyConstraint("resource_type", "resource_id", "day_of_week", "hour", name="pk_schedule_slots"),
+    CheckConstraint("resource_type IN ('room', 'teacher', 'group', 'year')", name="schedule_slot_resource_type_valid"),
+    CheckConstraint("hour >= 8 AND hour < 20", name="schedule_slot_hour_valid"),
+)
+
+
+def _year_groups(connection) -> dict[int, tuple[int, list[int]]]:
+    """``subject_id -> (student_year_id, [group_id, ...])`` for the subjects of courses without a group."""
+    course_subjects = select(schedule_entries.c.subject_id).where(schedule_entries.c.student_group_id.is_(None))
+    rows = connection.execute(
+        select(subjects.c.id, subjects.c.student_year_id, student_groups.c.id)
+        .outerjoin(student_groups, student_groups.c.student_year_id == subjects.c.student_year_id)
+        .where(subjects.c.id.in_(course_subjects))
+    )
+    year_groups = {}
+    for subject_id, year_id, group_id in rows:
+        _, group_ids = year_groups.setdefault(subject_id, (year_id, []))
+        if group_id is not None:
+            group_ids.append(group_id)
+    return year_groups
+
+
+def _backfill(connection):
+    # Entries are replayed in id order; an earlier double booking keeps only its free slots
+    year_groups = _year_groups(connection)
+    entries = connection.execute(select(
+        schedule_entries.c.id, schedule_entries.c.day_of_week, schedule_entries.c.start_hour,
+        schedule_entries.c.end_hour, schedule_entries.c.subject_id, schedule_entries.c.room_id,
+        schedule_entries.c.teacher_id, schedule_entries.c.student_group_id,
+    ).order_by(schedule_entries.c.id)).all()
+    taken, pending = set(), []
+    for entry_id, day, start, end, subject_id, room_id, teacher_id, group_id in entries:
+        keys = [("room", room_id), ("teacher", teacher_id)]
+        if group_id is not None:
+            keys.append(("group", group_id))
+        elif subject_id in year_groups:
+            year_id, group_ids = year_groups[subject_id]
+            keys.append(("year", year_id))
+            keys.extend(("group", other) for other in group_ids)
+        for kind, resource_id in keys:
+            for hour in range(start, end):
+                if (kind, resource_id, day, hour) in taken:
+                    continue
+                taken.add((kind, resource_id, day, hour))
+                pending.append(dict(resource_type=kind, resource_id=resource_id, day_of_week=day, hour=hour,
+                                    schedule_entry_id=entry_id))
+        if len(pending) >= BATCH_SIZE:
+            connection.execute(insert(schedule_slots), pending)
+            pending = []
+    if pending:
+        connection.execute(insert(schedule_slots), pending)
+
+
+def upgrade(connection):
+    if inspect(connection).has_table(schedule_slots.name):
+        return  # made by the old startup create_all, which also filled it
+    schedule_slots.create(connection)
+    _backfill(connection)
@@ -0,0 +1,26 @@
+"""The collection_versions table: write counters shared by every worker."""
+import time
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, insert, select
+
+DESCRIPTION = "collection_versions write counters"
+
+COLLECTIONS = ("teachers", "rooms", "years", "groups", "subjects", "schedule")
+
+metadata = MetaData()
+
+collection_versions = Table(
+    "collection_versions", metadata,
+    Column("collection", String, primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+    Column("modified_at", Float, nullable=False),
+)
+
+
+def upgrade(connection):
+    collection_versions.create(connection, checkfirst=True)
+    present = set(connection.execute(select(collection_versions.c.collection)).scalars())
+    missing = [collection for collection in COLLECTIONS if collection not in present]
+    if missing:
+        connection.execute(insert(collection_versions), [dict(collection=collection, version=0, modified_at=time.time())
+                                                         for collection in missing])
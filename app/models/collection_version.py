@@ -0,0 +1,24 @@
+import time
+
+from sqlalchemy import Column, Float, Integer, String, event, insert
+from app.core.database import Base
+
+VERSIONED_COLLECTIONS = ("teachers", "rooms", "years", "groups", "subjects", "schedule")
+
+class CollectionVersion(Base):
+    """Write counter of one collection, shared by every process on the database.
+
+    Repositories bump it in the same transaction as the write, so ETags and the
+    occupancy map of every worker see the change as soon as it commits.
+    """
+    __tablename__ = "collection_versions"
+
+    collection = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    modified_at = Column(Float, nullable=False)  # Unix time of the last bump
+
+@event.listens_for(CollectionVersion.__table__, "after_create")
+def _add_collections(table, connection, **kw):
+    # A counter that has no row could never be bumped
+    connection.execute(insert(table), [dict(collection=collection, version=0, modified_at=time.time())
+                                       for collection in VERSIONED_COLLECTIONS])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, CheckConstraint, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, CheckConstraint, Enum, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -19,7 +19,7 @@ class ScheduleEntry(Base):
 
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=False)
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
-    student_group_id = Column(Integer, ForeignKey("student_groups.id"), nullable=True)
+    student_group_id = Column(Integer, ForeignKey("student_groups.id"), nullable=True, index=True)
     teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=False)
 
     class_type = Column(Enum(ClassTypeEnum), nullable=False)
@@ -30,6 +30,10 @@ class ScheduleEntry(Base):
     student_group = relationship("StudentGroup")
     teacher = relationship("Teacher")
 
+    # Not a column: the year a course without a group blocks, set by add_if_free from the
+    # subject lookup its slot rows need, so callers need not query the subject again
+    course_year_id = None
+
     __table_args__ = (
         CheckConstraint("start_hour >= 8 AND start_hour < 20", name="start_hour_valid"),
         CheckConstraint("end_hour > start_hour AND end_hour <= 20", name="end_hour_valid"),
@@ -38,4 +42,9 @@ class ScheduleEntry(Base):
             "day_of_week IN ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')",
             name="valid_weekday"
         ),
+        # Composite indexes serving room/teacher filters by day and hour (exports, listings)
+        Index("ix_schedule_entries_room_slot", "room_id", "day_of_week", "start_hour", "end_hour"),
+        Index("ix_schedule_entries_teacher_slot", "teacher_id", "day_of_week", "start_hour", "end_hour"),
+        # Serves subject_id filters and the year-course branch of a group's timetable (student_group_id IS NULL)
+        Index("ix_schedule_entries_subject_group", "subject_id", "student_group_id"),
     )
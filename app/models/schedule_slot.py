@@ -0,0 +1,24 @@
+from sqlalchemy import CheckConstraint, Column, ForeignKey, Integer, PrimaryKeyConstraint, String
+from app.core.database import Base
+
+class ScheduleSlot(Base):
+    """One hour of one resource taken by a schedule entry.
+
+    The primary key makes every (resource, day, hour) bookable once, so a double
+    booking is a constraint violation. A course without a group takes its year
+    and every group of that year, which is how courses and seminars of one year
+    exclude each other.
+    """
+    __tablename__ = "schedule_slots"
+
+    resource_type = Column(String, nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    day_of_week = Column(String, nullable=False)
+    hour = Column(Integer, nullable=False)
+    schedule_entry_id = Column(Integer, ForeignKey("schedule_entries.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("resource_type", "resource_id", "day_of_week", "hour", name="pk_schedule_slots"),
+        CheckConstraint("resource_type IN ('room', 'teacher', 'group', 'year')", name="schedule_slot_resource_type_valid"),
+        CheckConstraint("hour >= 8 AND hour < 20", name="schedule_slot_hour_valid"),
+    )
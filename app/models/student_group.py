@@ -1,7 +1,10 @@
-from sqlalchemy import CheckConstraint, Column, Integer, String, ForeignKey
+from sqlalchemy import CheckConstraint, Column, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
+# The letters the student_group_letter_* constraints admit: one uppercase letter, one digit
+LETTER_PATTERN = "^[A-Z][0-9]$"
+
 class StudentGroup(Base):
     __tablename__ = "student_groups"
 
@@ -15,8 +18,10 @@ class StudentGroup(Base):
         CheckConstraint("letter IS NOT NULL", name="student_group_letter_not_null"),
         CheckConstraint("letter != ''", name="student_group_letter_not_empty"),
         CheckConstraint("length(letter) = 2", name="student_group_letter_length"),
-        CheckConstraint("letter[0] BETWEEN 'A' AND 'Z'", name="student_group_letter_first_char"),
-        CheckConstraint("letter[1] BETWEEN '0' AND '9'", name="student_group_letter_second_char"),
+        CheckConstraint("substr(letter, 1, 1) BETWEEN 'A' AND 'Z'", name="student_group_letter_first_char"),
+        CheckConstraint("substr(letter, 2, 1) BETWEEN '0' AND '9'", name="student_group_letter_second_char"),
         CheckConstraint("student_year_id IS NOT NULL", name="student_group_student_year_not_null"),
-        CheckConstraint("student_year_id > 0", name="student_group_student_year_positive")
+        CheckConstraint("student_year_id > 0", name="student_group_student_year_positive"),
+        # Resolves "year N, group X" without scanning every group with that letter
+        Index("ix_student_groups_year_letter", "student_year_id", "letter"),
     )
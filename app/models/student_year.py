@@ -1,6 +1,9 @@
 from sqlalchemy import CheckConstraint, Column, Integer
 from app.core.database import Base
 
+# Study years the valid_student_year constraint admits; routes take their path bounds from here
+MIN_YEAR, MAX_YEAR = 1, 3
+
 class StudentYear(Base):
     __tablename__ = "student_years"
 
@@ -9,5 +12,5 @@ class StudentYear(Base):
 
     __table_args__ = (
         CheckConstraint("year IS NOT NULL", name="year_not_null"),
-        CheckConstraint("year >= 1 AND year <= 3", name="valid_student_year")
+        CheckConstraint(f"year >= {MIN_YEAR} AND year <= {MAX_YEAR}", name="valid_student_year")
     )
@@ -14,7 +14,7 @@ class Subject(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     course_teacher_id = Column(Integer, ForeignKey("teachers.id"), nullable=False)
-    student_year_id = Column(Integer, ForeignKey("student_years.id"), nullable=False)
+    student_year_id = Column(Integer, ForeignKey("student_years.id"), nullable=False, index=True)
     name = Column(String, unique=True, nullable=False)
     course_teacher = relationship("Teacher", foreign_keys=[course_teacher_id])
     seminar_lab_teachers = relationship("Teacher", secondary=subject_teacher_association)
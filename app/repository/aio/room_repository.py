@@ -0,0 +1,47 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.contracts import check_contracts
+from app.models.room import Room
+from app.repository.pagination import keyset
+from app.repository.versions import bump_versions
+
+class AsyncRoomRepository:
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+
+    async def add(self, name: str, is_course_room: bool) -> Room:
+        # Preconditions
+        assert name is not None and isinstance(name, str) and name.strip(), "Name must be a non-empty string"
+        assert isinstance(is_course_room, bool), "is_course_room must be a boolean value"
+        room = Room(name=name, is_course_room=is_course_room)
+        self.db.add(room)
+        await self.db.execute(bump_versions("rooms"))
+        await self.db.commit()
+        # Postconditions
+        assert room.id is not None, "Room was not assigned an ID"
+        assert room.is_course_room == is_course_room, "Room type not persisted correctly"
+        return room
+
+    async def get_all(self) -> list[Room]:
+        results = list((await self.db.scalars(select(Room))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    async def get_room_types(self) -> dict[int, bool]:
+        # id -> is_course_room without hydrating Room objects
+        results = dict((await self.db.execute(select(Room.id, Room.is_course_room))).all())
+        if check_contracts():
+            assert all(isinstance(v, bool) for v in results.values()), "Room type must be boolean"
+        return results
+
+    async def get_by_id(self, room_id: int) -> Room | None:
+        assert isinstance(room_id, int) and room_id > 0, "room_id must be a positive integer"
+        result = await self.db.get(Room, room_id)
+        assert (result is None or result.id == room_id), "Mismatched ID in result"
+        return result
+
+    async def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[Room]:
+        results = list((await self.db.scalars(keyset(select(Room), Room.id, after_id, limit))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
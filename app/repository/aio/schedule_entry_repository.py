@@ -0,0 +1,182 @@
+import asyncio
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.contracts import check_contracts
+from app.core.database import DB_WRITE_RETRIES, is_write_conflict, retry_delay
+from app.models.schedule_entry import ScheduleEntry
+from app.models.schedule_slot import ScheduleSlot
+from app.repository.pagination import keyset
+from app.repository.schedule_entry_repository import (
+    EXPANDED_LOADS, SLOT_COLUMNS, course_subject_ids, course_year, filter_schedule, first_clash, group_timetable_query,
+    insert_entries_statement, insert_slots_sql, returned_ids, slot_rows, slot_values, subject_year_groups_query,
+    taken_slots_query, year_groups_by_subject,
+)
+from app.repository.versions import bump_versions
+
+class AsyncScheduleEntryRepository:
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+
+    async def add(
+        self,
+        day_of_week: str,
+        start_hour: int,
+        end_hour: int,
+        subject_id: int,
+        room_id: int,
+        teacher_id: int,
+        class_type: str,
+        student_group_id: int = None
+    ) -> ScheduleEntry:
+        #  Preconditions
+        assert isinstance(day_of_week, str) and day_of_week.strip(), "day_of_week must be a non-empty string"
+        assert 8 <= start_hour < 20, "start_hour must be between 8 and 19"
+        assert 9 <= end_hour <= 20, "end_hour must be between 9 and 20"
+        assert end_hour > start_hour, "end_hour must be after start_hour"
+        assert class_type in ["Course", "Seminar", "Laboratory"], "Invalid class type"
+        assert all(isinstance(i, int) for i in [subject_id, room_id, teacher_id]), "Foreign key IDs must be integers"
+
+        schedule_entry = ScheduleEntry(
+            day_of_week=day_of_week,
+            start_hour=start_hour,
+            end_hour=end_hour,
+            subject_id=subject_id,
+            room_id=room_id,
+            teacher_id=teacher_id,
+            class_type=class_type,
+            student_group_id=student_group_id
+        )
+        self.db.add(schedule_entry)
+        try:
+            await self.db.flush()
+            await self._add_slots([schedule_entry.id], [dict(
+                day_of_week=day_of_week, start_hour=start_hour, end_hour=end_hour, subject_id=subject_id,
+                room_id=room_id, teacher_id=teacher_id, student_group_id=student_group_id,
+            )])
+            await self.db.execute(bump_versions("schedule"))
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+
+        #  Postconditions
+        assert schedule_entry.id is not None, "Schedule entry was not assigned an ID"
+        assert schedule_entry.start_hour == start_hour, "start_hour not persisted correctly"
+        return schedule_entry
+
+    async def add_if_free(self, retries: int = DB_WRITE_RETRIES, **fields) -> tuple[ScheduleEntry | None, str | None]:
+        """Async ``ScheduleEntryRepository.add_if_free``: entry and slots in one transaction, retried on conflicts."""
+        #  Preconditions
+        assert fields["end_hour"] > fields["start_hour"], "end_hour must be after start_hour"
+        assert fields["class_type"] in ["Course", "Seminar", "Laboratory"], "Invalid class type"
+        assert retries >= 0, "retries must not be negative"
+
+        year_groups = await self._year_groups([fields])
+        for attempt in range(retries + 1):
+            schedule_entry = ScheduleEntry(**fields)
+            self.db.add(schedule_entry)
+            try:
+                await self.db.flush()
+                await self.db.execute(insert(ScheduleSlot.__table__), slot_rows(schedule_entry.id, fields, year_groups))
+                await self.db.execute(bump_versions("schedule"))
+                await self.db.commit()
+            except IntegrityError:
+                await self.db.rollback()
+                clash = first_clash((await self.db.execute(taken_slots_query(fields, year_groups))).scalars())
+                if clash is not None:
+                    return None, clash
+                if attempt == retries:
+                    raise
+                continue
+            except DBAPIError as error:
+                await self.db.rollback()
+                if attempt == retries or not is_write_conflict(error):
+                    raise
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+            assert schedule_entry.id is not None, "Schedule entry was not assigned an ID"  #  Postcondition
+            schedule_entry.course_year_id = course_year(fields, year_groups)
+            return schedule_entry, None
+
+    async def _year_groups(self, entries: list[dict]) -> dict:
+        subject_ids = course_subject_ids(entries)
+        if not subject_ids:
+            return {}
+        return year_groups_by_subject(await self.db.execute(subject_year_groups_query(subject_ids)))
+
+    async def _add_slots(self, ids: list[int], entries: list[dict]):
+        year_groups = await self._year_groups(entries)
+        rows = [row for entry_id, fields in zip(ids, entries) for row in slot_values(entry_id, fields, year_groups)]
+        if not rows:
+            return
+        connection = await self.db.connection()
+        sql = insert_slots_sql(connection.dialect)
+        if sql is None:
+            await self.db.execute(insert(ScheduleSlot.__table__), [dict(zip(SLOT_COLUMNS, row)) for row in rows])
+        else:
+            await connection.exec_driver_sql(sql, rows)
+
+    async def add_many(self, entries: list[dict]) -> list[int]:
+        assert isinstance(entries, list), "entries must be a list"  #  Precondition
+        if not entries:
+            return []
+        statement, by_room_slot = insert_entries_statement(entries)
+        try:
+            ids = returned_ids(entries, await self.db.execute(statement, entries), by_room_slot)
+            await self._add_slots(ids, entries)
+            await self.db.execute(bump_versions("schedule"))
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        assert len(ids) == len(entries), "Not every schedule entry was inserted"  #  Postcondition
+        return ids
+
+    async def get_by_id(self, schedule_id: int) -> ScheduleEntry | None:
+        assert isinstance(schedule_id, int) and schedule_id > 0, "schedule_id must be a positive integer"  #  Precondition
+        result = await self.db.get(ScheduleEntry, schedule_id)
+        assert (result is None or result.id == schedule_id), "Mismatched ID in result"  #  Invariant
+        return result
+
+    async def get_by_group_id(self, group_id: int) -> list[ScheduleEntry]:
+        assert isinstance(group_id, int), "group_id must be an integer"  #  Precondition
+        statement = select(ScheduleEntry).where(ScheduleEntry.student_group_id == group_id)
+        results = list((await self.db.scalars(statement)).all())
+        if check_contracts():
+            assert all(e.student_group_id == group_id for e in results), "Group mismatch in results"  #  Postcondition
+        return results
+
+    async def get_group_timetable(self, year: int, letter: str, expand: bool = False) -> list[ScheduleEntry] | None:
+        assert isinstance(year, int) and year > 0, "year must be a positive integer"  #  Precondition
+        rows = (await self.db.execute(group_timetable_query(year, letter, expand))).all()
+        if not rows:
+            return None
+        return [entry for _, entry in rows if entry is not None]
+
+    async def get_all(self) -> list[ScheduleEntry]:
+        results = list((await self.db.scalars(select(ScheduleEntry))).all())
+        assert isinstance(results, list), "get_all must return a list"  #  Postcondition
+        return results
+
+    async def get_page(self, after_id: int | None = None, limit: int | None = None, expand: bool = False,
+                       **filters) -> list[ScheduleEntry]:
+        # Expanded rows must arrive with their relationships: an AsyncSession cannot lazy load
+        statement = select(ScheduleEntry).options(*EXPANDED_LOADS) if expand else select(ScheduleEntry)
+        statement = keyset(filter_schedule(statement, **filters), ScheduleEntry.id, after_id, limit)
+        results = list((await self.db.scalars(statement)).all())
+        assert limit is None or len(results) <= limit, "Page larger than limit"  #  Postcondition
+        return results
+
+    async def delete(self, schedule_id: int) -> bool:
+        assert isinstance(schedule_id, int) and schedule_id > 0, "schedule_id must be a positive integer"  #  Precondition
+        schedule_entry = await self.get_by_id(schedule_id)
+        if schedule_entry:
+            await self.db.execute(ScheduleSlot.__table__.delete().where(ScheduleSlot.schedule_entry_id == schedule_id))
+            await self.db.delete(schedule_entry)
+            await self.db.execute(bump_versions("schedule"))
+            await self.db.commit()
+            return True
+        return False
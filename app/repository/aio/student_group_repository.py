@@ -0,0 +1,50 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.student_group import StudentGroup
+from app.repository.pagination import keyset
+from app.repository.student_group_repository import inherit_year_slots
+from app.repository.versions import bump_versions
+
+class AsyncStudentGroupRepository:
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+
+    async def add(self, student_year_id: int, letter: str) -> StudentGroup:
+        # Preconditions
+        assert isinstance(student_year_id, int) and student_year_id > 0, "student_year_id must be a positive integer"
+        assert isinstance(letter, str) and letter.strip(), "letter must be a non-empty string"
+        assert len(letter) == 2 and letter[0].isalpha() and letter[1].isdigit(), "letter must be in the format 'A1', 'B2', etc."
+        student_group = StudentGroup(student_year_id=student_year_id, letter=letter)
+        self.db.add(student_group)
+        await self.db.flush()
+        await self.db.execute(inherit_year_slots(student_group.id, student_year_id))
+        await self.db.execute(bump_versions("groups"))
+        await self.db.commit()
+        # Postconditions
+        assert student_group.id is not None, "Student group was not assigned an ID"
+        assert student_group.letter == letter, "Letter not persisted correctly"
+        return student_group
+
+    async def get_by_id(self, group_id: int) -> StudentGroup | None:
+        assert isinstance(group_id, int) and group_id > 0, "group_id must be a positive integer"
+        result = await self.db.get(StudentGroup, group_id)
+        assert (result is None or result.id == group_id), "Mismatched ID in result"
+        return result
+
+    async def get_by_name(self, name: str) -> StudentGroup | None:
+        assert isinstance(name, str) and name.strip(), "name must be a non-empty string"
+        assert len(name) == 2 and name[0].isalpha() and name[1].isdigit(), "name must be in the format 'A1', 'B2', etc."
+        result = (await self.db.scalars(select(StudentGroup).where(StudentGroup.letter == name).limit(1))).first()
+        assert (result is None or result.letter == name), "Mismatched letter in result"
+        return result
+
+    async def get_all(self) -> list[StudentGroup]:
+        results = list((await self.db.scalars(select(StudentGroup))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    async def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[StudentGroup]:
+        results = list((await self.db.scalars(keyset(select(StudentGroup), StudentGroup.id, after_id, limit))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
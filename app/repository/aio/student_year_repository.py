@@ -0,0 +1,36 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.student_year import StudentYear
+from app.repository.pagination import keyset
+from app.repository.versions import bump_versions
+
+class AsyncStudentYearRepository:
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+
+    async def add(self, year: int) -> StudentYear:
+        assert 1 <= year < 4, "Year must be between 1 and 3 inclusive"
+        student_year = StudentYear(year=year)
+        self.db.add(student_year)
+        await self.db.execute(bump_versions("years"))
+        await self.db.commit()
+        assert student_year.id is not None, "Student year was not assigned an ID"
+        assert student_year.year == year, "Year not persisted correctly"
+        return student_year
+
+    async def get_by_id(self, year_id: int) -> StudentYear | None:
+        assert isinstance(year_id, int) and year_id > 0, "year_id must be a positive integer"
+        result = await self.db.get(StudentYear, year_id)
+        assert (result is None or result.id == year_id), "Mismatched ID in result"
+        return result
+
+    async def get_all(self) -> list[StudentYear]:
+        results = list((await self.db.scalars(select(StudentYear))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    async def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[StudentYear]:
+        results = list((await self.db.scalars(keyset(select(StudentYear), StudentYear.id, after_id, limit))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
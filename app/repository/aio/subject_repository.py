@@ -0,0 +1,55 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.repository.pagination import keyset
+from app.repository.versions import bump_versions
+
+class AsyncSubjectRepository:
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+
+    async def add(self, course_teacher_id: int, student_year_id: int, name: str, seminar_lab_teacher_ids: list[int] = []) -> Subject:
+        # Preconditions
+        assert isinstance(course_teacher_id, int) and course_teacher_id > 0, "course_teacher_id must be a positive integer"
+        assert isinstance(student_year_id, int) and student_year_id > 0, "student_year_id must be a positive integer"
+        assert isinstance(name, str) and name.strip(), "name must be a non-empty string"
+        assert isinstance(seminar_lab_teacher_ids, list) and all(isinstance(id, int) and id > 0 for id in seminar_lab_teacher_ids), "seminar_lab_teacher_ids must be a list of positive integers"
+        subject = Subject(course_teacher_id=course_teacher_id, student_year_id=student_year_id, name=name)
+        # Assign the collection before the first flush so no lazy load is needed
+        subject.seminar_lab_teachers = (
+            list((await self.db.scalars(select(Teacher).where(Teacher.id.in_(seminar_lab_teacher_ids)))).all())
+            if seminar_lab_teacher_ids else []
+        )
+        self.db.add(subject)
+        await self.db.execute(bump_versions("subjects"))
+        await self.db.commit()
+
+        # Postconditions
+        assert subject.id is not None, "Subject was not assigned an ID"
+        assert subject.name == name, "Subject name not persisted correctly"
+        return subject
+
+    async def get_by_id(self, subject_id: int) -> Subject | None:
+        assert isinstance(subject_id, int) and subject_id > 0, "subject_id must be a positive integer"
+        result = await self.db.get(Subject, subject_id)
+        assert (result is None or result.id == subject_id), "Mismatched ID in result"  #  Invariant
+        return result
+
+    async def get_all(self) -> list[Subject]:
+        results = list((await self.db.scalars(select(Subject))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    async def get_all_with_teachers(self) -> list[Subject]:
+        # Relationships must be loaded eagerly: an AsyncSession cannot lazy load on attribute access
+        results = list((await self.db.scalars(select(Subject).options(selectinload(Subject.seminar_lab_teachers)))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    async def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[Subject]:
+        results = list((await self.db.scalars(keyset(select(Subject), Subject.id, after_id, limit))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
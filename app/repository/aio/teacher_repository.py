@@ -0,0 +1,36 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.teacher import Teacher
+from app.repository.pagination import keyset
+from app.repository.versions import bump_versions
+
+class AsyncTeacherRepository:
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+
+    async def add(self, name: str) -> Teacher:
+        assert name is not None and isinstance(name, str) and name.strip(), "Name must be a non-empty string"
+        teacher = Teacher(name=name)
+        self.db.add(teacher)
+        await self.db.execute(bump_versions("teachers"))
+        await self.db.commit()
+        assert teacher.id is not None, "Teacher was not assigned an ID"
+        assert teacher.name == name, "Teacher name not persisted correctly"
+        return teacher
+
+    async def get_by_id(self, teacher_id: int) -> Teacher | None:
+        assert isinstance(teacher_id, int) and teacher_id > 0, "teacher_id must be a positive integer"
+        result = await self.db.get(Teacher, teacher_id)
+        assert (result is None or result.id == teacher_id), "Mismatched ID in result"
+        return result
+
+    async def get_all(self) -> list[Teacher]:
+        results = list((await self.db.scalars(select(Teacher))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    async def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[Teacher]:
+        results = list((await self.db.scalars(keyset(select(Teacher), Teacher.id, after_id, limit))).all())
+        assert isinstance(results, list), "Results should be a list"
+        return results
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Query
+
+from app.core.contracts import check_contracts
+
+
+def keyset(query, id_column, after_id: int | None = None, limit: int | None = None):
+    """Restrict a ``Query`` or ``select()`` to one page ordered by ``id_column``, strictly after ``after_id``.
+
+    Seeking on the primary key (instead of OFFSET) keeps every page an index
+    range scan, however deep the client pages.
+    """
+    assert after_id is None or (isinstance(after_id, int) and after_id >= 0), "after_id must be a non-negative integer"
+    assert limit is None or (isinstance(limit, int) and limit > 0), "limit must be a positive integer"
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    query = query.order_by(id_column)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def keyset_page(query: Query, id_column, after_id: int | None = None, limit: int | None = None) -> list:
+    results = keyset(query, id_column, after_id, limit).all()
+    if check_contracts():
+        assert all(after_id is None or getattr(r, "id", after_id + 1) > after_id for r in results), "Page starts before cursor"
+    return results
@@ -1,5 +1,8 @@
 from sqlalchemy.orm import Session
+from app.core.contracts import check_contracts
 from app.models.room import Room
+from app.repository.pagination import keyset_page
+from app.repository.versions import bump_versions
 
 class RoomRepository:
     def __init__(self, db: Session):
@@ -12,6 +15,7 @@ class RoomRepository:
         assert isinstance(is_course_room, bool), "is_course_room must be a boolean value"
         room = Room(name=name, is_course_room=is_course_room)
         self.db.add(room)
+        self.db.execute(bump_versions("rooms"))
         self.db.commit()
         self.db.refresh(room)
         # Postconditions
@@ -25,8 +29,20 @@ class RoomRepository:
         assert isinstance(results, list), "Results should be a list"
         return results
 
+    def get_room_types(self) -> dict[int, bool]:
+        # id -> is_course_room without hydrating Room objects
+        results = dict(self.db.query(Room.id, Room.is_course_room).all())
+        if check_contracts():
+            assert all(isinstance(v, bool) for v in results.values()), "Room type must be boolean"
+        return results
+
     def get_by_id(self, room_id: int) -> Room | None:
         assert isinstance(room_id, int) and room_id > 0, "room_id must be a positive integer"
         result = self.db.query(Room).filter(Room.id == room_id).first()
         assert (result is None or result.id == room_id), "Mismatched ID in result"
         return result
+
+    def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[Room]:
+        results = keyset_page(self.db.query(Room), Room.id, after_id, limit)
+        assert isinstance(results, list), "Results should be a list"
+        return results
@@ -1,5 +1,200 @@
-from sqlalchemy.orm import Session
+import time
+
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from app.core.contracts import check_contracts
+from app.core.database import DB_WRITE_RETRIES, is_write_conflict, retry_delay
+from app.models.room import Room
 from app.models.schedule_entry import ScheduleEntry
+from app.models.schedule_slot import ScheduleSlot
+from app.models.student_group import StudentGroup
+from app.models.student_year import StudentYear
+from app.models.subject import Subject
+from app.models.teacher import Teacher  # noqa: F401
+from app.repository.pagination import keyset_page
+from app.repository.versions import bump_versions
+
+EXPORT_COLUMNS = (
+    "id",
+    "day_of_week",
+    "start_hour",
+    "end_hour",
+    "subject_id",
+    "room_id",
+    "teacher_id",
+    "class_type",
+    "student_group_id",
+)
+
+def filter_schedule(
+    query,
+    day_of_week: str | None = None,
+    room_id: int | None = None,
+    teacher_id: int | None = None,
+    subject_id: int | None = None,
+    student_group_id: int | None = None,
+    class_type: str | None = None,
+    from_hour: int | None = None,
+    to_hour: int | None = None,
+):
+    # Filters are pushed down into SQL; [from_hour, to_hour] bounds the whole class
+    for column, value in (
+        (ScheduleEntry.day_of_week, day_of_week),
+        (ScheduleEntry.room_id, room_id),
+        (ScheduleEntry.teacher_id, teacher_id),
+        (ScheduleEntry.subject_id, subject_id),
+        (ScheduleEntry.student_group_id, student_group_id),
+        (ScheduleEntry.class_type, class_type),
+    ):
+        if value is not None:
+            query = query.filter(column == value)
+    if from_hour is not None:
+        query = query.filter(ScheduleEntry.start_hour >= from_hour)
+    if to_hour is not None:
+        query = query.filter(ScheduleEntry.end_hour <= to_hour)
+    return query
+
+# Many-to-one relationships joined into the same SELECT, so an expanded page or
+# timetable is always exactly one query however many rows it has
+EXPANDED_LOADS = (
+    joinedload(ScheduleEntry.subject),
+    joinedload(ScheduleEntry.room),
+    joinedload(ScheduleEntry.teacher),
+    joinedload(ScheduleEntry.student_group),
+)
+
+def group_timetable_query(year: int, letter: str, expand: bool = False):
+    """One statement for a group's whole week: its own classes plus its year's courses.
+
+    The group row is the driving side of an outer join, so a group without classes
+    still yields one row (with a NULL entry) and an unknown group yields none.
+    """
+    year_ids = select(StudentYear.id).where(StudentYear.year == year)
+    year_courses = select(Subject.id).where(Subject.student_year_id == StudentGroup.student_year_id)
+    statement = (
+        select(StudentGroup.id, ScheduleEntry)
+        .outerjoin(
+            ScheduleEntry,
+            or_(
+                ScheduleEntry.student_group_id == StudentGroup.id,
+                and_(ScheduleEntry.subject_id.in_(year_courses.scalar_subquery()), ScheduleEntry.student_group_id.is_(None)),
+            ),
+        )
+        .where(StudentGroup.student_year_id.in_(year_ids), StudentGroup.letter == letter)
+        .order_by(ScheduleEntry.id)
+    )
+    return statement.options(*EXPANDED_LOADS) if expand else statement
+
+def subject_year_groups_query(subject_ids):
+    """``(subject_id, student_year_id, group_id)`` for every group of each subject's year (group NULL if none)."""
+    return (
+        select(Subject.id, Subject.student_year_id, StudentGroup.id)
+        .outerjoin(StudentGroup, StudentGroup.student_year_id == Subject.student_year_id)
+        .where(Subject.id.in_(subject_ids))
+    )
+
+def year_groups_by_subject(rows) -> dict[int, tuple[int, list[int]]]:
+    """``subject_id -> (student_year_id, [group_id, ...])`` from ``subject_year_groups_query`` rows."""
+    year_groups = {}
+    for subject_id, year_id, group_id in rows:
+        _, group_ids = year_groups.setdefault(subject_id, (year_id, []))
+        if group_id is not None:
+            group_ids.append(group_id)
+    return year_groups
+
+def slot_keys(fields: dict, year_groups: dict) -> list[tuple[str, int]]:
+    """``(resource_type, resource_id)`` of everything an entry occupies.
+
+    That is its room and teacher, plus its group, or for a course without one
+    its year and every group of the year. Groups added to the year afterwards
+    copy the year's rows (see ``inherit_year_slots``).
+    """
+    keys = [("room", fields["room_id"]), ("teacher", fields["teacher_id"])]
+    if fields.get("student_group_id") is not None:
+        keys.append(("group", fields["student_group_id"]))
+    elif fields["subject_id"] in year_groups:
+        year_id, group_ids = year_groups[fields["subject_id"]]
+        keys.append(("year", year_id))
+        keys.extend(("group", group_id) for group_id in group_ids)
+    return keys
+
+def course_year(fields: dict, year_groups: dict) -> int | None:
+    """Year a course without a group occupies, None for a group's class."""
+    if fields.get("student_group_id") is not None or fields["subject_id"] not in year_groups:
+        return None
+    return year_groups[fields["subject_id"]][0]
+
+SLOT_COLUMNS = ("resource_type", "resource_id", "day_of_week", "hour", "schedule_entry_id")
+
+def slot_values(entry_id: int, fields: dict, year_groups: dict) -> list[tuple]:
+    """``schedule_slots`` rows of an entry as ``SLOT_COLUMNS`` tuples: one per occupied resource and hour."""
+    day_of_week = fields["day_of_week"]
+    hours = range(fields["start_hour"], fields["end_hour"])
+    return [(kind, resource_id, day_of_week, hour, entry_id)
+            for kind, resource_id in slot_keys(fields, year_groups) for hour in hours]
+
+def slot_rows(entry_id: int, fields: dict, year_groups: dict) -> list[dict]:
+    """``schedule_slots`` rows of an entry: one per occupied resource and hour."""
+    return [dict(zip(SLOT_COLUMNS, values)) for values in slot_values(entry_id, fields, year_groups)]
+
+def insert_slots_sql(dialect) -> str | None:
+    """Plain INSERT of ``SLOT_COLUMNS`` tuples for the DBAPI's positional paramstyle (None if it has none).
+
+    Sent with ``exec_driver_sql``, a large batch skips SQLAlchemy's per-row
+    parameter processing, which costs more than SQLite's own insert.
+    """
+    marker = {"qmark": "?", "format": "%s", "pyformat": "%s"}.get(dialect.paramstyle)
+    if marker is None:
+        return None
+    return (f"INSERT INTO {ScheduleSlot.__tablename__} ({', '.join(SLOT_COLUMNS)}) "
+            f"VALUES ({', '.join([marker] * len(SLOT_COLUMNS))})")
+
+def taken_slots_query(fields: dict, year_groups: dict):
+    """Resource types among the entry's slots that are already taken (primary key probes)."""
+    # One AND branch per resource rather than a row-value IN, which SQLite answers with a full index scan
+    return select(ScheduleSlot.resource_type).where(
+        or_(*[and_(ScheduleSlot.resource_type == kind, ScheduleSlot.resource_id == resource_id)
+              for kind, resource_id in slot_keys(fields, year_groups)]),
+        ScheduleSlot.day_of_week == fields["day_of_week"],
+        ScheduleSlot.hour >= fields["start_hour"],
+        ScheduleSlot.hour < fields["end_hour"],
+    ).distinct()
+
+def first_clash(resource_types) -> str | None:
+    """The clash to report: room, then teacher, then group (a year clash is a group clash)."""
+    taken = set(resource_types)
+    for kind in ("room", "teacher", "group", "year"):
+        if kind in taken:
+            return "group" if kind == "year" else kind
+    return None
+
+def room_slot(fields: dict) -> tuple:
+    """``(room_id, day_of_week, start_hour)``: identifies an entry among the entries of a conflict-free batch."""
+    return fields["room_id"], fields["day_of_week"], fields["start_hour"]
+
+def insert_entries_statement(entries: list[dict]):
+    """INSERT ... RETURNING for ``add_many`` and whether its rows come back as ``(id, *room_slot)``.
+
+    Asking for the rows in parameter order makes SQLite fall back to one statement
+    per row. When no two entries share a room slot the ids are matched to entries
+    by room slot instead, and the insert goes out as multi-row VALUES batches.
+    """
+    table = ScheduleEntry.__table__
+    if len({room_slot(e) for e in entries}) == len(entries):
+        return insert(table).returning(table.c.id, table.c.room_id, table.c.day_of_week, table.c.start_hour), True
+    return insert(table).returning(table.c.id, sort_by_parameter_order=True), False
+
+def returned_ids(entries: list[dict], rows, by_room_slot: bool) -> list[int]:
+    """Entry ids in ``entries`` order from the rows of ``insert_entries_statement``."""
+    if not by_room_slot:
+        return [row[0] for row in rows]
+    ids = {tuple(row[1:]): row[0] for row in rows}
+    return [ids[room_slot(e)] for e in entries]
+
+def course_subject_ids(entries: list[dict]) -> set[int]:
+    """Subjects whose year must be looked up: those of courses without a group."""
+    return {e["subject_id"] for e in entries if e.get("student_group_id") is None}
 
 class ScheduleEntryRepository:
     def __init__(self, db: Session):
@@ -37,7 +232,14 @@ class ScheduleEntryRepository:
         )
 
         self.db.add(schedule_entry)
-        self.db.commit()
+        try:
+            self.db.flush()
+            self._add_slots([schedule_entry.id], [self._fields(schedule_entry)])
+            self.db.execute(bump_versions("schedule"))
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
         self.db.refresh(schedule_entry)
 
         #  Postconditions
@@ -47,6 +249,129 @@ class ScheduleEntryRepository:
 
         return schedule_entry
 
+    def add_if_free(self, retries: int = DB_WRITE_RETRIES, **fields) -> tuple[ScheduleEntry | None, str | None]:
+        """Insert the entry with its slots unless one is taken: ``(entry, None)`` or ``(None, clash_type)``.
+
+        The ``schedule_slots`` primary key rejects a double booking, whichever worker
+        wrote first. Transactions that hit a locked database or a serialization
+        failure are retried up to ``retries`` times with jittered backoff.
+        """
+        #  Preconditions
+        assert fields["end_hour"] > fields["start_hour"], "end_hour must be after start_hour"
+        assert fields["class_type"] in ["Course", "Seminar", "Laboratory"], "Invalid class type"
+        assert retries >= 0, "retries must not be negative"
+
+        year_groups = self._year_groups([fields])
+        for attempt in range(retries + 1):
+            schedule_entry = ScheduleEntry(**fields)
+            self.db.add(schedule_entry)
+            try:
+                self.db.flush()
+                self.db.execute(insert(ScheduleSlot.__table__), slot_rows(schedule_entry.id, fields, year_groups))
+                self.db.execute(bump_versions("schedule"))
+                self.db.commit()
+            except IntegrityError:
+                self.db.rollback()
+                clash = first_clash(self.db.execute(taken_slots_query(fields, year_groups)).scalars())
+                if clash is not None:
+                    return None, clash
+                if attempt == retries:
+                    raise
+                continue  # the blocking entry was deleted in between
+            except DBAPIError as error:
+                self.db.rollback()
+                if attempt == retries or not is_write_conflict(error):
+                    raise
+                time.sleep(retry_delay(attempt))
+                continue
+            assert schedule_entry.id is not None, "Schedule entry was not assigned an ID"  #  Postcondition
+            schedule_entry.course_year_id = course_year(fields, year_groups)
+            return schedule_entry, None
+
+    def find_clash(self, day_of_week: str, start_hour: int, end_hour: int, room_id: int, teacher_id: int,
+                   subject_id: int, student_group_id: int | None = None) -> str | None:
+        """First clash type (room, teacher, group) the slot would cause, from the slot table's primary key."""
+        assert start_hour < end_hour, "start_hour must be before end_hour"  #  Precondition
+        fields = dict(day_of_week=day_of_week, start_hour=start_hour, end_hour=end_hour, room_id=room_id,
+                      teacher_id=teacher_id, subject_id=subject_id, student_group_id=student_group_id)
+        return first_clash(self.db.execute(taken_slots_query(fields, self._year_groups([fields]))).scalars())
+
+    def rebuild_slots(self, batch_size: int = 5000) -> dict:
+        """Refill ``schedule_slots`` from ``schedule_entries`` (for rows written before it existed).
+
+        Entries are replayed in id order; an entry whose slots are already taken
+        (a double booking stored earlier) keeps only its free slots and is counted
+        as conflicting, see ``python -m app.cli audit``.
+        """
+        assert isinstance(batch_size, int) and batch_size > 0, "batch_size must be a positive integer"  #  Precondition
+        columns = [getattr(ScheduleEntry, name) for name in EXPORT_COLUMNS]
+        entries = [dict(zip(EXPORT_COLUMNS, row)) for row in self.db.execute(select(*columns).order_by(ScheduleEntry.id))]
+        year_groups = self._year_groups(entries)
+
+        self.db.execute(ScheduleSlot.__table__.delete())
+        taken, pending, slots, conflicting = set(), [], 0, 0
+        for entry in entries:
+            rows = slot_rows(entry["id"], entry, year_groups)
+            free = [r for r in rows if (r["resource_type"], r["resource_id"], r["day_of_week"], r["hour"]) not in taken]
+            conflicting += len(free) < len(rows)
+            taken.update((r["resource_type"], r["resource_id"], r["day_of_week"], r["hour"]) for r in free)
+            pending.extend(free)
+            if len(pending) >= batch_size:
+                self.db.execute(insert(ScheduleSlot.__table__), pending)
+                slots, pending = slots + len(pending), []
+        if pending:
+            self.db.execute(insert(ScheduleSlot.__table__), pending)
+            slots += len(pending)
+        self.db.commit()
+        return {"entries": len(entries), "slots": slots, "conflicting": conflicting}
+
+    def _year_groups(self, entries: list[dict]) -> dict:
+        subject_ids = course_subject_ids(entries)
+        if not subject_ids:
+            return {}
+        return year_groups_by_subject(self.db.execute(subject_year_groups_query(subject_ids)))
+
+    def _add_slots(self, ids: list[int], entries: list[dict]):
+        year_groups = self._year_groups(entries)
+        rows = [row for entry_id, fields in zip(ids, entries) for row in slot_values(entry_id, fields, year_groups)]
+        if not rows:
+            return
+        connection = self.db.connection()
+        sql = insert_slots_sql(connection.dialect)
+        if sql is None:
+            self.db.execute(insert(ScheduleSlot.__table__), [dict(zip(SLOT_COLUMNS, row)) for row in rows])
+        else:
+            connection.exec_driver_sql(sql, rows)
+
+    @staticmethod
+    def _fields(schedule_entry: ScheduleEntry) -> dict:
+        return {name: getattr(schedule_entry, name) for name in EXPORT_COLUMNS if name != "id"}
+
+    def add_many(self, entries: list[dict]) -> list[int]:
+        #  Preconditions
+        assert isinstance(entries, list), "entries must be a list"
+        assert all(e["class_type"] in ["Course", "Seminar", "Laboratory"] for e in entries), "Invalid class type"
+
+        if not entries:
+            return []
+        # One executemany INSERT ... RETURNING and one commit for the whole batch,
+        # without building or refreshing ORM instances
+        statement, by_room_slot = insert_entries_statement(entries)
+        try:
+            ids = returned_ids(entries, self.db.execute(statement, entries), by_room_slot)
+            self._add_slots(ids, entries)
+            self.db.execute(bump_versions("schedule"))
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise
+
+        #  Postconditions
+        assert len(ids) == len(entries), "Not every schedule entry was inserted"
+        if check_contracts():
+            assert all(i is not None for i in ids), "Schedule entries were not assigned IDs"
+        return ids
+
     def get_by_id(self, schedule_id: int) -> ScheduleEntry | None:
         assert isinstance(schedule_id, int) and schedule_id > 0, "schedule_id must be a positive integer"  #  Precondition
         result = self.db.query(ScheduleEntry).filter(ScheduleEntry.id == schedule_id).first()
@@ -56,20 +381,105 @@ class ScheduleEntryRepository:
     def get_by_group_id(self, group_id: int) -> list[ScheduleEntry]:
         assert isinstance(group_id, int), "group_id must be an integer"  #  Precondition
         results = self.db.query(ScheduleEntry).filter(ScheduleEntry.student_group_id == group_id).all()
-        assert all(e.student_group_id == group_id for e in results), "Group mismatch in results"  #  Postcondition
+        if check_contracts():
+            assert all(e.student_group_id == group_id for e in results), "Group mismatch in results"  #  Postcondition
         return results
 
+    def get_group_timetable(self, year: int, letter: str, expand: bool = False) -> list[ScheduleEntry] | None:
+        """Entries attended by group ``letter`` of year ``year``; None if there is no such group."""
+        assert isinstance(year, int) and year > 0, "year must be a positive integer"  #  Precondition
+        rows = self.db.execute(group_timetable_query(year, letter, expand)).all()
+        if not rows:
+            return None
+        return [entry for _, entry in rows if entry is not None]
+
+    def get_slot_rows(self) -> list[tuple]:
+        """``(id, day, start, end, room_id, teacher_id, student_group_id, student_year_id)`` of every entry.
+
+        ``student_year_id`` is the subject's year, which is what a course without a group blocks.
+        """
+        results = (
+            self.db.query(
+                ScheduleEntry.id,
+                ScheduleEntry.day_of_week,
+                ScheduleEntry.start_hour,
+                ScheduleEntry.end_hour,
+                ScheduleEntry.room_id,
+                ScheduleEntry.teacher_id,
+                ScheduleEntry.student_group_id,
+                Subject.student_year_id,
+            )
+            .join(Subject, Subject.id == ScheduleEntry.subject_id)
+            .all()
+        )
+        if check_contracts():
+            assert all(len(row) == 8 for row in results), "Unexpected slot row shape"  #  Postcondition
+        return [tuple(row) for row in results]
+
+    def iter_room_mismatches(self, batch_size: int = 1000):
+        """Yield ``(id, day, room_id, class_type, is_course_room)`` of entries in the wrong kind of room.
+
+        ``is_course_room`` is None when the room does not exist (rows imported outside the API).
+        """
+        assert isinstance(batch_size, int) and batch_size > 0, "batch_size must be a positive integer"  #  Precondition
+        is_course = ScheduleEntry.class_type == "Course"
+        statement = (
+            select(ScheduleEntry.id, ScheduleEntry.day_of_week, ScheduleEntry.room_id, ScheduleEntry.class_type,
+                   Room.is_course_room)
+            .outerjoin(Room, Room.id == ScheduleEntry.room_id)
+            .where(or_(
+                Room.id.is_(None),
+                and_(is_course, Room.is_course_room.is_(False)),
+                and_(~is_course, Room.is_course_room.is_(True)),
+            ))
+            .order_by(ScheduleEntry.id)
+        )
+        for row in self.db.execute(statement.execution_options(yield_per=batch_size)):
+            yield tuple(row)
+
     def get_all(self) -> list[ScheduleEntry]:
         results = self.db.query(ScheduleEntry).all()
         assert isinstance(results, list), "get_all must return a list"  #  Postcondition
         return results
 
+    def get_page(
+        self,
+        after_id: int | None = None,
+        limit: int | None = None,
+        expand: bool = False,
+        **filters,
+    ) -> list[ScheduleEntry]:
+        query = self.db.query(ScheduleEntry)
+        if expand:
+            query = query.options(*EXPANDED_LOADS)
+        query = filter_schedule(query, **filters)
+        results = keyset_page(query, ScheduleEntry.id, after_id, limit)
+        assert limit is None or len(results) <= limit, "Page larger than limit"  #  Postcondition
+        return results
+
+    def iter_batches(self, batch_size: int = 1000, **filters):
+        """Yield lists of plain row tuples (``EXPORT_COLUMNS`` order), ``batch_size`` rows at a time.
+
+        Rows are fetched with a server-side cursor (``yield_per``) and never become
+        ORM instances, so memory stays bounded by one batch.
+        """
+        assert isinstance(batch_size, int) and batch_size > 0, "batch_size must be a positive integer"  #  Precondition
+        columns = [getattr(ScheduleEntry, name) for name in EXPORT_COLUMNS]
+        statement = filter_schedule(select(*columns), **filters).order_by(ScheduleEntry.id)
+        result = self.db.execute(statement.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield [tuple(row) for row in batch]
+
     def delete(self, schedule_id: int) -> bool:
         assert isinstance(schedule_id, int) and schedule_id > 0, "schedule_id must be a positive integer"  #  Precondition
         schedule_entry = self.get_by_id(schedule_id)
         if schedule_entry:
+            self.db.execute(ScheduleSlot.__table__.delete().where(ScheduleSlot.schedule_entry_id == schedule_id))
             self.db.delete(schedule_entry)
+            self.db.execute(bump_versions("schedule"))
             self.db.commit()
-            assert self.get_by_id(schedule_id) is None, "Schedule entry was not deleted"  #  Postcondition
+            if check_contracts():
+                # A second round-trip, so production skips it
+                assert self.get_by_id(schedule_id) is None, "Schedule entry was not deleted"  #  Postcondition
             return True
         return False
@@ -1,5 +1,23 @@
+from sqlalchemy import insert, literal, select
 from sqlalchemy.orm import Session
+from app.core.contracts import check_contracts
+from app.models.schedule_slot import ScheduleSlot
 from app.models.student_group import StudentGroup
+from app.repository.pagination import keyset_page
+from app.repository.schedule_entry_repository import SLOT_COLUMNS
+from app.repository.versions import bump_versions
+
+def inherit_year_slots(group_id: int, student_year_id: int):
+    """INSERT copying the slots of the year's group-less courses to a new group of that year.
+
+    Such a course occupies its year and every group the year has when it is booked;
+    the year rows stand for it, so a group created later takes them over too.
+    """
+    slots = ScheduleSlot.__table__
+    year_slots = select(
+        literal("group"), literal(group_id), slots.c.day_of_week, slots.c.hour, slots.c.schedule_entry_id,
+    ).where(slots.c.resource_type == "year", slots.c.resource_id == student_year_id)
+    return insert(slots).from_select(SLOT_COLUMNS, year_slots)
 
 class StudentGroupRepository:
     def __init__(self, db: Session):
@@ -13,6 +31,9 @@ class StudentGroupRepository:
         assert len(letter) == 2 and letter[0].isalpha() and letter[1].isdigit(), "letter must be in the format 'A1', 'B2', etc."
         student_group = StudentGroup(student_year_id=student_year_id, letter=letter)
         self.db.add(student_group)
+        self.db.flush()
+        self.db.execute(inherit_year_slots(student_group.id, student_year_id))
+        self.db.execute(bump_versions("groups"))
         self.db.commit()
         self.db.refresh(student_group)
         # Postconditions
@@ -34,7 +55,19 @@ class StudentGroupRepository:
         assert (result is None or result.letter == name), "Mismatched letter in result"
         return result
 
+    def get_year_ids(self) -> dict[int, int]:
+        # group id -> student_year_id without hydrating StudentGroup objects
+        results = dict(self.db.query(StudentGroup.id, StudentGroup.student_year_id).all())
+        if check_contracts():
+            assert all(isinstance(v, int) for v in results.values()), "Student year ID must be an integer"
+        return results
+
     def get_all(self) -> list[StudentGroup]:
         results = self.db.query(StudentGroup).all()
         assert isinstance(results, list), "Results should be a list"
         return results
+
+    def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[StudentGroup]:
+        results = keyset_page(self.db.query(StudentGroup), StudentGroup.id, after_id, limit)
+        assert isinstance(results, list), "Results should be a list"
+        return results
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.student_year import StudentYear
+from app.repository.pagination import keyset_page
+from app.repository.versions import bump_versions
 
 class StudentYearRepository:
     def __init__(self, db: Session):
@@ -10,6 +12,7 @@ class StudentYearRepository:
         assert 1 <= year < 4, "Year must be between 1 and 3 inclusive"
         student_year = StudentYear(year=year)
         self.db.add(student_year)
+        self.db.execute(bump_versions("years"))
         self.db.commit()
         self.db.refresh(student_year)
         assert student_year.id is not None, "Student year was not assigned an ID"
@@ -26,3 +29,8 @@ class StudentYearRepository:
         results = self.db.query(StudentYear).all()
         assert isinstance(results, list), "Results should be a list"
         return results
+
+    def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[StudentYear]:
+        results = keyset_page(self.db.query(StudentYear), StudentYear.id, after_id, limit)
+        assert isinstance(results, list), "Results should be a list"
+        return results
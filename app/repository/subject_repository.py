@@ -1,6 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from app.models.subject import Subject, subject_teacher_association
 from app.models.teacher import Teacher
+from app.repository.pagination import keyset_page
+from app.repository.versions import bump_versions
 
 class SubjectRepository:
     def __init__(self, db: Session):
@@ -20,6 +22,7 @@ class SubjectRepository:
             name=name,
         )
         self.db.add(subject)
+        self.db.execute(bump_versions("subjects"))
         self.db.commit()
         self.db.refresh(subject)
 
@@ -27,6 +30,7 @@ class SubjectRepository:
         if seminar_lab_teacher_ids:
             seminar_lab_teachers = self.db.query(Teacher).filter(Teacher.id.in_(seminar_lab_teacher_ids)).all()
             subject.seminar_lab_teachers = seminar_lab_teachers
+            self.db.execute(bump_versions("subjects"))
             self.db.commit()
 
         # Postconditions
@@ -47,3 +51,14 @@ class SubjectRepository:
         results =  self.db.query(Subject).all()
         assert isinstance(results, list), "Results should be a list"
         return results
+
+    def get_all_with_teachers(self) -> list[Subject]:
+        # One extra query for all seminar/lab teachers instead of one per subject
+        results = self.db.query(Subject).options(selectinload(Subject.seminar_lab_teachers)).all()
+        assert isinstance(results, list), "Results should be a list"
+        return results
+
+    def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[Subject]:
+        results = keyset_page(self.db.query(Subject), Subject.id, after_id, limit)
+        assert isinstance(results, list), "Results should be a list"
+        return results
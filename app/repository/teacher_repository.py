@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.teacher import Teacher
+from app.repository.pagination import keyset_page
+from app.repository.versions import bump_versions
 
 class TeacherRepository:
     def __init__(self, db: Session):
@@ -10,6 +12,7 @@ class TeacherRepository:
         assert name is not None and isinstance(name, str) and name.strip(), "Name must be a non-empty string"
         teacher = Teacher(name=name)
         self.db.add(teacher)
+        self.db.execute(bump_versions("teachers"))
         self.db.commit()
         self.db.refresh(teacher)
         assert teacher.id is not None, "Teacher was not assigned an ID"
@@ -26,3 +29,8 @@ class TeacherRepository:
         results = self.db.query(Teacher).all()
         assert isinstance(results, list), "Results should be a list"
         return results
+
+    def get_page(self, after_id: int | None = None, limit: int | None = None) -> list[Teacher]:
+        results = keyset_page(self.db.query(Teacher), Teacher.id, after_id, limit)
+        assert isinstance(results, list), "Results should be a list"
+        return results
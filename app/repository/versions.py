@@ -0,0 +1,20 @@
+import time
+
+from sqlalchemy import select, update
+
+from app.models.collection_version import VERSIONED_COLLECTIONS, CollectionVersion
+
+
+def bump_versions(*collections: str):
+    """``UPDATE`` advancing the counters of ``collections``; execute it in the write's own transaction."""
+    assert collections and all(c in VERSIONED_COLLECTIONS for c in collections), "Unknown collection"  #  Precondition
+    table = CollectionVersion.__table__
+    return (update(table)
+            .where(table.c.collection.in_(collections))
+            .values(version=table.c.version + 1, modified_at=time.time()))
+
+
+def versions_query(*collections: str):
+    assert collections and all(c in VERSIONED_COLLECTIONS for c in collections), "Unknown collection"  #  Precondition
+    return select(CollectionVersion.collection, CollectionVersion.version, CollectionVersion.modified_at).where(
+        CollectionVersion.collection.in_(collections))
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class ProfilingSettings(BaseModel):
+    enabled: bool
+    threshold_ms: Optional[float] = None  # keep profiles of requests at least this slow
+    keep: int = 20  # size of the ring buffer of profiles
+    interval_ms: float = 5  # time between two stack samples
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    status: Optional[int] = None
+    duration_ms: float
+    samples: int
+    captured_at: str
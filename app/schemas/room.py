@@ -12,3 +12,7 @@ class RoomRead(RoomBase):
 
     class Config:
         orm_mode = True
+
+class RoomRecommendation(BaseModel):
+    room_id: int
+    booked_hours: int  # hours the room is taken over the week
@@ -1,5 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+
+from app.schemas.room import RoomRead
+from app.schemas.student_group import StudentGroupRead
+from app.schemas.subject import SubjectRead
+from app.schemas.teacher import TeacherRead
 
 class ScheduleEntryBase(BaseModel):
     day_of_week: str  # e.g., "Monday"
@@ -19,3 +24,37 @@ class ScheduleEntryRead(ScheduleEntryBase):
 
     class Config:
         orm_mode = True
+
+class ScheduleEntryExpanded(ScheduleEntryRead):
+    # Related rows embedded so clients can show names without further lookups
+    subject: SubjectRead
+    room: RoomRead
+    teacher: TeacherRead
+    student_group: Optional[StudentGroupRead] = None
+
+    class Config:
+        orm_mode = True
+
+class BulkRowError(BaseModel):
+    index: int  # position of the row in the submitted batch
+    detail: str
+
+class ScheduleBulkResult(BaseModel):
+    created: int
+    ids: List[int]
+    errors: List[BulkRowError]
+
+class ScheduleChangeSet(BaseModel):
+    add: List[ScheduleEntryCreate] = []
+    delete: List[int] = []  # ids of existing entries
+
+class ChangeSetError(BaseModel):
+    detail: str
+    index: Optional[int] = None  # position of the proposed entry in ``add``
+    delete_id: Optional[int] = None  # unknown id listed in ``delete``
+    clashes_with_id: Optional[int] = None  # existing entry the proposed one clashes with
+    clashes_with_index: Optional[int] = None  # earlier proposed entry it clashes with
+
+class ScheduleValidationResult(BaseModel):
+    valid: bool
+    errors: List[ChangeSetError]
@@ -0,0 +1,45 @@
+import os
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from app.schemas.schedule_entry import ScheduleEntryBase
+
+# Bounds of multi-start solving: one request may not start more solver processes
+# than there are CPUs, nor keep them busy for longer than GENERATE_MAX_TIME_BUDGET seconds
+MAX_WORKERS = os.cpu_count() or 1
+MAX_TIME_BUDGET = float(os.getenv("GENERATE_MAX_TIME_BUDGET", "60"))
+
+class TimetableGenerateRequest(BaseModel):
+    # Restrict the instance; None means "everything in the database"
+    subject_ids: Optional[List[int]] = None
+    room_ids: Optional[List[int]] = None
+    student_group_ids: Optional[List[int]] = None
+    seminar_class_type: str = "Seminar"  # "Seminar" or "Laboratory"
+    seed: Optional[int] = None
+    max_backtracks: int = 1000
+    persist: bool = False
+    # Multi-start mode: best of randomized restarts in a process pool within time_budget seconds
+    time_budget: Optional[float] = Field(None, gt=0, le=MAX_TIME_BUDGET)
+    workers: Optional[int] = Field(None, ge=1, le=MAX_WORKERS)  # defaults to the number of CPUs
+
+class UnplacedSession(BaseModel):
+    subject_id: int
+    class_type: str
+    student_year_id: int
+    student_group_id: Optional[int] = None
+
+class TimetableGenerateResponse(BaseModel):
+    entries: List[ScheduleEntryBase]
+    unplaced: List[UnplacedSession]
+    penalty: int  # idle hours between classes, summed over groups and days
+    backtracks: int
+    restarts: int = 1
+    elapsed_ms: float
+    persisted: bool
+
+class AvailabilityWindow(BaseModel):
+    day_of_week: str
+    start_hour: int
+    end_hour: int
+    room_ids: Optional[List[int]] = None  # free rooms of the requested type, when one was given
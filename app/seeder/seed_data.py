@@ -1,4 +1,7 @@
+from sqlalchemy import select
+
 from app.core.database import SessionLocal
+from app.models.teacher import Teacher
 from app.repository.teacher_repository import TeacherRepository
 from app.repository.room_repository import RoomRepository
 from app.repository.student_year_repository import StudentYearRepository
@@ -6,10 +9,15 @@ from app.repository.student_group_repository import StudentGroupRepository
 from app.repository.subject_repository import SubjectRepository
 from app.repository.schedule_entry_repository import ScheduleEntryRepository
 
-def seed_data():
+def seed_data() -> bool:
+    """Fill an empty database with a small demo faculty; returns False, touching nothing, if it holds data."""
     db = SessionLocal()
 
     try:
+        # One indexed probe instead of loading every table: seeding is all or nothing
+        if db.execute(select(Teacher.id).limit(1)).first() is not None:
+            return False
+
         teacher_repo = TeacherRepository(db)
         room_repo = RoomRepository(db)
         year_repo = StudentYearRepository(db)
@@ -18,95 +26,90 @@ def seed_data():
         schedule_repo = ScheduleEntryRepository(db)
 
         # --- Seed Teachers ---
-        if not teacher_repo.get_all():
-            t1 = teacher_repo.add(name="Ion Popescu")
-            t2 = teacher_repo.add(name="Maria Ionescu")
-            t3 = teacher_repo.add(name="Andrei Georgescu")
+        t1 = teacher_repo.add(name="Ion Popescu")
+        t2 = teacher_repo.add(name="Maria Ionescu")
+        t3 = teacher_repo.add(name="Andrei Georgescu")
 
         # --- Seed Student Years ---
-        if not year_repo.get_all():
-            year1 = year_repo.add(year=1)
-            year2 = year_repo.add(year=2)
+        year1 = year_repo.add(year=1)
+        year2 = year_repo.add(year=2)
 
         # --- Seed Student Groups ---
-        if not group_repo.get_all():
-            g1 = group_repo.add(student_year_id=year1.id, letter="A")
-            g2 = group_repo.add(student_year_id=year1.id, letter="B")
-            g3 = group_repo.add(student_year_id=year2.id, letter="A")
+        g1 = group_repo.add(student_year_id=year1.id, letter="A1")
+        g2 = group_repo.add(student_year_id=year1.id, letter="B1")
+        g3 = group_repo.add(student_year_id=year2.id, letter="A1")
 
         # --- Seed Rooms ---
-        if not room_repo.get_all():
-            r1 = room_repo.add(name="Room A1", is_course_room=True)
-            r2 = room_repo.add(name="Lab 101", is_course_room=False)
-            r3 = room_repo.add(name="Lab 102", is_course_room=False)
-            r4 = room_repo.add(name="Room A2", is_course_room=True)
+        r1 = room_repo.add(name="Room A1", is_course_room=True)
+        r2 = room_repo.add(name="Lab 101", is_course_room=False)
+        r3 = room_repo.add(name="Lab 102", is_course_room=False)
+        r4 = room_repo.add(name="Room A2", is_course_room=True)
 
         # --- Seed Subjects ---
-        if not subject_repo.get_all():
-            # Subject 1: for year 1, course by t1, labs by t2 and t3
-            subj1 = subject_repo.add(
-                course_teacher_id=t1.id,
-                student_year_id=year1.id,
-                name="Mathematics",
-                seminar_lab_teacher_ids=[t2.id, t3.id]
-            )
-            # Subject 2: for year 2, course by t2, labs by t3
-            subj2 = subject_repo.add(
-                course_teacher_id=t2.id,
-                student_year_id=year2.id,
-                name="Operating Systems",
-                seminar_lab_teacher_ids=[t3.id]
-            )
+        # Subject 1: for year 1, course by t1, labs by t2 and t3
+        subj1 = subject_repo.add(
+            course_teacher_id=t1.id,
+            student_year_id=year1.id,
+            name="Mathematics",
+            seminar_lab_teacher_ids=[t2.id, t3.id]
+        )
+        # Subject 2: for year 2, course by t2, labs by t3
+        subj2 = subject_repo.add(
+            course_teacher_id=t2.id,
+            student_year_id=year2.id,
+            name="Operating Systems",
+            seminar_lab_teacher_ids=[t3.id]
+        )
 
         # --- Seed Schedule Entries ---
-        if not schedule_repo.get_all():
-            # Course - no group attached
-            schedule_repo.add(
-                day_of_week="Monday",
-                start_hour=8,
-                end_hour=10,
-                subject_id=subj1.id,
-                room_id=r1.id,
-                teacher_id=t1.id,  # course teacher
-                class_type="Course",
-                student_group_id=None
-            )
+        # Course - no group attached
+        schedule_repo.add(
+            day_of_week="Monday",
+            start_hour=8,
+            end_hour=10,
+            subject_id=subj1.id,
+            room_id=r1.id,
+            teacher_id=t1.id,  # course teacher
+            class_type="Course",
+            student_group_id=None
+        )
 
-            # Seminar for Group A
-            schedule_repo.add(
-                day_of_week="Tuesday",
-                start_hour=10,
-                end_hour=12,
-                subject_id=subj1.id,
-                room_id=r2.id,
-                teacher_id=t2.id,  # seminar/lab teacher
-                class_type="Seminar",
-                student_group_id=g1.id
-            )
+        # Seminar for Group A1
+        schedule_repo.add(
+            day_of_week="Tuesday",
+            start_hour=10,
+            end_hour=12,
+            subject_id=subj1.id,
+            room_id=r2.id,
+            teacher_id=t2.id,  # seminar/lab teacher
+            class_type="Seminar",
+            student_group_id=g1.id
+        )
 
-            # Lab for Group B
-            schedule_repo.add(
-                day_of_week="Tuesday",
-                start_hour=12,
-                end_hour=14,
-                subject_id=subj1.id,
-                room_id=r3.id,
-                teacher_id=t3.id,
-                class_type="Laboratory",
-                student_group_id=g2.id
-            )
+        # Lab for Group B1
+        schedule_repo.add(
+            day_of_week="Tuesday",
+            start_hour=12,
+            end_hour=14,
+            subject_id=subj1.id,
+            room_id=r3.id,
+            teacher_id=t3.id,
+            class_type="Laboratory",
+            student_group_id=g2.id
+        )
 
-            # Course for second year
-            schedule_repo.add(
-                day_of_week="Wednesday",
-                start_hour=8,
-                end_hour=10,
-                subject_id=subj2.id,
-                room_id=r1.id,
-                teacher_id=t2.id,
-                class_type="Course",
-                student_group_id=None
-            )
+        # Course for second year
+        schedule_repo.add(
+            day_of_week="Wednesday",
+            start_hour=8,
+            end_hour=10,
+            subject_id=subj2.id,
+            room_id=r1.id,
+            teacher_id=t2.id,
+            class_type="Course",
+            student_group_id=None
+        )
+        return True
 
     finally:
         db.close()
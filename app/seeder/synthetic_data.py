@@ -0,0 +1,181 @@
+"""Large synthetic universities for performance testing, built on bulk inserts.
+
+A university is made of independent faculties. Each faculty has its own teachers,
+rooms, three study years with their groups, and subjects with a course teacher
+and a pool of seminar/lab teachers. Its weekly schedule holds one course per
+subject and one seminar or lab per subject and group, all conflict-free. The
+schedule has no term dimension, so volume comes from the number of faculties:
+each adds about ``3 * subjects * (groups + 1)`` entries.
+
+Output is deterministic for a given seed; faculty ``f`` only depends on
+``(seed, f)``.
+"""
+import random
+import string
+from typing import Callable
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.models.student_group import StudentGroup
+from app.models.student_year import StudentYear
+from app.models.subject import Subject, subject_teacher_association
+from app.models.teacher import Teacher
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.repository.versions import bump_versions
+from app.services.occupancy_service import DAYS
+
+WINDOWS = [(day, hour) for day in DAYS for hour in range(8, 20, 2)]  # 30 two-hour windows a week
+GROUP_LETTERS = [f"{letter}{digit}" for letter in string.ascii_uppercase for digit in range(10)]
+YEARS = (1, 2, 3)
+
+
+def insert_ids(db: Session, model, rows: list[dict]) -> list[int]:
+    """Bulk INSERT ... RETURNING; the ids come back in the order of ``rows``."""
+    if not rows:
+        return []
+    statement = insert(model.__table__).returning(model.id, sort_by_parameter_order=True)
+    return list(db.execute(statement, rows).scalars())
+
+
+def faculty_size(groups_per_year: int, subjects_per_year: int) -> int:
+    """Schedule entries of one fully placed faculty."""
+    return len(YEARS) * subjects_per_year * (groups_per_year + 1)
+
+
+class FacultyPlan:
+    """The schedule of one faculty, planned in memory before anything is written.
+
+    Every window keeps the teachers and rooms it has used, and every group the
+    windows it attends, so placing a class is a few set lookups. A seminar goes
+    to the first window, in a random order, where the group is free and one of
+    the subject's seminar/lab teachers and a lab room are both available.
+    """
+
+    def __init__(self, rng: random.Random, course_rooms: list[int], lab_rooms: list[int]):
+        self.rng = rng
+        self.busy_teachers = [set() for _ in WINDOWS]
+        self.free_course_rooms = [rng.sample(course_rooms, len(course_rooms)) for _ in WINDOWS]
+        self.free_lab_rooms = [rng.sample(lab_rooms, len(lab_rooms)) for _ in WINDOWS]
+        self.group_windows = {}
+        self.entries = []
+        self.unplaced = 0
+
+    def _add(self, window: int, subject_id: int, room_id: int, teacher_id: int, class_type: str, group_id):
+        day, hour = WINDOWS[window]
+        self.busy_teachers[window].add(teacher_id)
+        self.entries.append(dict(day_of_week=day, start_hour=hour, end_hour=hour + 2, subject_id=subject_id,
+                                 room_id=room_id, teacher_id=teacher_id, class_type=class_type,
+                                 student_group_id=group_id))
+
+    def place_courses(self, subjects: list[tuple[int, int]], group_ids: list[int]):
+        """One course per ``(subject_id, course_teacher_id)``; each blocks every group of the year."""
+        windows = self.rng.sample(range(len(WINDOWS)), len(subjects))
+        for (subject_id, teacher_id), window in zip(subjects, windows):
+            if teacher_id in self.busy_teachers[window] or not self.free_course_rooms[window]:
+                self.unplaced += 1
+                continue
+            self._add(window, subject_id, self.free_course_rooms[window].pop(), teacher_id, "Course", None)
+            for group_id in group_ids:
+                self.group_windows.setdefault(group_id, set()).add(window)
+
+    def place_seminar(self, subject_id: int, teachers: list[int], class_type: str, group_id: int):
+        taken = self.group_windows.setdefault(group_id, set())
+        for window in self.rng.sample(range(len(WINDOWS)), len(WINDOWS)):
+            if window in taken or not self.free_lab_rooms[window]:
+                continue
+            teacher_id = next((t for t in teachers if t not in self.busy_teachers[window]), None)
+            if teacher_id is not None:
+                self._add(window, subject_id, self.free_lab_rooms[window].pop(), teacher_id, class_type, group_id)
+                taken.add(window)
+                return
+        self.unplaced += 1
+
+
+def generate_faculty(db: Session, faculty: int, teachers: int = 120, rooms: int = 90, groups_per_year: int = 30,
+                     subjects_per_year: int = 12, seminar_teachers: int = 4, seed: int = 0) -> tuple[list[dict], int]:
+    """Write faculty number ``faculty``'s reference rows; returns its planned schedule and unplaced classes."""
+    course_rooms = max(len(YEARS), rooms // 10)
+    #  Preconditions
+    assert 1 <= subjects_per_year <= len(WINDOWS) // 2, "At most 15 subjects per year fit a week"
+    assert 1 <= groups_per_year <= len(GROUP_LETTERS), "At most 260 groups per year"
+    assert teachers > len(YEARS) * subjects_per_year, "Need more teachers than courses"
+    assert rooms > course_rooms, "Need lab rooms besides the course rooms"
+    assert 1 <= seminar_teachers <= teachers - len(YEARS) * subjects_per_year, "Not enough seminar/lab teachers"
+    rng = random.Random(seed * 1_000_003 + faculty)
+    prefix = f"F{faculty}"
+
+    teacher_ids = insert_ids(db, Teacher, [dict(name=f"{prefix} Teacher {i}") for i in range(teachers)])
+    room_ids = insert_ids(db, Room, [dict(name=f"{prefix} Room {i}", is_course_room=i < course_rooms)
+                                     for i in range(rooms)])
+    year_ids = insert_ids(db, StudentYear, [dict(year=year) for year in YEARS])
+    group_ids = insert_ids(db, StudentGroup, [dict(student_year_id=year_id, letter=GROUP_LETTERS[i])
+                                              for year_id in year_ids for i in range(groups_per_year)])
+    # The first teachers give one course each; the rest form the seminar/lab pool
+    course_teachers = teacher_ids[:len(YEARS) * subjects_per_year]
+    pool = teacher_ids[len(course_teachers):]
+    subject_ids = insert_ids(db, Subject, [
+        dict(name=f"{prefix} Subject {y + 1}.{i}", student_year_id=year_id,
+             course_teacher_id=course_teachers[y * subjects_per_year + i])
+        for y, year_id in enumerate(year_ids) for i in range(subjects_per_year)
+    ])
+    seminar_pool = {subject_id: rng.sample(pool, seminar_teachers) for subject_id in subject_ids}
+    db.execute(insert(subject_teacher_association), [dict(subject_id=subject_id, teacher_id=teacher_id)
+                                                      for subject_id, teacher_ids in seminar_pool.items()
+                                                      for teacher_id in teacher_ids])
+
+    plan = FacultyPlan(rng, room_ids[:course_rooms], room_ids[course_rooms:])
+    for y in range(len(YEARS)):
+        year_subjects = subject_ids[y * subjects_per_year:(y + 1) * subjects_per_year]
+        year_groups = group_ids[y * groups_per_year:(y + 1) * groups_per_year]
+        plan.place_courses([(s, course_teachers[y * subjects_per_year + i]) for i, s in enumerate(year_subjects)],
+                           year_groups)
+        for group_id in year_groups:
+            for i in rng.sample(range(subjects_per_year), subjects_per_year):
+                subject_id = year_subjects[i]
+                teachers_of_subject = rng.sample(seminar_pool[subject_id], seminar_teachers)
+                plan.place_seminar(subject_id, teachers_of_subject, "Laboratory" if i % 2 else "Seminar", group_id)
+    return plan.entries, plan.unplaced
+
+
+def generate_university(db: Session, faculties: int | None = None, entries: int | None = None, teachers: int = 120,
+                        rooms: int = 90, groups_per_year: int = 30, subjects_per_year: int = 12,
+                        seminar_teachers: int = 4, seed: int = 0, batch_size: int = 20000,
+                        progress: Callable[[dict], None] | None = None) -> dict:
+    """Fill an empty database with ``faculties`` faculties, or with as many as ``entries`` schedule entries need.
+
+    Reference rows and the schedule of each faculty are committed together; the
+    schedule goes through ``ScheduleEntryRepository.add_many`` so its
+    ``schedule_slots`` rows are written alongside. With ``entries`` the last
+    faculty's schedule is cut at that count.
+    """
+    assert (faculties is None) != (entries is None), "Give either faculties or entries"  #  Precondition
+    assert db.execute(select(Teacher.id).limit(1)).first() is None, "The database must be empty"  #  Precondition
+    if faculties is None:
+        per_faculty = faculty_size(groups_per_year, subjects_per_year)
+        faculties = -(-entries // per_faculty)  # a few classes may not fit; extra faculties cover them
+        faculties += max(1, faculties // 50)
+    repo = ScheduleEntryRepository(db)
+    totals = {"faculties": 0, "teachers": 0, "rooms": 0, "groups": 0, "subjects": 0, "entries": 0, "unplaced": 0}
+    for faculty in range(faculties):
+        if entries is not None and totals["entries"] >= entries:
+            break
+        schedule, unplaced = generate_faculty(db, faculty, teachers, rooms, groups_per_year, subjects_per_year,
+                                              seminar_teachers, seed)
+        if entries is not None:
+            schedule = schedule[:entries - totals["entries"]]
+        db.execute(bump_versions("teachers", "rooms", "years", "groups", "subjects"))
+        db.commit()
+        for start in range(0, len(schedule), batch_size):
+            repo.add_many(schedule[start:start + batch_size])
+        totals["faculties"] += 1
+        totals["teachers"] += teachers
+        totals["rooms"] += rooms
+        totals["groups"] += len(YEARS) * groups_per_year
+        totals["subjects"] += len(YEARS) * subjects_per_year
+        totals["entries"] += len(schedule)
+        totals["unplaced"] += unplaced
+        if progress is not None:
+            progress(dict(totals))
+    return totals
@@ -0,0 +1,216 @@
+from typing import List
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.contracts import check_contracts
+from app.repository.aio.room_repository import AsyncRoomRepository
+from app.repository.aio.schedule_entry_repository import AsyncScheduleEntryRepository
+from app.repository.aio.student_group_repository import AsyncStudentGroupRepository
+from app.repository.aio.student_year_repository import AsyncStudentYearRepository
+from app.repository.aio.subject_repository import AsyncSubjectRepository
+from app.repository.aio.teacher_repository import AsyncTeacherRepository
+from app.schemas.room import RoomRead
+from app.schemas.schedule_entry import ScheduleEntryCreate
+from app.schemas.student_group import StudentGroupRead
+from app.schemas.student_year import StudentYearRead
+from app.schemas.subject import SubjectRead
+from app.schemas.teacher import TeacherCreate, TeacherRead
+from app.services.cache_service import CachedPage, get_reference_cache
+from app.services.occupancy_service import OccupancyMap, days_mask, get_occupancy
+from app.services.timetable_service import (
+    check_availability_query, check_entry_fields, check_entry_room, check_schedule_filters, entry_fields,
+    raise_for_clash, sort_by_slot,
+)
+
+REFERENCE_ADAPTERS = {
+    "teachers": TypeAdapter(List[TeacherRead]),
+    "rooms": TypeAdapter(List[RoomRead]),
+    "years": TypeAdapter(List[StudentYearRead]),
+    "groups": TypeAdapter(List[StudentGroupRead]),
+    "subjects": TypeAdapter(List[SubjectRead]),
+}
+
+class AsyncTimetableService:
+    """The request-path subset of ``TimetableService`` on an ``AsyncSession``.
+
+    Validation rules are shared with the sync service; only the database calls
+    differ. CPU-bound work (generation, bulk import, export) stays on the sync
+    service and runs in the threadpool.
+    """
+
+    def __init__(self, db: AsyncSession):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        self.db = db
+        self.teacher_repo = AsyncTeacherRepository(db)
+        self.student_group_repo = AsyncStudentGroupRepository(db)
+        self.year_repo = AsyncStudentYearRepository(db)
+        self.room_repo = AsyncRoomRepository(db)
+        self.schedule_repo = AsyncScheduleEntryRepository(db)
+        self.subject_repo = AsyncSubjectRepository(db)
+        self.occupancy: OccupancyMap | None = None
+        self.cache = get_reference_cache(db.bind)
+
+    async def get_occupancy(self) -> OccupancyMap:
+        # Same process-wide map as the sync service, checked once per service (request) through a sync facade
+        if self.occupancy is None:
+            self.occupancy = await self.db.run_sync(get_occupancy)
+        return self.occupancy
+
+    async def create_schedule_entry(self, entry_data: ScheduleEntryCreate):
+        check_entry_fields(entry_data)
+        check_entry_room(entry_data, await self.room_repo.get_by_id(entry_data.room_id))
+
+        # Clashes are decided by the database alone (see TimetableService.create_schedule_entry)
+        occupancy = await self.get_occupancy()  # taken before the write, whose version bump it then counts
+        schedule, clash = await self.schedule_repo.add_if_free(**entry_fields(entry_data))
+        raise_for_clash(clash)
+        assert schedule.id is not None, "Schedule was not persisted"
+        occupancy.add(
+            schedule.id,
+            schedule.day_of_week,
+            schedule.start_hour,
+            schedule.end_hour,
+            room_id=schedule.room_id,
+            teacher_id=schedule.teacher_id,
+            student_group_id=schedule.student_group_id,
+            year_id=schedule.course_year_id,
+        )
+        occupancy.advance("schedule")
+        return schedule
+
+    async def delete_schedule_entry(self, schedule_id: int) -> bool:
+        assert isinstance(schedule_id, int) and schedule_id > 0, "Schedule ID must be positive"
+
+        occupancy = await self.get_occupancy()  # taken before the write, whose version bump it then counts
+        success = await self.schedule_repo.delete(schedule_id)
+        if not success:
+            raise HTTPException(status_code=404, detail="Schedule entry not found.")
+        occupancy.remove(schedule_id)
+        occupancy.advance("schedule")
+        return True
+
+    async def list_schedule_entries(self, after_id: int | None = None, limit: int | None = None, expand: bool = False,
+                               **filters):
+        check_schedule_filters(filters)
+        entries = await self.schedule_repo.get_page(after_id=after_id, limit=limit, expand=expand, **filters)
+        assert isinstance(entries, list), "Schedule entries must be a list"
+        return entries
+
+    async def list_schedule_entries_by_group(self, group_name: str):
+        assert isinstance(group_name, str) and group_name.strip(), "Group name cannot be empty"
+
+        group = await self.student_group_repo.get_by_name(group_name)
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found.")
+
+        results = await self.schedule_repo.get_by_group_id(group.id)
+        if check_contracts():
+            assert all(e.student_group_id == group.id for e in results), "Mismatched group entries returned"
+        return results
+
+    async def get_group_timetable(self, year: int, letter: str, expand: bool = False):
+        """A group's full week (its seminars/labs and its year's courses) from one query."""
+        entries = await self.schedule_repo.get_group_timetable(year, letter, expand)
+        if entries is None:
+            raise HTTPException(status_code=404, detail="Group not found.")
+        return sort_by_slot(entries)
+
+    async def find_availability(self, room_id: int | None = None, teacher_id: int | None = None,
+                                student_group_id: int | None = None, is_course_room: bool | None = None,
+                                from_day: str = "Monday", to_day: str = "Friday") -> list[dict]:
+        """2-hour windows where all the given resources are free, from the occupancy bitmaps.
+
+        ``get_occupancy`` reloads the bitmaps first when a write they have not seen
+        was committed, by any worker, so windows reflect every committed write.
+        """
+        check_availability_query(from_day, to_day, room_id=room_id, teacher_id=teacher_id,
+                                 student_group_id=student_group_id, is_course_room=is_course_room)
+        for repo, resource_id, name in (
+            (self.room_repo, room_id, "Room"),
+            (self.teacher_repo, teacher_id, "Teacher"),
+            (self.student_group_repo, student_group_id, "Group"),
+        ):
+            if resource_id is not None and await repo.get_by_id(resource_id) is None:
+                raise HTTPException(status_code=404, detail=f"{name} not found.")
+
+        occupancy = await self.get_occupancy()
+        room_ids = None
+        if is_course_room is not None:
+            room_ids = [r for r in occupancy.rooms_of_type(is_course_room) if room_id in (None, r)]
+        windows = occupancy.common_windows(room_id=room_id, teacher_id=teacher_id, student_group_id=student_group_id,
+                                           room_ids=room_ids, within=days_mask(from_day, to_day))
+        if check_contracts():
+            assert all(end - start == 2 for _, start, end, _ in windows), "Windows must be 2 hours long"  #  Postcondition
+        return [dict(day_of_week=day, start_hour=start, end_hour=end, room_ids=rooms)
+                for day, start, end, rooms in windows]
+
+    async def recommend_rooms(self, day_of_week: str, start_hour: int, class_type: str) -> list[dict]:
+        """Free rooms suited to ``class_type`` for a 2-hour class, least used first, from the occupancy bitmaps.
+
+        Read-your-writes across workers: the bitmaps (and the rooms they know) are
+        reloaded first when any worker committed a schedule, room, group or subject
+        change they have not seen, so the answer reflects every write committed
+        before the request. It is advice, not a hold: a room may be booked right
+        after, and the booking itself is checked by the database.
+        """
+        if day_of_week is None or class_type is None:
+            raise HTTPException(status_code=400, detail="day_of_week and class_type are required.")
+        check_schedule_filters(dict(day_of_week=day_of_week, class_type=class_type))
+        occupancy = await self.get_occupancy()
+        ranked = occupancy.rank_free_rooms(day_of_week, start_hour, start_hour + 2, is_course_room=class_type == "Course")
+        return [dict(room_id=room_id, booked_hours=booked) for room_id, booked in ranked]
+
+    async def create_teacher(self, teacher_data: TeacherCreate):
+        assert teacher_data is not None and teacher_data.name.strip() != "", "Teacher name cannot be empty"
+        teacher = await self.teacher_repo.add(name=teacher_data.name)
+        assert teacher.id is not None, "Teacher must have an ID after creation"
+        self.cache.invalidate("teachers")
+        return teacher
+
+    async def list_reference_page(self, collection: str, after_id: int | None = None, limit: int | None = None,
+                                  etag: str | None = None) -> CachedPage:
+        """Serialized JSON page of a reference collection, served from the cache when fresh.
+
+        With the collection's current ``etag`` in the key, a page cached before a
+        write made by another worker is never served under the new tag.
+        """
+        assert collection in REFERENCE_ADAPTERS, "Unknown reference collection"  #  Precondition
+        key = (etag, after_id, limit)
+        page = self.cache.get(collection, key)
+        if page is None:
+            items = await getattr(self, f"list_{collection}")(after_id=after_id, limit=limit)
+            next_after_id = items[-1].id if limit is not None and len(items) == limit else None
+            page = self.cache.put(collection, key, CachedPage(REFERENCE_ADAPTERS[collection].dump_json(items), next_after_id))
+        return page
+
+    async def list_teachers(self, after_id: int | None = None, limit: int | None = None):
+        teachers = await self.teacher_repo.get_page(after_id=after_id, limit=limit)
+        if check_contracts():
+            assert all(t.name for t in teachers), "Each teacher must have a name"
+        return teachers
+
+    async def list_groups(self, after_id: int | None = None, limit: int | None = None):
+        groups = await self.student_group_repo.get_page(after_id=after_id, limit=limit)
+        if check_contracts():
+            assert all(g.letter for g in groups), "Each group must have a letter"
+        return groups
+
+    async def list_years(self, after_id: int | None = None, limit: int | None = None):
+        years = await self.year_repo.get_page(after_id=after_id, limit=limit)
+        if check_contracts():
+            assert all(y.year >= 1 for y in years), "Invalid student year value"
+        return years
+
+    async def list_rooms(self, after_id: int | None = None, limit: int | None = None):
+        rooms = await self.room_repo.get_page(after_id=after_id, limit=limit)
+        if check_contracts():
+            assert all(isinstance(r.is_course_room, bool) for r in rooms), "Room type must be boolean"
+        return rooms
+
+    async def list_subjects(self, after_id: int | None = None, limit: int | None = None):
+        subjects = await self.subject_repo.get_page(after_id=after_id, limit=limit)
+        if check_contracts():
+            assert all(s.name for s in subjects), "Each subject must have a name"
+        return subjects
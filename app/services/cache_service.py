@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+from app.core.database import database_key
+
+REFERENCE_COLLECTIONS = ("teachers", "rooms", "years", "groups", "subjects")
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))  # seconds; 0 disables caching
+
+
+class CachedPage:
+    __slots__ = ("body", "next_after_id")
+
+    def __init__(self, body: bytes, next_after_id: int | None = None):
+        self.body = body  # the JSON response body, serialized once per fill
+        self.next_after_id = next_after_id
+
+
+class ReferenceCache:
+    """TTL cache of serialized list responses for the rarely changing reference tables.
+
+    Entries are keyed by ``(collection, page)`` and dropped per collection on any
+    write through the services; the TTL bounds staleness for writes made by other
+    processes (other uvicorn workers, the CLI seeder).
+    """
+
+    def __init__(self, ttl: float = REFERENCE_CACHE_TTL, clock=time.monotonic):
+        assert ttl >= 0, "ttl must not be negative"  #  Precondition
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}  # (collection, key) -> (expires_at, CachedPage)
+        self._stats = {collection: {"hits": 0, "misses": 0, "invalidations": 0} for collection in REFERENCE_COLLECTIONS}
+
+    def get(self, collection: str, key) -> CachedPage | None:
+        assert collection in REFERENCE_COLLECTIONS, "Unknown reference collection"  #  Precondition
+        with self._lock:
+            cached = self._entries.get((collection, key))
+            if cached is not None and cached[0] > self._clock():
+                self._stats[collection]["hits"] += 1
+                return cached[1]
+            if cached is not None:
+                del self._entries[(collection, key)]
+            self._stats[collection]["misses"] += 1
+            return None
+
+    def put(self, collection: str, key, page: CachedPage) -> CachedPage:
+        assert collection in REFERENCE_COLLECTIONS, "Unknown reference collection"  #  Precondition
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[(collection, key)] = (self._clock() + self.ttl, page)
+        return page
+
+    def invalidate(self, collection: str):
+        assert collection in REFERENCE_COLLECTIONS, "Unknown reference collection"  #  Precondition
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == collection]:
+                del self._entries[cache_key]
+            self._stats[collection]["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = {collection: 0 for collection in REFERENCE_COLLECTIONS}
+            for collection, _ in self._entries:
+                entries[collection] += 1
+            return {
+                collection: {**counters, "entries": entries[collection]}
+                for collection, counters in self._stats.items()
+            }
+
+
+_caches: dict[str, ReferenceCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_reference_cache(bind) -> ReferenceCache:
+    """Process-wide reference cache for the database behind ``bind`` (sync or async engine)."""
+    key = database_key(bind)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = ReferenceCache()
+    return cache
+
+
+def all_cache_stats() -> dict:
+    with _caches_lock:
+        caches = list(_caches.values())
+    totals = {collection: {"hits": 0, "misses": 0, "invalidations": 0, "entries": 0} for collection in REFERENCE_COLLECTIONS}
+    for cache in caches:
+        for collection, counters in cache.stats().items():
+            for name, value in counters.items():
+                totals[collection][name] += value
+    return totals
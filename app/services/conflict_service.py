@@ -0,0 +1,56 @@
+import heapq
+
+from app.services.occupancy_service import ROOM, TEACHER, GROUP, YEAR
+
+
+def entry_intervals(ref, day_of_week: str, start_hour: int, end_hour: int, room_id: int, teacher_id: int,
+                    student_group_id: int | None = None, year_id: int | None = None,
+                    year_groups: dict[int, list[int]] | None = None) -> list[tuple]:
+    """``(timeline_key, (start, end, ref, shared))`` for every timeline an entry occupies.
+
+    Timelines are keyed by ``(resource_type, resource_id, day)``. A year-wide course
+    (no group) sits on its year's timeline and, marked ``shared``, on the timeline of
+    every group of that year, since each of those groups attends it.
+    """
+    interval = (start_hour, end_hour, ref, False)
+    keyed = [((ROOM, room_id, day_of_week), interval), ((TEACHER, teacher_id, day_of_week), interval)]
+    if student_group_id is not None:
+        keyed.append(((GROUP, student_group_id, day_of_week), interval))
+    elif year_id is not None:
+        keyed.append(((YEAR, year_id, day_of_week), interval))
+        shared = (start_hour, end_hour, ref, True)
+        keyed.extend(((GROUP, group_id, day_of_week), shared) for group_id in (year_groups or {}).get(year_id, ()))
+    return keyed
+
+
+def overlapping_pairs(intervals: list[tuple]):
+    """Yield ``(earlier_ref, later_ref)`` for every pair of intersecting ``(start, end, ref, shared)`` intervals.
+
+    Sort by start, then sweep keeping the still-open intervals in heaps ordered by
+    end: O(n log n) plus one step per reported pair. Two ``shared`` intervals are
+    never paired; their clash belongs to the timeline they are not shared on.
+    """
+    active, active_shared = [], []  # (end, seq, ref)
+    for seq, (start, end, ref, shared) in enumerate(sorted(intervals, key=lambda interval: (interval[0], interval[1]))):
+        assert start < end, "Interval must not be empty"  #  Precondition
+        for heap in (active, active_shared):
+            while heap and heap[0][0] <= start:
+                heapq.heappop(heap)
+        for _, _, other in active:
+            yield other, ref
+        if not shared:
+            for _, _, other in active_shared:
+                yield other, ref
+        heapq.heappush(active_shared if shared else active, (end, seq, ref))
+
+
+def sweep_conflicts(timelines: dict[tuple, list[tuple]]):
+    """Yield ``(clash_type, timeline_key, ref_a, ref_b)`` once per clashing pair and clash type.
+
+    The clash type is room, teacher or group; two courses of one year clash as a group
+    clash on the year's timeline.
+    """
+    for key, intervals in timelines.items():
+        clash = GROUP if key[0] == YEAR else key[0]
+        for first, second in overlapping_pairs(intervals):
+            yield clash, key, first, second
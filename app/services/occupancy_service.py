@@ -0,0 +1,322 @@
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.core.database import database_key
+from app.models.room import Room
+from app.models.schedule_entry import ScheduleEntry
+from app.models.student_group import StudentGroup
+from app.models.subject import Subject
+from app.services.version_service import CollectionVersions, read_versions
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+FIRST_HOUR = 8
+LAST_HOUR = 20
+SLOTS_PER_DAY = LAST_HOUR - FIRST_HOUR  # 12 hourly slots per weekday
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+WEEK_MASK = (1 << (SLOTS_PER_DAY * len(DAYS))) - 1
+
+ROOM = "room"
+TEACHER = "teacher"
+GROUP = "group"
+YEAR = "year"  # year-wide courses (entries without a student group)
+RESOURCE_TYPES = (ROOM, TEACHER, GROUP, YEAR)
+# Writes to these collections change what the map holds
+OCCUPANCY_COLLECTIONS = ("schedule", "rooms", "groups", "subjects")
+
+
+def slot_mask(day_of_week: str, start_hour: int, end_hour: int) -> int:
+    """Bitmask of the hourly slots covered by [start_hour, end_hour) on a weekday.
+
+    Bit ``day_index * 12 + (hour - 8)`` stands for the hour starting at ``hour``.
+    """
+    assert day_of_week in DAYS, "Invalid day"  #  Precondition
+    assert FIRST_HOUR <= start_hour < end_hour <= LAST_HOUR, "Hours must lie within 8..20"  #  Precondition
+    offset = DAYS.index(day_of_week) * SLOTS_PER_DAY + (start_hour - FIRST_HOUR)
+    return ((1 << (end_hour - start_hour)) - 1) << offset
+
+
+def window_starts(busy: int, length: int = 2) -> int:
+    """Bitmask of every start slot where ``length`` consecutive slots of the same day are free."""
+    assert length >= 1, "length must be positive"  #  Precondition
+    free = ~busy & WEEK_MASK
+    starts = free
+    for shift in range(1, length):
+        starts &= free >> shift
+    # A window may not run past the end of its day
+    valid = 0
+    for day_index in range(len(DAYS)):
+        valid |= (DAY_MASK >> (length - 1)) << (day_index * SLOTS_PER_DAY)
+    return starts & valid
+
+
+def iter_windows(starts: int, length: int = 2):
+    """Yield ``(day_of_week, start_hour, end_hour)`` for every bit set in a window-start mask."""
+    while starts:
+        low = starts & -starts
+        bit = low.bit_length() - 1
+        day_index, slot = divmod(bit, SLOTS_PER_DAY)
+        yield DAYS[day_index], FIRST_HOUR + slot, FIRST_HOUR + slot + length
+        starts ^= low
+
+
+def days_mask(from_day: str = DAYS[0], to_day: str = DAYS[-1]) -> int:
+    """Bitmask of every slot from ``from_day`` through ``to_day`` inclusive."""
+    assert from_day in DAYS and to_day in DAYS, "Invalid day"  #  Precondition
+    mask = 0
+    for day_index in range(DAYS.index(from_day), DAYS.index(to_day) + 1):
+        mask |= DAY_MASK << (day_index * SLOTS_PER_DAY)
+    return mask
+
+
+class OccupancyMap:
+    """Per-resource weekly bitmaps (5 weekdays x 12 hourly slots) of the schedule.
+
+    The map is built from ``schedule_entries`` and remembers the collection
+    versions it was built at. ``get_occupancy`` replaces it with a fresh one
+    when another writer (worker, script) has moved a version on; writes made
+    through ``TimetableService`` update it in place and ``advance`` its
+    versions, so conflict checks and free-slot lookups stay bit operations
+    instead of SQL scans.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.versions: dict[str, int] | None = None  # OCCUPANCY_COLLECTIONS -> version the map reflects
+        self._lock = threading.RLock()
+        self._masks = {kind: {} for kind in RESOURCE_TYPES}
+        self._members = {kind: {} for kind in RESOURCE_TYPES}  # resource -> {entry_id: mask}
+        self._entries = {}  # entry_id -> [(kind, resource_id), ...]
+        self._group_years = {}  # group_id -> student_year_id
+        self._room_types = {}  # room_id -> is_course_room
+
+    def load(self, db: Session):
+        assert db is not None, "Database session must not be None"  #  Precondition
+        # Read before the rows: a write committed in between leaves the versions behind, never ahead
+        versions = read_versions(db, *OCCUPANCY_COLLECTIONS)
+        rows = (
+            db.query(
+                ScheduleEntry.id,
+                ScheduleEntry.day_of_week,
+                ScheduleEntry.start_hour,
+                ScheduleEntry.end_hour,
+                ScheduleEntry.room_id,
+                ScheduleEntry.teacher_id,
+                ScheduleEntry.student_group_id,
+                Subject.student_year_id,
+            )
+            .join(Subject, Subject.id == ScheduleEntry.subject_id)
+            .all()
+        )
+        groups = db.query(StudentGroup.id, StudentGroup.student_year_id).all()
+        rooms = db.query(Room.id, Room.is_course_room).all()
+        with self._lock:
+            self.clear()
+            self.load_reference(groups, rooms)
+            for entry_id, day, start, end, room_id, teacher_id, group_id, year_id in rows:
+                self.add(entry_id, day, start, end, room_id, teacher_id, group_id, year_id)
+            self.versions = {collection: versions.version(collection) for collection in OCCUPANCY_COLLECTIONS}
+            self.loaded = True
+
+    def clear(self):
+        with self._lock:
+            for kind in RESOURCE_TYPES:
+                self._masks[kind].clear()
+                self._members[kind].clear()
+            self._entries.clear()
+            self._group_years.clear()
+            self._room_types.clear()
+            self.versions = None
+            self.loaded = False
+
+    def load_reference(self, groups, rooms):
+        """Replace the ``(group_id, year_id)`` and ``(room_id, is_course_room)`` lookups."""
+        with self._lock:
+            self._group_years = {group_id: year_id for group_id, year_id in groups}
+            self._room_types = {room_id: bool(is_course_room) for room_id, is_course_room in rooms}
+
+    def is_current(self, versions: CollectionVersions) -> bool:
+        """Whether the map reflects every committed write to ``OCCUPANCY_COLLECTIONS``."""
+        return self.versions is not None and all(
+            self.versions[collection] == versions.version(collection) for collection in OCCUPANCY_COLLECTIONS)
+
+    def advance(self, collection: str):
+        """Count one write applied to the map that committed after the map was built.
+
+        Take the map before writing: counting a write the load already saw would
+        let the map pass for current once the database caught up with it.
+        """
+        assert collection in OCCUPANCY_COLLECTIONS, "Unknown collection"  #  Precondition
+        with self._lock:
+            if self.versions is not None:
+                self.versions[collection] += 1
+
+    def rooms_of_type(self, is_course_room: bool) -> list[int]:
+        return [r for r, course in self._room_types.items() if course is is_course_room]
+
+    def add(self, entry_id: int, day_of_week: str, start_hour: int, end_hour: int,
+            room_id: int, teacher_id: int, student_group_id: int | None = None, year_id: int | None = None):
+        mask = slot_mask(day_of_week, start_hour, end_hour)
+        keys = [(ROOM, room_id), (TEACHER, teacher_id)]
+        if student_group_id is not None:
+            keys.append((GROUP, student_group_id))
+        elif year_id is not None:
+            keys.append((YEAR, year_id))
+        with self._lock:
+            if entry_id in self._entries:
+                self.remove(entry_id)
+            for kind, resource_id in keys:
+                self._members[kind].setdefault(resource_id, {})[entry_id] = mask
+                self._masks[kind][resource_id] = self._masks[kind].get(resource_id, 0) | mask
+            self._entries[entry_id] = keys
+
+    def remove(self, entry_id: int) -> bool:
+        with self._lock:
+            keys = self._entries.pop(entry_id, None)
+            if keys is None:
+                return False
+            for kind, resource_id in keys:
+                members = self._members[kind][resource_id]
+                del members[entry_id]
+                # Recompute from the remaining entries so pre-existing overlaps stay marked
+                mask = 0
+                for other in members.values():
+                    mask |= other
+                if mask:
+                    self._masks[kind][resource_id] = mask
+                else:
+                    del self._masks[kind][resource_id]
+                    del self._members[kind][resource_id]
+            return True
+
+    def copy(self) -> "OccupancyMap":
+        """Private copy for checking uncommitted rows (e.g. a bulk batch) without other readers seeing them."""
+        clone = OccupancyMap()
+        with self._lock:
+            for kind in RESOURCE_TYPES:
+                clone._masks[kind] = dict(self._masks[kind])
+                clone._members[kind] = {r: dict(members) for r, members in self._members[kind].items()}
+            clone._entries = dict(self._entries)
+            clone._group_years = dict(self._group_years)
+            clone._room_types = dict(self._room_types)
+            clone.versions = None if self.versions is None else dict(self.versions)
+            clone.loaded = self.loaded
+        return clone
+
+    def busy(self, kind: str, resource_id: int) -> int:
+        assert kind in RESOURCE_TYPES, "Unknown resource type"  #  Precondition
+        return self._masks[kind].get(resource_id, 0)
+
+    def group_busy(self, group_id: int) -> int:
+        """Slots taken by the group's own classes plus its year's courses."""
+        busy = self.busy(GROUP, group_id)
+        year_id = self._group_years.get(group_id)
+        if year_id is not None:
+            busy |= self.busy(YEAR, year_id)
+        return busy
+
+    def year_busy(self, year_id: int) -> int:
+        """Slots taken by the year's courses or by any of its groups."""
+        busy = self.busy(YEAR, year_id)
+        for group_id, group_year in self._group_years.items():
+            if group_year == year_id:
+                busy |= self.busy(GROUP, group_id)
+        return busy
+
+    def snapshot(self) -> dict[tuple[str, int], int]:
+        """Copy of every non-empty mask keyed by ``(resource_type, resource_id)``."""
+        with self._lock:
+            return {(kind, resource_id): mask
+                    for kind in RESOURCE_TYPES for resource_id, mask in self._masks[kind].items()}
+
+    def find_conflict(self, day_of_week: str, start_hour: int, end_hour: int, room_id: int,
+                      teacher_id: int, student_group_id: int | None = None, year_id: int | None = None) -> str | None:
+        """Return the first clashing resource type (room, teacher, group) or None."""
+        mask = slot_mask(day_of_week, start_hour, end_hour)
+        if self.busy(ROOM, room_id) & mask:
+            return ROOM
+        if self.busy(TEACHER, teacher_id) & mask:
+            return TEACHER
+        if student_group_id is not None:
+            if self.group_busy(student_group_id) & mask:
+                return GROUP
+        elif year_id is not None and self.year_busy(year_id) & mask:
+            return GROUP
+        return None
+
+    def rank_free_rooms(self, day_of_week: str, start_hour: int, end_hour: int,
+                        is_course_room: bool) -> list[tuple[int, int]]:
+        """``(room_id, booked_hours)`` of the rooms of a type free for the slot, least used first.
+
+        Filling the emptiest rooms first keeps utilization balanced across the week;
+        ties go to the room with fewer hours that day, then the lower id.
+        """
+        mask = slot_mask(day_of_week, start_hour, end_hour)
+        day_slots = slot_mask(day_of_week, FIRST_HOUR, LAST_HOUR)
+        ranked = []
+        for room_id in self.rooms_of_type(is_course_room):
+            busy = self.busy(ROOM, room_id)
+            if not busy & mask:
+                ranked.append((busy.bit_count(), (busy & day_slots).bit_count(), room_id))
+        ranked.sort()
+        return [(room_id, booked) for booked, _, room_id in ranked]
+
+    def free_windows(self, busy: int, length: int = 2) -> list[tuple[str, int, int]]:
+        return list(iter_windows(window_starts(busy, length), length))
+
+    def common_windows(self, room_id: int | None = None, teacher_id: int | None = None,
+                       student_group_id: int | None = None, room_ids: list[int] | None = None,
+                       within: int = WEEK_MASK, length: int = 2) -> list[tuple[str, int, int, list[int] | None]]:
+        """Windows of ``length`` hours inside ``within`` where every given resource is free.
+
+        With ``room_ids`` a window also needs one of those rooms free; each such
+        window lists the rooms that are, otherwise the room list is None.
+        """
+        busy = 0
+        if room_id is not None:
+            busy |= self.busy(ROOM, room_id)
+        if teacher_id is not None:
+            busy |= self.busy(TEACHER, teacher_id)
+        if student_group_id is not None:
+            busy |= self.group_busy(student_group_id)
+        starts = window_starts(busy, length) & within
+        if room_ids is None:
+            return [(day, start, end, None) for day, start, end in iter_windows(starts, length)]
+
+        room_starts = {r: window_starts(self.busy(ROOM, r), length) & starts for r in room_ids}
+        any_room = 0
+        for mask in room_starts.values():
+            any_room |= mask
+        windows = []
+        for day, start, end in iter_windows(any_room, length):
+            bit = slot_mask(day, start, start + 1)
+            windows.append((day, start, end, [r for r, mask in room_starts.items() if mask & bit]))
+        return windows
+
+
+_maps: dict[str, OccupancyMap] = {}
+_maps_lock = threading.Lock()
+_load_lock = threading.Lock()
+
+
+def get_occupancy(db: Session) -> OccupancyMap:
+    """Process-wide occupancy map for the database behind ``db``, current as of this call.
+
+    One query reads the collection versions; when a write the map has not seen
+    moved one on, a new map is loaded and published. Callers still holding the
+    old one keep a consistent, if stale, view.
+    """
+    # Keyed by backend + location, so sync and asyncio drivers share one map
+    key = database_key(db.get_bind())
+    versions = read_versions(db, *OCCUPANCY_COLLECTIONS)
+    occupancy = _maps.get(key)
+    if occupancy is not None and occupancy.is_current(versions):
+        return occupancy
+    with _load_lock:
+        occupancy = _maps.get(key)
+        if occupancy is None or not occupancy.is_current(versions):
+            occupancy = OccupancyMap()
+            occupancy.load(db)
+            with _maps_lock:
+                _maps[key] = occupancy
+    return occupancy
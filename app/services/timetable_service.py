@@ -1,15 +1,118 @@
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
+from app.core.contracts import check_contracts
 from app.repository.student_group_repository import StudentGroupRepository
 from app.repository.student_year_repository import StudentYearRepository
 from app.repository.subject_repository import SubjectRepository
 from app.repository.teacher_repository import TeacherRepository
 from app.repository.room_repository import RoomRepository
-from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.repository.schedule_entry_repository import EXPORT_COLUMNS, ScheduleEntryRepository
 from app.schemas.teacher import TeacherCreate
 from app.schemas.schedule_entry import ScheduleEntryCreate
+from app.schemas.timetable import MAX_TIME_BUDGET, MAX_WORKERS, TimetableGenerateRequest
 from app.models.room import Room
+from app.services.cache_service import get_reference_cache
+from app.services.conflict_service import entry_intervals, sweep_conflicts
+from app.services.occupancy_service import ROOM, TEACHER, GROUP, DAYS, get_occupancy
+from app.services.timetable_solver import TimetableProblem, solve_multistart, solve_timetable
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+AUDIT_COLUMNS = ("issue", "day_of_week", "resource_type", "resource_id", "entry_id", "other_entry_id", "detail")
+
+def check_entry_fields(entry_data: ScheduleEntryCreate):
+    # PRECONDITIONS
+    assert entry_data is not None, "entry_data must not be None"
+    assert isinstance(entry_data.start_hour, int), "start_hour must be an integer"
+    assert isinstance(entry_data.end_hour, int), "end_hour must be an integer"
+    assert entry_data.class_type in ["Course", "Seminar", "Laboratory"], "Invalid class_type"
+
+    if any(val is None for val in [
+        entry_data.start_hour,
+        entry_data.end_hour,
+        entry_data.day_of_week,
+        entry_data.room_id,
+        entry_data.teacher_id,
+        entry_data.subject_id,
+        entry_data.class_type,
+        entry_data.student_group_id
+    ]):
+        raise HTTPException(status_code=400, detail="All fields are required.")
+
+    assert 8 <= entry_data.start_hour < 20, "start_hour out of range"
+    assert 9 <= entry_data.end_hour <= 20, "end_hour out of range"
+    assert entry_data.end_hour > entry_data.start_hour, "end_hour must be after start_hour"
+    assert entry_data.end_hour - entry_data.start_hour == 2, "Classes must be 2 hours long"
+    assert entry_data.day_of_week in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"], "Invalid day"
+
+CLASH_DETAILS = {
+    ROOM: "Room is already occupied at that time.",
+    TEACHER: "Teacher is already scheduled at that time.",
+    GROUP: "Student group is already scheduled at that time.",
+}
+
+def raise_for_clash(clash: str | None):
+    if clash is not None:
+        raise HTTPException(status_code=400, detail=CLASH_DETAILS[clash])
+
+def check_entry_room(entry_data: ScheduleEntryCreate, room: Room | None):
+    assert isinstance(room, Room), "Expected a Room instance"
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found.")
+
+    if entry_data.class_type == "Course":
+        assert room.is_course_room is True, "Courses must be in course rooms"
+    if entry_data.class_type in ["Laboratory", "Seminar"]:
+        assert room.is_course_room is False, "Labs/seminars must be in lab rooms"
+
+def entry_fields(entry_data: ScheduleEntryCreate) -> dict:
+    """Column values of a new schedule entry."""
+    return dict(
+        day_of_week=entry_data.day_of_week,
+        start_hour=entry_data.start_hour,
+        end_hour=entry_data.end_hour,
+        subject_id=entry_data.subject_id,
+        room_id=entry_data.room_id,
+        teacher_id=entry_data.teacher_id,
+        class_type=entry_data.class_type,
+        student_group_id=entry_data.student_group_id,
+    )
+
+def check_schedule_filters(filters: dict):
+    if filters.get("day_of_week") is not None and filters["day_of_week"] not in DAYS:
+        raise HTTPException(status_code=400, detail="Classes can only be scheduled Monday to Friday.")
+    if filters.get("class_type") is not None and filters["class_type"] not in ["Course", "Seminar", "Laboratory"]:
+        raise HTTPException(status_code=400, detail="Invalid class type.")
+
+def check_availability_query(from_day: str, to_day: str, **resources):
+    if from_day not in DAYS or to_day not in DAYS:
+        raise HTTPException(status_code=400, detail="Classes can only be scheduled Monday to Friday.")
+    if DAYS.index(from_day) > DAYS.index(to_day):
+        raise HTTPException(status_code=400, detail="from_day must not be after to_day.")
+    if all(value is None for value in resources.values()):
+        raise HTTPException(status_code=400, detail="Give at least one of room_id, teacher_id, student_group_id or is_course_room.")
+
+def batched(rows, size: int):
+    """Group an iterable into lists of at most ``size`` items."""
+    assert isinstance(size, int) and size > 0, "size must be a positive integer"  #  Precondition
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def sort_by_slot(entries: list) -> list:
+    """Weekly order: Monday first, then by start hour."""
+    return sorted(entries, key=lambda e: (DAYS.index(e.day_of_week), e.start_hour, e.id))
 
 class TimetableService:
     def __init__(self, db: Session):
@@ -20,87 +123,131 @@ class TimetableService:
         self.room_repo = RoomRepository(db)
         self.schedule_repo = ScheduleEntryRepository(db)
         self.subject_repo = SubjectRepository(db)  # Assuming you have a SubjectRepository, initialize it here
+        self._occupancy = None
+
+    @property
+    def occupancy(self):
+        # Loaded lazily so read-only endpoints never pay for building the bitmaps
+        if self._occupancy is None:
+            self._occupancy = get_occupancy(self.db)
+        return self._occupancy
+
+    @occupancy.setter
+    def occupancy(self, value):
+        self._occupancy = value
 
     def create_schedule_entry(self, entry_data: ScheduleEntryCreate):
-        # PRECONDITIONS
-        assert entry_data is not None, "entry_data must not be None"
-        assert isinstance(entry_data.start_hour, int), "start_hour must be an integer"
-        assert isinstance(entry_data.end_hour, int), "end_hour must be an integer"
-        assert entry_data.class_type in ["Course", "Seminar", "Laboratory"], "Invalid class_type"
-
-        if any(val is None for val in [
-            entry_data.start_hour,
-            entry_data.end_hour,
-            entry_data.day_of_week,
-            entry_data.room_id,
-            entry_data.teacher_id,
-            entry_data.subject_id,
-            entry_data.class_type,
-            entry_data.student_group_id
-        ]):
-            raise HTTPException(status_code=400, detail="All fields are required.")
-
-        assert 8 <= entry_data.start_hour < 20, "start_hour out of range"
-        assert 9 <= entry_data.end_hour <= 20, "end_hour out of range"
-        assert entry_data.end_hour > entry_data.start_hour, "end_hour must be after start_hour"
-        assert entry_data.end_hour - entry_data.start_hour == 2, "Classes must be 2 hours long"
-        assert entry_data.day_of_week in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"], "Invalid day"
+        check_entry_fields(entry_data)
+        check_entry_room(entry_data, self.room_repo.get_by_id(entry_data.room_id))
 
         # INVARIANTS
-        entries_same_room = self.schedule_repo.get_all()
-        for existing in entries_same_room:
-            assert existing is not None
-            if (existing.room_id == entry_data.room_id and
-                existing.day_of_week == entry_data.day_of_week and
-                not (entry_data.end_hour <= existing.start_hour or entry_data.start_hour >= existing.end_hour)):
-                raise HTTPException(status_code=400, detail="Room is already occupied at that time.")
-
-        entries_same_teacher = self.schedule_repo.get_all()
-        for existing in entries_same_teacher:
-            assert existing.teacher_id is not None
-            if (existing.teacher_id == entry_data.teacher_id and
-                existing.day_of_week == entry_data.day_of_week and
-                not (entry_data.end_hour <= existing.start_hour or entry_data.start_hour >= existing.end_hour)):
-                raise HTTPException(status_code=400, detail="Teacher is already scheduled at that time.")
-
-        room = self.room_repo.get_by_id(entry_data.room_id)
-        assert isinstance(room, Room), "Expected a Room instance"
-        if not room:
-            raise HTTPException(status_code=404, detail="Room not found.")
-
-        if entry_data.class_type == "Course":
-            assert room.is_course_room is True, "Courses must be in course rooms"
-        if entry_data.class_type in ["Laboratory", "Seminar"]:
-            assert room.is_course_room is False, "Labs/seminars must be in lab rooms"
+        # Clashes are decided by the database alone: the slot table rejects a taken slot in the
+        # statement that books it. The bitmaps may lag behind a delete made by another worker
+        occupancy = self.occupancy  # taken before the write, whose version bump it then counts
+        schedule, clash = self.schedule_repo.add_if_free(**entry_fields(entry_data))
+        raise_for_clash(clash)
 
         # POSTCONDITION
-        schedule = self.schedule_repo.add(
-            day_of_week=entry_data.day_of_week,
-            start_hour=entry_data.start_hour,
-            end_hour=entry_data.end_hour,
-            subject_id=entry_data.subject_id,
-            room_id=entry_data.room_id,
-            teacher_id=entry_data.teacher_id,
-            class_type=entry_data.class_type,
-            student_group_id=entry_data.student_group_id,
-        )
-
         assert schedule.id is not None, "Schedule was not persisted"
         assert schedule.day_of_week == entry_data.day_of_week, "Day mismatch after insert"
+        occupancy.add(
+            schedule.id,
+            schedule.day_of_week,
+            schedule.start_hour,
+            schedule.end_hour,
+            room_id=schedule.room_id,
+            teacher_id=schedule.teacher_id,
+            student_group_id=schedule.student_group_id,
+            year_id=schedule.course_year_id,
+        )
+        occupancy.advance("schedule")
         return schedule
 
     
-    def list_schedule_entries(self):
-        entries = self.schedule_repo.get_all()
+    def list_schedule_entries(self, after_id: int | None = None, limit: int | None = None, expand: bool = False,
+                              **filters):
+        check_schedule_filters(filters)
+        entries = self.schedule_repo.get_page(after_id=after_id, limit=limit, expand=expand, **filters)
         assert isinstance(entries, list), "Schedule entries must be a list"
         return entries
-    
+
+    def export_schedule_entries(self, export_format: str = "ndjson", batch_size: int = 1000, **filters):
+        """Validate the request up front and return a generator of encoded export chunks.
+
+        Each chunk is one ``batch_size`` batch of rows rendered as NDJSON lines or CSV
+        records; the CSV header is emitted before the first query so the first byte
+        does not wait on the database.
+        """
+        assert export_format in EXPORT_FORMATS, "Unsupported export format"  #  Precondition
+        check_schedule_filters(filters)
+        batches = self.schedule_repo.iter_batches(batch_size, **filters)
+        return self.render_chunks(batches, export_format, EXPORT_COLUMNS)
+
+    @classmethod
+    def render_chunks(cls, batches, export_format: str, columns: tuple):
+        """Encode batches of row tuples (``columns`` order) as NDJSON or CSV chunks."""
+        assert export_format in EXPORT_FORMATS, "Unsupported export format"  #  Precondition
+        if export_format == "csv":
+            return cls._csv_chunks(batches, columns)
+        return cls._ndjson_chunks(batches, columns)
+
+    @staticmethod
+    def _ndjson_chunks(batches, columns: tuple):
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        for batch in batches:
+            yield "".join(encode(dict(zip(columns, row))) + "\n" for row in batch).encode()
+
+    @staticmethod
+    def _csv_chunks(batches, columns: tuple):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue().encode()
+
+    def audit_schedule(self):
+        """Yield one ``AUDIT_COLUMNS`` tuple per problem in the stored schedule.
+
+        Covers rows that never went through the API (seeder, imports, manual SQL):
+        classes in the wrong kind of room, then every room, teacher and group
+        double-booking. Clashes come from one sort-and-sweep per (resource, day)
+        timeline, O(N log N) in the number of entries rather than pairwise.
+        """
+        for entry_id, day, room_id, class_type, is_course_room in self.schedule_repo.iter_room_mismatches():
+            if is_course_room is None:
+                detail = "Room not found."
+            elif is_course_room:
+                detail = "Labs and seminars must be in lab rooms."
+            else:
+                detail = "Courses must be held in course rooms."
+            yield ("room_type", day, ROOM, room_id, entry_id, None, detail)
+
+        year_groups = {}
+        for group_id, year_id in self.student_group_repo.get_year_ids().items():
+            year_groups.setdefault(year_id, []).append(group_id)
+        timelines = {}
+        for entry_id, day, start, end, room_id, teacher_id, group_id, year_id in self.schedule_repo.get_slot_rows():
+            for key, interval in entry_intervals(entry_id, day, start, end, room_id, teacher_id,
+                                                 group_id, year_id, year_groups):
+                timelines.setdefault(key, []).append(interval)
+        for clash, (kind, resource_id, day), first, second in sweep_conflicts(timelines):
+            yield (f"{clash}_clash", day, kind, resource_id, first, second, CLASH_DETAILS[clash])
+
+    def audit_report(self, export_format: str = "ndjson", batch_size: int = 1000):
+        """``audit_schedule`` rendered as NDJSON or CSV chunks of ``batch_size`` issues."""
+        return self.render_chunks(batched(self.audit_schedule(), batch_size), export_format, AUDIT_COLUMNS)
+
     def create_teacher(self, teacher_data: TeacherCreate):
         assert teacher_data is not None, "Teacher data must be provided"
         assert isinstance(teacher_data.name, str), "Teacher name must be a string"
         assert teacher_data.name.strip() != "", "Teacher name cannot be empty"
 
         teacher = self.teacher_repo.add(name=teacher_data.name)
+        get_reference_cache(self.db.get_bind()).invalidate("teachers")
 
         assert teacher.id is not None, "Teacher must have an ID after creation"
         assert teacher.name == teacher_data.name, "Teacher name mismatch"
@@ -108,34 +255,39 @@ class TimetableService:
         return teacher
 
     
-    def list_teachers(self):
-        teachers = self.teacher_repo.get_all()
+    def list_teachers(self, after_id: int | None = None, limit: int | None = None):
+        teachers = self.teacher_repo.get_page(after_id=after_id, limit=limit)
         assert isinstance(teachers, list), "Teachers must be a list"
-        assert all(t.name for t in teachers), "Each teacher must have a name"
+        if check_contracts():
+            assert all(t.name for t in teachers), "Each teacher must have a name"
         return teachers
 
-    def list_groups(self):
-        groups = self.student_group_repo.get_all()
+    def list_groups(self, after_id: int | None = None, limit: int | None = None):
+        groups = self.student_group_repo.get_page(after_id=after_id, limit=limit)
         assert isinstance(groups, list), "Groups must be a list"
-        assert all(g.letter for g in groups), "Each group must have a letter"
+        if check_contracts():
+            assert all(g.letter for g in groups), "Each group must have a letter"
         return groups
 
-    def list_years(self):
-        years = self.year_repo.get_all()
+    def list_years(self, after_id: int | None = None, limit: int | None = None):
+        years = self.year_repo.get_page(after_id=after_id, limit=limit)
         assert isinstance(years, list), "Years must be a list"
-        assert all(y.year >= 1 for y in years), "Invalid student year value"
+        if check_contracts():
+            assert all(y.year >= 1 for y in years), "Invalid student year value"
         return years
 
-    def list_rooms(self):
-        rooms = self.room_repo.get_all()
+    def list_rooms(self, after_id: int | None = None, limit: int | None = None):
+        rooms = self.room_repo.get_page(after_id=after_id, limit=limit)
         assert isinstance(rooms, list), "Rooms must be a list"
-        assert all(isinstance(r.is_course_room, bool) for r in rooms), "Room type must be boolean"
+        if check_contracts():
+            assert all(isinstance(r.is_course_room, bool) for r in rooms), "Room type must be boolean"
         return rooms
 
-    def list_subjects(self):
-        subjects = self.subject_repo.get_all()
+    def list_subjects(self, after_id: int | None = None, limit: int | None = None):
+        subjects = self.subject_repo.get_page(after_id=after_id, limit=limit)
         assert isinstance(subjects, list), "Subjects must be a list"
-        assert all(s.name for s in subjects), "Each subject must have a name"
+        if check_contracts():
+            assert all(s.name for s in subjects), "Each subject must have a name"
         return subjects
 
     def list_schedule_entries_by_group(self, group_name: str):
@@ -147,16 +299,248 @@ class TimetableService:
             raise HTTPException(status_code=404, detail="Group not found.")
 
         results = self.schedule_repo.get_by_group_id(group.id)
-        assert all(e.student_group_id == group.id for e in results), "Mismatched group entries returned"
+        if check_contracts():
+            assert all(e.student_group_id == group.id for e in results), "Mismatched group entries returned"
         return results
 
+    def get_group_timetable(self, year: int, letter: str, expand: bool = False):
+        entries = self.schedule_repo.get_group_timetable(year, letter, expand)
+        if entries is None:
+            raise HTTPException(status_code=404, detail="Group not found.")
+        return sort_by_slot(entries)
+
+    def bulk_create_schedule_entries(self, rows: list, all_or_nothing: bool = False) -> dict:
+        """Validate a batch against the schedule and itself in one pass, then insert it with one commit.
+
+        ``rows`` holds raw dicts (or parse errors as ``Exception`` instances). Invalid rows are
+        reported by index; with ``all_or_nothing`` a single invalid row rejects the whole batch.
+        """
+        assert isinstance(rows, list), "rows must be a list"
+        rooms = self.room_repo.get_room_types()
+        occupancy = self.occupancy  # taken before the write, whose version bump it then counts
+        # Rows are checked against a private copy: until they commit, other readers of the map must not see them
+        batch = occupancy.copy()
+        valid, errors = [], []
+
+        for index, row in enumerate(rows):
+            if isinstance(row, Exception):
+                errors.append({"index": index, "detail": str(row)})
+                continue
+            if not isinstance(row, dict):
+                errors.append({"index": index, "detail": "Each entry must be a JSON object."})
+                continue
+            try:
+                entry = ScheduleEntryCreate(**row)
+            except ValidationError as e:
+                errors.append({"index": index, "detail": "; ".join(err["msg"] for err in e.errors())})
+                continue
+            # Accepted rows go into the copy too, so this also catches clashes inside the batch
+            detail = self._entry_rule_violation(entry, rooms) or self._conflict_detail(batch, entry)
+            if detail is not None:
+                errors.append({"index": index, "detail": detail})
+                continue
+            batch.add(-index - 1, entry.day_of_week, entry.start_hour, entry.end_hour,
+                      room_id=entry.room_id, teacher_id=entry.teacher_id, student_group_id=entry.student_group_id)
+            valid.append(entry_fields(entry))
+
+        if errors and all_or_nothing:
+            valid = []
+        try:
+            ids = self.schedule_repo.add_many(valid)
+        except IntegrityError:
+            # Another writer took one of the slots after the batch was checked
+            raise HTTPException(status_code=409, detail="The schedule changed during the import; retry it.")
+
+        if ids:
+            for schedule_id, fields in zip(ids, valid):
+                occupancy.add(schedule_id, fields["day_of_week"], fields["start_hour"], fields["end_hour"],
+                              room_id=fields["room_id"], teacher_id=fields["teacher_id"],
+                              student_group_id=fields["student_group_id"])
+            occupancy.advance("schedule")
+
+        assert len(ids) == len(valid), "Bulk insert postcondition failed"
+        return {"created": len(ids), "ids": ids, "errors": errors}
+
+    def validate_schedule_changes(self, add: list[ScheduleEntryCreate], delete: list[int]) -> dict:
+        """Dry run of a change set: every rule violation and clash it would cause, nothing is written.
+
+        Existing entries (minus ``delete``) and the proposed ones are bucketed per
+        resource and day and swept once, instead of probing the schedule per entry.
+        """
+        assert isinstance(add, list) and isinstance(delete, list), "add and delete must be lists"  #  Precondition
+        rooms = self.room_repo.get_room_types()
+        year_groups = {}
+        for group_id, year_id in self.student_group_repo.get_year_ids().items():
+            year_groups.setdefault(year_id, []).append(group_id)
+        rows = self.schedule_repo.get_slot_rows()
+
+        existing = {row[0] for row in rows}
+        removed = set(delete)
+        errors = [{"delete_id": entry_id, "detail": "Schedule entry not found."}
+                  for entry_id in dict.fromkeys(delete) if entry_id not in existing]
+
+        timelines = {}
+        for index, entry in enumerate(add):
+            detail = self._entry_rule_violation(entry, rooms)
+            if detail is not None:
+                errors.append({"index": index, "detail": detail})
+                continue
+            for key, interval in entry_intervals((True, index), entry.day_of_week, entry.start_hour, entry.end_hour,
+                                                 entry.room_id, entry.teacher_id, entry.student_group_id):
+                timelines.setdefault(key, []).append(interval)
+        # Only timelines a proposed entry touches can hold a new clash
+        for entry_id, day, start, end, room_id, teacher_id, group_id, year_id in rows:
+            if entry_id in removed:
+                continue
+            for key, interval in entry_intervals((False, entry_id), day, start, end, room_id, teacher_id,
+                                                 group_id, year_id, year_groups):
+                if key in timelines:
+                    timelines[key].append(interval)
+
+        for clash, _, (first_new, a), (second_new, b) in sweep_conflicts(timelines):
+            if first_new and second_new:
+                errors.append({"index": max(a, b), "detail": CLASH_DETAILS[clash], "clashes_with_index": min(a, b)})
+            elif first_new or second_new:
+                index, entry_id = (a, b) if first_new else (b, a)
+                errors.append({"index": index, "detail": CLASH_DETAILS[clash], "clashes_with_id": entry_id})
+
+        errors.sort(key=lambda e: (e.get("index", -1), e.get("delete_id", 0)))
+        return {"valid": not errors, "errors": errors}
+
+    def _entry_rule_violation(self, entry: ScheduleEntryCreate, rooms: dict[int, bool]) -> str | None:
+        """Same rules as create_schedule_entry, reported as a message instead of raised."""
+        if any(val is None for val in [entry.day_of_week, entry.start_hour, entry.end_hour, entry.room_id,
+                                       entry.teacher_id, entry.subject_id, entry.class_type,
+                                       entry.student_group_id]):
+            return "All fields are required."
+        if entry.class_type not in ["Course", "Seminar", "Laboratory"]:
+            return "Invalid class type."
+        if entry.day_of_week not in DAYS:
+            return "Classes can only be scheduled Monday to Friday."
+        if entry.end_hour <= entry.start_hour:
+            return "End hour must be after start hour."
+        if entry.start_hour < 8 or entry.end_hour > 20:
+            return "Classes must be scheduled between 8 and 20."
+        if entry.end_hour - entry.start_hour != 2:
+            return "Classes must be 2 hours long."
+        if entry.room_id not in rooms:
+            return "Room not found."
+        if entry.class_type == "Course" and not rooms[entry.room_id]:
+            return "Courses must be held in course rooms."
+        if entry.class_type in ["Laboratory", "Seminar"] and rooms[entry.room_id]:
+            return "Labs and seminars must be in lab rooms."
+        return None
+
+    def _conflict_detail(self, occupancy, entry: ScheduleEntryCreate) -> str | None:
+        clash = occupancy.find_conflict(
+            entry.day_of_week,
+            entry.start_hour,
+            entry.end_hour,
+            room_id=entry.room_id,
+            teacher_id=entry.teacher_id,
+            student_group_id=entry.student_group_id,
+        )
+        return CLASH_DETAILS.get(clash)
+
+    def generate_timetable(self, request: TimetableGenerateRequest) -> dict:
+        assert request is not None, "Generate request must be provided"
+        assert request.max_backtracks >= 0, "max_backtracks must not be negative"
+        if request.seminar_class_type not in ["Seminar", "Laboratory"]:
+            raise HTTPException(status_code=400, detail="seminar_class_type must be Seminar or Laboratory.")
+        if request.time_budget is not None and request.time_budget <= 0:
+            raise HTTPException(status_code=400, detail="time_budget must be positive.")
+        if request.workers is not None and request.workers < 1:
+            raise HTTPException(status_code=400, detail="workers must be at least 1.")
+
+        problem = self._build_problem(request)
+        if request.time_budget is not None:
+            solution = solve_multistart(
+                problem,
+                workers=min(request.workers or MAX_WORKERS, MAX_WORKERS),
+                time_budget=min(request.time_budget, MAX_TIME_BUDGET),
+                seed=request.seed,
+                max_backtracks=request.max_backtracks,
+            )
+        else:
+            solution = solve_timetable(problem, seed=request.seed, max_backtracks=request.max_backtracks)
+        if request.persist and solution.entries:
+            self._persist_generated(problem, solution.entries)
+
+        assert len(solution.entries) + len(solution.unplaced) == len(problem.sessions), "Sessions lost by the solver"
+        return {
+            "entries": solution.entries,
+            "unplaced": solution.unplaced,
+            "penalty": solution.penalty,
+            "backtracks": solution.backtracks,
+            "restarts": solution.restarts,
+            "elapsed_ms": round(solution.elapsed * 1000, 3),
+            "persisted": bool(request.persist and solution.entries),
+        }
+
+    def _build_problem(self, request: TimetableGenerateRequest) -> TimetableProblem:
+        subjects = self.subject_repo.get_all_with_teachers()
+        rooms = self.room_repo.get_all()
+        groups = self.student_group_repo.get_all()
+        if request.subject_ids is not None:
+            wanted = set(request.subject_ids)
+            subjects = [s for s in subjects if s.id in wanted]
+        if request.room_ids is not None:
+            wanted = set(request.room_ids)
+            rooms = [r for r in rooms if r.id in wanted]
+        if request.student_group_ids is not None:
+            wanted = set(request.student_group_ids)
+            groups = [g for g in groups if g.id in wanted]
+        if not subjects or not rooms:
+            raise HTTPException(status_code=400, detail="At least one subject and one room are required.")
+
+        # Generated classes are fitted around whatever is already scheduled
+        return TimetableProblem(
+            subjects=[
+                {
+                    "id": s.id,
+                    "student_year_id": s.student_year_id,
+                    "course_teacher_id": s.course_teacher_id,
+                    "seminar_lab_teacher_ids": [t.id for t in s.seminar_lab_teachers],
+                }
+                for s in subjects
+            ],
+            rooms=[(r.id, r.is_course_room) for r in rooms],
+            groups=[(g.id, g.student_year_id) for g in groups],
+            busy=self.occupancy.snapshot(),
+            seminar_class_type=request.seminar_class_type,
+        )
+
+    def _persist_generated(self, problem: TimetableProblem, entries: list[dict]):
+        try:
+            ids = self.schedule_repo.add_many([dict(entry) for entry in entries])
+        except IntegrityError:
+            # Another writer took one of the slots after the solver's snapshot; add_many rolled back
+            raise HTTPException(status_code=409, detail="The schedule changed during generation; retry it.")
+        years = {session.subject_id: session.year_id for session in problem.sessions}
+        for schedule_id, entry in zip(ids, entries):
+            self.occupancy.add(
+                schedule_id,
+                entry["day_of_week"],
+                entry["start_hour"],
+                entry["end_hour"],
+                room_id=entry["room_id"],
+                teacher_id=entry["teacher_id"],
+                student_group_id=entry["student_group_id"],
+                year_id=years[entry["subject_id"]],
+            )
+        if ids:
+            self.occupancy.advance("schedule")
+
     def delete_schedule_entry(self, schedule_id: int) -> bool:
         assert isinstance(schedule_id, int), "Schedule ID must be an integer"
         assert schedule_id > 0, "Schedule ID must be positive"
 
+        occupancy = self.occupancy  # taken before the write, whose version bump it then counts
         success = self.schedule_repo.delete(schedule_id)
         if not success:
             raise HTTPException(status_code=404, detail="Schedule entry not found.")
+        occupancy.remove(schedule_id)
+        occupancy.advance("schedule")
         return True
 
     
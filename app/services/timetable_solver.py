@@ -0,0 +1,496 @@
+import heapq
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.services.occupancy_service import DAYS, FIRST_HOUR, SLOTS_PER_DAY, WEEK_MASK, window_starts
+
+CLASS_LENGTH = 2  # every class is exactly two hours
+START_MASK = window_starts(0, CLASS_LENGTH)  # start slots whose window fits in the day
+
+
+def _starts(busy: int) -> int:
+    free = ~busy & WEEK_MASK
+    return free & (free >> 1) & START_MASK
+
+
+def _window(bit: int) -> int:
+    return 0b11 << bit
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+class Session:
+    """One class to place: a year-wide course or a seminar/lab of one group."""
+
+    __slots__ = ("index", "subject_id", "class_type", "year_id", "group_id", "teacher_ids", "course_room")
+
+    def __init__(self, index, subject_id, class_type, year_id, group_id, teacher_ids, course_room):
+        self.index = index
+        self.subject_id = subject_id
+        self.class_type = class_type
+        self.year_id = year_id
+        self.group_id = group_id
+        self.teacher_ids = tuple(teacher_ids)
+        self.course_room = course_room
+
+
+class TimetableProblem:
+    """Plain-data description of a timetabling instance (picklable, ORM free).
+
+    ``subjects`` are dicts with ``id``, ``student_year_id``, ``course_teacher_id`` and
+    ``seminar_lab_teacher_ids``; ``rooms`` are ``(room_id, is_course_room)`` pairs;
+    ``groups`` are ``(group_id, student_year_id)`` pairs. ``busy`` optionally holds
+    slots already taken per resource, keyed like ``("room", 3)``.
+    """
+
+    def __init__(self, subjects, rooms, groups, busy=None, seminar_class_type="Seminar"):
+        assert seminar_class_type in ["Seminar", "Laboratory"], "Invalid seminar class type"  #  Precondition
+        self.rooms = list(rooms)
+        self.groups = list(groups)
+        self.busy = dict(busy or {})
+        self.sessions = []
+        groups_by_year = {}
+        for group_id, year_id in self.groups:
+            groups_by_year.setdefault(year_id, []).append(group_id)
+        self.groups_by_year = groups_by_year
+
+        for subject in subjects:
+            year_id = subject["student_year_id"]
+            self._add_session(subject["id"], "Course", year_id, None, [subject["course_teacher_id"]], True)
+            teachers = subject.get("seminar_lab_teacher_ids") or [subject["course_teacher_id"]]
+            for group_id in groups_by_year.get(year_id, []):
+                self._add_session(subject["id"], seminar_class_type, year_id, group_id, teachers, False)
+
+    def _add_session(self, subject_id, class_type, year_id, group_id, teacher_ids, course_room):
+        self.sessions.append(
+            Session(len(self.sessions), subject_id, class_type, year_id, group_id, teacher_ids, course_room)
+        )
+
+
+class TimetableSolution:
+    def __init__(self, entries, unplaced, penalty, backtracks, elapsed, aborted=False, restarts=1):
+        self.entries = entries
+        self.unplaced = unplaced
+        self.penalty = penalty
+        self.backtracks = backtracks
+        self.elapsed = elapsed
+        self.aborted = aborted
+        self.restarts = restarts
+
+    @property
+    def score(self) -> tuple[int, int]:
+        """Lower is better: unplaced sessions first, then idle hours between classes."""
+        return (len(self.unplaced), self.penalty)
+
+
+class TimetableSolver:
+    """Backtracking search with MRV ordering and forward checking.
+
+    Sessions are picked most-constrained-first (fewest feasible start slots,
+    kept in a lazily refreshed heap). After each assignment the feasible-slot
+    count of every session sharing a teacher, group or year is recomputed and a
+    value that wipes out any of them is rejected. Rooms of the same type are
+    interchangeable, so a value is a ``(start, teacher)`` pair and the room is
+    picked first-fit. Once ``max_backtracks`` is spent (or the ``time.time()``
+    ``deadline`` passes) the search stops undoing work and leaves sessions
+    without a feasible value unplaced instead. A run whose unplaced count
+    exceeds ``max_unplaced`` is abandoned early and flagged ``aborted``.
+    """
+
+    def __init__(self, problem: TimetableProblem, seed: int | None = None, max_backtracks: int = 1000,
+                 deadline: float | None = None, max_unplaced: int | None = None):
+        assert problem is not None, "problem must not be None"  #  Precondition
+        self.problem = problem
+        self.random = random.Random(seed)
+        self.max_backtracks = max_backtracks
+        self.deadline = deadline
+        self.max_unplaced = max_unplaced
+
+    def solve(self) -> TimetableSolution:
+        started = time.perf_counter()
+        problem = self.problem
+        sessions = problem.sessions
+        busy = problem.busy
+
+        self.teacher_busy = {}
+        self.group_busy = {}
+        self.year_busy = {}
+        self.year_groups = {}  # OR of all group masks of a year
+        self.room_busy = {}
+        rooms_by_type = {True: [], False: []}
+        for room_id, is_course_room in problem.rooms:
+            rooms_by_type[bool(is_course_room)].append(room_id)
+            self.room_busy[room_id] = busy.get(("room", room_id), 0)
+        for rooms in rooms_by_type.values():
+            self.random.shuffle(rooms)
+        self.rooms_by_type = rooms_by_type
+        self.room_starts = {kind: self._room_starts(kind) for kind in rooms_by_type}
+        for session in sessions:
+            for teacher_id in session.teacher_ids:
+                self.teacher_busy.setdefault(teacher_id, busy.get(("teacher", teacher_id), 0))
+            self.year_busy.setdefault(session.year_id, busy.get(("year", session.year_id), 0))
+        for group_id, year_id in problem.groups:
+            self.group_busy[group_id] = busy.get(("group", group_id), 0)
+            self.year_groups[year_id] = self.year_groups.get(year_id, 0) | self.group_busy[group_id]
+            self.year_busy.setdefault(year_id, busy.get(("year", year_id), 0))
+        self.teacher_load = {teacher_id: 0 for teacher_id in self.teacher_busy}
+        # _starts(a | b) == _starts(a) & _starts(b), so the start slots where some teacher of a
+        # session's candidate pool is free can be cached per pool and refreshed per assignment
+        self.teacher_starts = {t: _starts(mask) for t, mask in self.teacher_busy.items()}
+        self.teacher_pools = {t: set() for t in self.teacher_busy}
+        for session in sessions:
+            for teacher_id in session.teacher_ids:
+                self.teacher_pools[teacher_id].add(session.teacher_ids)
+        self.pool_starts = {}
+        for pools in self.teacher_pools.values():
+            for pool in pools:
+                self.pool_starts[pool] = self._pool_starts(pool)
+        self.day_load = {}
+
+        self.neighbours = self._build_neighbours(sessions)
+        self.assignment = {}
+        self.trail = []
+        self.size = {}
+        self.stamp = {}
+        self.heap = []
+        self.tiebreak = {s.index: self.random.random() for s in sessions}
+        for session in sessions:
+            self._push(session)
+
+        unplaced = []
+        backtracks = 0
+        aborted = False
+        stack = []
+        while True:
+            if self.max_unplaced is not None and len(unplaced) > self.max_unplaced:
+                # Already worse than a known solution: count the rest as unplaced and stop
+                aborted = True
+                unplaced.extend(s for s in sessions if s.index not in self.assignment and self.size[s.index] >= 0)
+                break
+            session = self._select()
+            if session is None:
+                break
+            stack.append([session, *self._values(session), 0, None])
+            while stack:
+                frame = stack[-1]
+                if self._try_next(frame):
+                    break
+                stack.pop()
+                out_of_time = self.deadline is not None and time.time() > self.deadline
+                if backtracks >= self.max_backtracks or out_of_time or not stack:
+                    # Give up on this session, keep everything placed so far
+                    unplaced.append(frame[0])
+                    self.size[frame[0].index] = -1
+                    stack = []
+                    break
+                backtracks += 1
+                self._unassign(stack[-1])
+                self._push(frame[0])
+
+        entries = [self._entry(sessions[index], value) for index, value in sorted(self.assignment.items())]
+        return TimetableSolution(
+            entries=entries,
+            unplaced=[self._unplaced(s) for s in unplaced],
+            penalty=self._penalty(),
+            backtracks=backtracks,
+            elapsed=time.perf_counter() - started,
+            aborted=aborted,
+        )
+
+    # --- bookkeeping -------------------------------------------------------
+
+    def _build_neighbours(self, sessions):
+        by_teacher, by_group, by_year = {}, {}, {}
+        for session in sessions:
+            for teacher_id in session.teacher_ids:
+                by_teacher.setdefault(teacher_id, []).append(session.index)
+            if session.group_id is None:
+                by_year.setdefault(session.year_id, []).append(session.index)
+            else:
+                by_group.setdefault(session.group_id, []).append(session.index)
+        neighbours = []
+        for session in sessions:
+            related = set()
+            for teacher_id in session.teacher_ids:
+                related.update(by_teacher[teacher_id])
+            # Courses clash with every group of their year and vice versa
+            related.update(by_year.get(session.year_id, ()))
+            if session.group_id is None:
+                for group_id in self.problem.groups_by_year.get(session.year_id, ()):
+                    related.update(by_group.get(group_id, ()))
+            else:
+                related.update(by_group[session.group_id])
+            related.discard(session.index)
+            neighbours.append(tuple(related))
+        return neighbours
+
+    def _room_starts(self, course_room: bool) -> int:
+        starts = 0
+        for room_id in self.rooms_by_type[course_room]:
+            starts |= _starts(self.room_busy[room_id])
+        return starts
+
+    def _pool_starts(self, pool) -> int:
+        starts = 0
+        for teacher_id in pool:
+            starts |= self.teacher_starts[teacher_id]
+        return starts
+
+    def _blocked(self, session) -> int:
+        if session.group_id is None:
+            return self.year_busy[session.year_id] | self.year_groups.get(session.year_id, 0)
+        return self.group_busy[session.group_id] | self.year_busy[session.year_id]
+
+    def _feasible(self, session) -> int:
+        return _starts(self._blocked(session)) & self.pool_starts[session.teacher_ids] & self.room_starts[session.course_room]
+
+    def _push(self, session, feasible: int | None = None):
+        if feasible is None:
+            feasible = self._feasible(session)
+        size = _popcount(feasible)
+        self.size[session.index] = size
+        stamp = self.stamp.get(session.index, 0) + 1
+        self.stamp[session.index] = stamp
+        heapq.heappush(self.heap, (size, -len(self.neighbours[session.index]),
+                                   self.tiebreak[session.index], stamp, session.index))
+
+    def _select(self):
+        sessions = self.problem.sessions
+        while self.heap:
+            size, _, _, stamp, index = heapq.heappop(self.heap)
+            if index in self.assignment or self.size[index] < 0 or stamp != self.stamp[index]:
+                continue
+            actual = _popcount(self._feasible(sessions[index]))
+            if actual != size:
+                # Room availability changed since the entry was pushed
+                self._push(sessions[index])
+                continue
+            return sessions[index]
+        return None
+
+    def _values(self, session):
+        feasible = self._feasible(session)
+        days = self.day_load
+        key = session.group_id if session.group_id is not None else ("year", session.year_id)
+        starts = []
+        while feasible:
+            low = feasible & -feasible
+            bit = low.bit_length() - 1
+            feasible ^= low
+            day_index = bit // SLOTS_PER_DAY
+            slot = bit % SLOTS_PER_DAY
+            # Spread a group's classes over the week, keep rooms on the 8-10, 10-12, ... grid
+            # so they do not fragment, then prefer earlier hours
+            starts.append((days.get((key, day_index), 0), slot % 2, slot, self.random.random(), bit))
+        starts.sort()
+        teachers = sorted(session.teacher_ids, key=lambda t: (self.teacher_load[t], self.random.random()))
+        # Values are (start, teacher) pairs enumerated start-major: position // len(teachers)
+        return [start[-1] for start in starts], teachers
+
+    def _free_room(self, session, window: int):
+        for room_id in self.rooms_by_type[session.course_room]:
+            if not self.room_busy[room_id] & window:
+                return room_id
+        return None
+
+    def _try_next(self, frame) -> bool:
+        session, starts, teachers, position, _ = frame
+        sessions = self.problem.sessions
+        while position < len(starts) * len(teachers):
+            bit = starts[position // len(teachers)]
+            teacher_id = teachers[position % len(teachers)]
+            position += 1
+            window = _window(bit)
+            if (self._blocked(session) | self.teacher_busy[teacher_id]) & window:
+                continue
+            room_id = self._free_room(session, window)
+            if room_id is None:
+                continue
+            mark = len(self.trail)
+            self._assign(session, bit, teacher_id, room_id)
+            frame[4] = mark
+            # Forward checking: every open neighbour must keep at least one start slot
+            remaining = []
+            for index in self.neighbours[session.index]:
+                if index in self.assignment or self.size[index] < 0:
+                    continue
+                feasible = self._feasible(sessions[index])
+                if not feasible:
+                    break
+                if _popcount(feasible) != self.size[index]:
+                    remaining.append((sessions[index], feasible))
+            else:
+                frame[3] = position
+                for neighbour, feasible in remaining:
+                    self._push(neighbour, feasible)
+                return True
+            self._unassign(frame)
+        frame[3] = position
+        return False
+
+    def _set(self, table, key, value):
+        self.trail.append((table, key, table[key]))
+        table[key] = value
+
+    def _assign(self, session, bit, teacher_id, room_id):
+        window = _window(bit)
+        self._set(self.teacher_busy, teacher_id, self.teacher_busy[teacher_id] | window)
+        self._set(self.teacher_starts, teacher_id, _starts(self.teacher_busy[teacher_id]))
+        for pool in self.teacher_pools[teacher_id]:
+            self._set(self.pool_starts, pool, self._pool_starts(pool))
+        self._set(self.teacher_load, teacher_id, self.teacher_load[teacher_id] + 1)
+        self._set(self.room_busy, room_id, self.room_busy[room_id] | window)
+        self._set(self.room_starts, session.course_room, self._room_starts(session.course_room))
+        if session.group_id is None:
+            key = ("year", session.year_id)
+            self._set(self.year_busy, session.year_id, self.year_busy[session.year_id] | window)
+        else:
+            key = session.group_id
+            self._set(self.group_busy, session.group_id, self.group_busy[session.group_id] | window)
+            self._set(self.year_groups, session.year_id, self.year_groups.get(session.year_id, 0) | window)
+        day = (key, bit // SLOTS_PER_DAY)
+        self.day_load.setdefault(day, 0)
+        self._set(self.day_load, day, self.day_load[day] + 1)
+        self.assignment[session.index] = (bit, teacher_id, room_id)
+
+    def _unassign(self, frame):
+        session, mark = frame[0], frame[4]
+        while len(self.trail) > mark:
+            table, key, value = self.trail.pop()
+            table[key] = value
+        del self.assignment[session.index]
+        sessions = self.problem.sessions
+        for index in self.neighbours[session.index]:
+            if index not in self.assignment and self.size[index] >= 0:
+                feasible = self._feasible(sessions[index])
+                if _popcount(feasible) != self.size[index]:
+                    self._push(sessions[index], feasible)
+
+    # --- results -----------------------------------------------------------
+
+    def _entry(self, session, value) -> dict:
+        bit, teacher_id, room_id = value
+        day_index, slot = divmod(bit, SLOTS_PER_DAY)
+        return {
+            "day_of_week": DAYS[day_index],
+            "start_hour": FIRST_HOUR + slot,
+            "end_hour": FIRST_HOUR + slot + CLASS_LENGTH,
+            "subject_id": session.subject_id,
+            "room_id": room_id,
+            "teacher_id": teacher_id,
+            "class_type": session.class_type,
+            "student_group_id": session.group_id,
+        }
+
+    def _unplaced(self, session) -> dict:
+        return {
+            "subject_id": session.subject_id,
+            "class_type": session.class_type,
+            "student_year_id": session.year_id,
+            "student_group_id": session.group_id,
+        }
+
+    def _penalty(self) -> int:
+        """Idle hours between the first and last class of each group per day."""
+        days = {}
+        groups_by_year = self.problem.groups_by_year
+        for index, (bit, _, _) in self.assignment.items():
+            session = self.problem.sessions[index]
+            # Year-wide courses count for every group of the year
+            targets = groups_by_year.get(session.year_id, ()) if session.group_id is None else (session.group_id,)
+            for group_id in targets:
+                key = (group_id, bit // SLOTS_PER_DAY)
+                days[key] = days.get(key, 0) | _window(bit)
+        penalty = 0
+        for mask in days.values():
+            lowest = (mask & -mask).bit_length() - 1
+            penalty += mask.bit_length() - lowest - _popcount(mask)
+        return penalty
+
+
+def solve_timetable(problem: TimetableProblem, seed: int | None = None, max_backtracks: int = 1000,
+                    deadline: float | None = None, max_unplaced: int | None = None) -> TimetableSolution:
+    return TimetableSolver(problem, seed=seed, max_backtracks=max_backtracks, deadline=deadline,
+                           max_unplaced=max_unplaced).solve()
+
+
+# --- parallel multi-start --------------------------------------------------
+
+_SCORE_SCALE = 1_000_000  # packs (unplaced, penalty) into one comparable integer
+_shared_best = None
+
+
+def _pack(score: tuple[int, int]) -> int:
+    unplaced, penalty = score
+    return unplaced * _SCORE_SCALE + min(penalty, _SCORE_SCALE - 1)
+
+
+def _init_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _restart_worker(problem: TimetableProblem, seed: int, stride: int, deadline: float,
+                    max_backtracks: int) -> TimetableSolution | None:
+    """Run randomized restarts until the deadline, pruning with the pool-wide best score."""
+    best = None
+    restarts = 0
+    while True:
+        shared = _shared_best.value
+        if shared == 0:
+            break  # someone found a perfect timetable
+        solution = solve_timetable(
+            problem,
+            seed=seed + restarts * stride,
+            max_backtracks=max_backtracks,
+            deadline=deadline,
+            max_unplaced=shared // _SCORE_SCALE,
+        )
+        restarts += 1
+        if not solution.aborted and (best is None or solution.score < best.score):
+            best = solution
+            packed = _pack(solution.score)
+            with _shared_best.get_lock():
+                if packed < _shared_best.value:
+                    _shared_best.value = packed
+        if time.time() >= deadline:
+            break
+    if best is not None:
+        best.restarts = restarts
+    return best
+
+
+def solve_multistart(problem: TimetableProblem, workers: int, time_budget: float, seed: int | None = None,
+                     max_backtracks: int = 1000) -> TimetableSolution:
+    """Best of many randomized solver restarts run in a process pool within ``time_budget`` seconds.
+
+    Each worker process runs its own restart loop, so the problem is pickled once per
+    worker and the only shared state is the best packed score, which lets workers
+    stop runs that are already worse and stop entirely once a perfect score is found.
+    """
+    assert workers >= 1, "workers must be at least 1"  #  Precondition
+    assert time_budget > 0, "time_budget must be positive"  #  Precondition
+    started = time.perf_counter()
+    deadline = time.time() + time_budget
+    seed = random.randrange(1 << 30) if seed is None else seed
+    # spawn: forking a threaded server process is not safe
+    context = multiprocessing.get_context("spawn")
+    shared_best = context.Value("q", _pack((len(problem.sessions) + 1, 0)))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(shared_best,)) as pool:
+        futures = [
+            pool.submit(_restart_worker, problem, seed + worker, workers, deadline, max_backtracks)
+            for worker in range(workers)
+        ]
+        results = [future.result() for future in futures]
+
+    solutions = [solution for solution in results if solution is not None]
+    assert solutions, "No worker produced a timetable"  #  Postcondition
+    best = min(solutions, key=lambda solution: solution.score)
+    best.restarts = sum(solution.restarts for solution in solutions)
+    best.elapsed = time.perf_counter() - started
+    return best
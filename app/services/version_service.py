@@ -0,0 +1,58 @@
+import os
+import time
+from email.utils import formatdate
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.collection_version import VERSIONED_COLLECTIONS
+from app.repository.versions import versions_query
+
+# Counters live in the database, so a write is visible to every worker once it commits.
+# ETags can also roll over every ETAG_WINDOW seconds, a safety net for rows changed by
+# SQL that bypasses the repositories; 0 (the default) disables it
+ETAG_WINDOW = float(os.getenv("ETAG_WINDOW", "0"))
+
+
+class CollectionVersions:
+    """Per-collection write counters, as read in one query, used as validators for conditional GETs.
+
+    A collection without a counter row reads as version 0, last modified at the epoch.
+    """
+
+    def __init__(self, rows, window: float = ETAG_WINDOW, clock=time.time):
+        assert window >= 0, "window must not be negative"  #  Precondition
+        self.window = window
+        self._clock = clock
+        self._versions = {collection: (version, modified_at) for collection, version, modified_at in rows}
+        assert all(c in VERSIONED_COLLECTIONS for c in self._versions), "Unknown collection"  #  Postcondition
+
+    def version(self, collection: str) -> int:
+        return self._versions.get(collection, (0, 0.0))[0]
+
+    def headers(self, *collections: str) -> dict[str, str]:
+        """``ETag`` and ``Last-Modified`` for a response built from ``collections``."""
+        assert collections and all(c in VERSIONED_COLLECTIONS for c in collections), "Unknown collection"  #  Precondition
+        parts = [str(self.version(c)) for c in collections]
+        modified = max(self._versions.get(c, (0, 0.0))[1] for c in collections)
+        if self.window:
+            parts.append(str(int(self._clock() // self.window)))
+        return {"ETag": f'W/"{"-".join(parts)}"', "Last-Modified": formatdate(modified, usegmt=True)}
+
+
+def read_versions(db: Session, *collections: str) -> CollectionVersions:
+    return CollectionVersions(db.execute(versions_query(*collections)).all())
+
+
+async def read_async_versions(db: AsyncSession, *collections: str) -> CollectionVersions:
+    return CollectionVersions((await db.execute(versions_query(*collections))).all())
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag`` (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
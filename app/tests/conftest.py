@@ -0,0 +1,39 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+# The suite always runs every contract check, whatever CONTRACTS the shell exports
+os.environ["CONTRACTS"] = "full"
+
+@pytest.fixture
+def migrated_db(tmp_path):
+    """Point the app's sessions at a fresh SQLite file migrated as ``python -m app.cli migrate`` would."""
+    from app.core.database import get_async_db, get_db, make_async_engine, make_engine
+    from app.core.migrations import migrate as apply_migrations
+    from app.main import app
+
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    engine = make_engine(url)
+    apply_migrations(engine)
+    async_engine = make_async_engine(url)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def get_test_db():
+        with Session() as db:
+            yield db
+
+    async def get_test_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    yield engine
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_db, None)
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
@@ -1,8 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.api.v1.timetable import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.main import app
+from app.models.room import Room
+from app.models.student_group import StudentGroup
+from app.models.student_year import StudentYear
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
 
 client = TestClient(app)
+# Every test runs against its own freshly migrated database
+pytestmark = pytest.mark.usefixtures("migrated_db")
 
 def test_create_teacher_already_existing():
     response = client.post("/api/v1/timetable/teachers/", json={"name": "Test Teacher"})
@@ -14,6 +24,31 @@ def test_get_teachers():
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_list_schedule_defaults_to_one_page(migrated_db):
+    count = DEFAULT_PAGE_SIZE + 1
+    with Session(migrated_db) as db:
+        year = StudentYear(year=1)
+        db.add(year)
+        db.flush()
+        db.add_all([Teacher(name=f"T{i}") for i in range(count)] +
+                   [Room(name=f"R{i}", is_course_room=False) for i in range(count)] +
+                   [StudentGroup(student_year_id=year.id, letter=f"{chr(65 + i // 10)}{i % 10}") for i in range(count)])
+        db.add(Subject(name="S", course_teacher_id=1, student_year_id=year.id))
+        db.commit()
+        ScheduleEntryRepository(db).add_many([
+            dict(day_of_week="Monday", start_hour=8, end_hour=10, subject_id=1, room_id=i, teacher_id=i,
+                 class_type="Seminar", student_group_id=i) for i in range(1, count + 1)
+        ])
+
+    response = client.get("/api/v1/timetable/schedule/")
+    assert response.status_code == 200
+    assert len(response.json()) == DEFAULT_PAGE_SIZE
+
+def test_list_page_size_is_capped():
+    parameters = app.openapi()["paths"]["/api/v1/timetable/teachers/"]["get"]["parameters"]
+    limit = next(p for p in parameters if p["name"] == "limit")["schema"]
+    assert limit["default"] == DEFAULT_PAGE_SIZE and limit["maximum"] == MAX_PAGE_SIZE
+
 def test_list_rooms():
     response = client.get("/api/v1/timetable/rooms/")
     assert response.status_code == 200
@@ -29,3 +64,8 @@ def test_list_schedule_by_group_not_found():
 def test_delete_schedule_not_found():
     response = client.delete("/api/v1/timetable/schedule/999999")
     assert response.status_code == 404
+
+def test_group_timetable_rejects_what_the_schema_cannot_store():
+    assert client.get("/api/v1/timetable/years/1/groups/A1/schedule").status_code == 404
+    assert client.get("/api/v1/timetable/years/1/groups/a1/schedule").status_code == 422
+    assert client.get("/api/v1/timetable/years/4/groups/A1/schedule").status_code == 422
@@ -0,0 +1,24 @@
+import pytest
+
+from app.core.contracts import check_contracts, contract_mode, set_contract_mode
+
+@pytest.fixture()
+def restore_mode():
+    yield
+    set_contract_mode("full")
+
+def test_tests_run_with_full_contracts():
+    assert contract_mode() == "full"
+    assert check_contracts()
+
+def test_modes(restore_mode):
+    set_contract_mode("off")
+    assert not any(check_contracts() for _ in range(100))
+    set_contract_mode("sampled", sample_rate=1.0)
+    assert all(check_contracts() for _ in range(100))
+    set_contract_mode("sampled", sample_rate=0.0)
+    assert not any(check_contracts() for _ in range(100))
+
+def test_unknown_mode_is_rejected(restore_mode):
+    with pytest.raises(AssertionError):
+        set_contract_mode("fast")
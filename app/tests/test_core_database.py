@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+from app.core.database import make_engine
+
+def test_sqlite_file_uses_wal_and_pragmas(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA cache_size")).scalar() == -64000
+    assert engine.echo is False
+    engine.dispose()
+
+def test_sqlite_memory_skips_wal():
+    engine = make_engine("sqlite:///:memory:")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "memory"
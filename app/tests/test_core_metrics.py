@@ -0,0 +1,64 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.metrics import Histogram, MetricsMiddleware, RequestMetrics, current_stats, route_label
+from app.models.teacher import Teacher
+
+def _app(metrics: RequestMetrics):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[Teacher.__table__])
+    with Session(engine) as db:
+        db.add_all([Teacher(name="Ann"), Teacher(name="Bob")])
+        db.commit()
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    @app.get("/teachers/{teacher_id}")
+    def read_teachers(teacher_id: int):
+        with Session(engine) as db:
+            db.execute(text("SELECT 1"))
+            return {"names": [t.name for t in db.scalars(select(Teacher))]}
+
+    return app
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(("/x",), value)
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{route="/x"} 5.550000' in lines
+    assert 'demo_seconds_count{route="/x"} 3' in lines
+
+def test_middleware_times_queries_and_sets_server_timing():
+    metrics = RequestMetrics()
+    client = TestClient(_app(metrics))
+
+    response = client.get("/teachers/7")
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("total;dur=")
+    assert 'desc="2 queries, 2 rows"' in timing
+
+    client.get("/missing")
+    rendered = metrics.render()
+    assert 'http_requests_total{method="GET",route="/teachers/{teacher_id}",status="200"} 1' in rendered
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in rendered
+    assert 'http_request_queries_bucket{method="GET",route="/teachers/{teacher_id}",le="2"} 1' in rendered
+    assert 'http_request_rows_hydrated_count{method="GET",route="/teachers/{teacher_id}"} 1' in rendered
+    assert current_stats() is None
+
+def test_route_label_restores_router_prefix():
+    class Route:
+        path = "/schedule/{schedule_id}"
+
+    scope = {"route": Route(), "path": "/api/v1/timetable/schedule/12"}
+    assert route_label(scope) == "/api/v1/timetable/schedule/{schedule_id}"
+    assert route_label({"path": "/nowhere"}) == "unmatched"
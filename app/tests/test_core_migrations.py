@@ -0,0 +1,90 @@
+from sqlalchemy import create_engine, inspect, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.migrations import applied_versions, load_migrations, migrate, pending_migrations
+from app.models import (  # noqa: F401
+    collection_version, room, schedule_entry, schedule_slot, student_group, student_year, subject, teacher,
+)
+from app.models.schedule_slot import ScheduleSlot
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+
+def _schema(engine) -> dict:
+    inspector = inspect(engine)
+    schema = {}
+    for table in inspector.get_table_names():
+        if table == "schema_migrations":
+            continue
+        schema[table] = {
+            "columns": sorted((c["name"], c["nullable"]) for c in inspector.get_columns(table)),
+            "primary_key": inspector.get_pk_constraint(table)["constrained_columns"],
+            "foreign_keys": sorted((tuple(fk["constrained_columns"]), fk["referred_table"])
+                                   for fk in inspector.get_foreign_keys(table)),
+            "indexes": sorted((i["name"], tuple(i["column_names"]), bool(i["unique"]))
+                              for i in inspector.get_indexes(table)),
+            "checks": sorted(c["name"] for c in inspector.get_check_constraints(table)),
+        }
+    return schema
+
+def test_migrations_build_the_schema_of_the_models():
+    migrated = create_engine("sqlite://")
+    assert migrate(migrated) == [m.version for m in load_migrations()]
+    declared = create_engine("sqlite://")
+    Base.metadata.create_all(declared)
+    assert _schema(migrated) == _schema(declared)
+
+def test_migrate_is_recorded_and_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    assert migrate(engine, target=1) == [1]
+    assert [m.version for m in pending_migrations(engine)] == [2, 3]
+    assert migrate(engine) == [2, 3]
+    assert migrate(engine) == []
+    assert applied_versions(engine) == {1, 2, 3}
+
+def test_database_from_before_migrations_is_upgraded_in_place():
+    engine = create_engine("sqlite://")
+    # What the old startup create_all made before schedule_slots and collection_versions existed
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables
+                                             if t.name not in ("schedule_slots", "collection_versions")])
+    with engine.begin() as connection:
+        connection.execute(insert(teacher.Teacher.__table__).values(id=1, name="T1"))
+        connection.execute(insert(room.Room.__table__).values(id=1, name="R1", is_course_room=False))
+        connection.execute(insert(student_year.StudentYear.__table__).values(id=1, year=1))
+        connection.execute(insert(student_group.StudentGroup.__table__).values(id=1, student_year_id=1, letter="A1"))
+        connection.execute(insert(subject.Subject.__table__).values(id=1, name="S", course_teacher_id=1, student_year_id=1))
+        connection.execute(insert(schedule_entry.ScheduleEntry.__table__).values(
+            day_of_week="Monday", start_hour=8, end_hour=10, subject_id=1, room_id=1, teacher_id=1,
+            class_type="Seminar", student_group_id=1))
+
+    assert migrate(engine) == [1, 2, 3]
+    session = sessionmaker(bind=engine)()
+    # Room, teacher and group for each of the two hours
+    assert len(session.execute(select(ScheduleSlot)).all()) == 6
+    session.close()
+
+def test_slot_backfill_matches_rebuild_slots():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[t for t in Base.metadata.sorted_tables
+                                             if t.name not in ("schedule_slots", "collection_versions")])
+    entry = dict(day_of_week="Monday", start_hour=8, end_hour=10, subject_id=1, room_id=1, teacher_id=1)
+    with engine.begin() as connection:
+        connection.execute(insert(teacher.Teacher.__table__), [dict(id=1, name="T1"), dict(id=2, name="T2")])
+        connection.execute(insert(room.Room.__table__), [dict(id=1, name="C1", is_course_room=True),
+                                                         dict(id=2, name="L2", is_course_room=False)])
+        connection.execute(insert(student_year.StudentYear.__table__).values(id=1, year=1))
+        connection.execute(insert(student_group.StudentGroup.__table__), [dict(id=1, student_year_id=1, letter="A1"),
+                                                                          dict(id=2, student_year_id=1, letter="A2")])
+        connection.execute(insert(subject.Subject.__table__).values(id=1, name="S", course_teacher_id=1, student_year_id=1))
+        connection.execute(insert(schedule_entry.ScheduleEntry.__table__), [
+            dict(entry, class_type="Course", student_group_id=None),
+            # Double booked against the course before the slot table existed
+            dict(entry, room_id=2, teacher_id=2, class_type="Seminar", student_group_id=2),
+            dict(entry, day_of_week="Tuesday", room_id=2, teacher_id=2, class_type="Seminar", student_group_id=2),
+        ])
+
+    migrate(engine)
+    session = sessionmaker(bind=engine)()
+    backfilled = set(session.execute(select(ScheduleSlot.__table__)).all())
+    assert ScheduleEntryRepository(session).rebuild_slots()["conflicting"] == 1
+    assert set(session.execute(select(ScheduleSlot.__table__)).all()) == backfilled
+    session.close()
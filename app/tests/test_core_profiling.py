@@ -0,0 +1,100 @@
+import marshal
+import sys
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import admin
+from app.core.profiling import ProfilingMiddleware, RequestProfile, SlowRequestProfiler, slow_request_profiler
+
+def _busy(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def test_sample_builds_collapsed_stacks_and_pstats():
+    profiler = SlowRequestProfiler(threshold=0, keep=2, interval=0.001)
+    profile = profiler.start("GET", "/x")
+    for _ in range(3):
+        profiler.sample([profile], {profile.thread: sys._getframe()})
+    assert profiler.finish(profile, 0.01)
+
+    assert profile.samples == 3
+    line = profile.collapsed().splitlines()[0]
+    assert "test_sample_builds_collapsed_stacks_and_pstats (tests/test_core_profiling.py:" in line
+    assert line.endswith(" 3")
+
+    stats = marshal.loads(profile.pstats_dump())
+    leaf = next(key for key in stats if key[2] == "test_sample_builds_collapsed_stacks_and_pstats")
+    cc, nc, tt, ct, callers = stats[leaf]
+    assert nc == 3 and abs(tt - 0.003) < 1e-9 and abs(ct - 0.003) < 1e-9
+    assert callers  # pytest frames above it
+    assert "test_sample_builds_collapsed_stacks_and_pstats" in profile.pstats_text()
+
+def test_ring_buffer_keeps_newest_slow_profiles():
+    profiler = SlowRequestProfiler(threshold=0.05, keep=2, interval=0.001)
+    kept = []
+    for duration in (0.1, 0.01, 0.2, 0.3):
+        profile = profiler.start("GET", f"/{duration}")
+        profile.samples = 1
+        if profiler.finish(profile, duration):
+            kept.append(profile.id)
+    assert [summary["id"] for summary in profiler.summaries()] == kept[::-1][:2]
+    assert RequestProfile("GET", "/", 0.001).id > kept[-1]
+
+def test_admin_routes_are_closed_without_a_token(monkeypatch):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    client = TestClient(app)
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", None)
+    assert client.get("/admin/profiling").status_code == 403
+    assert client.get("/admin/profiling", headers={"X-Admin-Token": ""}).status_code == 403
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/profiling").status_code == 403
+    assert client.get("/admin/profiling", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profiling", headers={"X-Admin-Token": "secret"}).status_code == 200
+
+def test_slow_requests_are_profiled_and_served(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(admin.router, prefix="/admin")
+
+    @app.get("/slow")
+    def slow():
+        _busy(0.15)
+        return {}
+
+    @app.get("/fast")
+    def fast():
+        return {}
+
+    client = TestClient(app, headers={"X-Admin-Token": "secret"})
+    previous = slow_request_profiler.settings()
+    try:
+        response = client.put("/admin/profiling", json={"enabled": True, "threshold_ms": 100, "keep": 5, "interval_ms": 1})
+        assert response.status_code == 200 and response.json()["enabled"] is True
+        assert client.put("/admin/profiling", json={"enabled": True}).status_code == 422
+        client.delete("/admin/profiles")
+
+        client.get("/fast")
+        client.get("/slow")
+        profiles = client.get("/admin/profiles").json()
+        assert [p["route"] for p in profiles] == ["/slow"]
+        assert profiles[0]["duration_ms"] >= 150 and profiles[0]["samples"] > 0
+
+        collapsed = client.get(f"/admin/profiles/{profiles[0]['id']}").text
+        assert "_busy (tests/test_core_profiling.py:" in collapsed
+        dump = client.get(f"/admin/profiles/{profiles[0]['id']}?format=pstats")
+        assert dump.headers["content-type"] == "application/octet-stream"
+        assert any(key[2] == "_busy" for key in marshal.loads(dump.content))
+        assert client.get(f"/admin/profiles/{profiles[0]['id']}?format=svg").status_code == 422
+        assert client.get("/admin/profiles/999999").status_code == 404
+    finally:
+        slow_request_profiler.configure(
+            None if not previous["enabled"] else previous["threshold_ms"] / 1000,
+            previous["keep"], previous["interval_ms"] / 1000,
+        )
+        slow_request_profiler.clear()
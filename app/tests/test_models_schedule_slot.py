@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.schedule_slot import ScheduleSlot
+
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+def create_slot(**overrides):
+    base = dict(resource_type="room", resource_id=1, day_of_week="Monday", hour=8, schedule_entry_id=1)
+    base.update(overrides)
+    return ScheduleSlot(**base)
+
+def test_create_valid_slot(db):
+    db.add_all([create_slot(), create_slot(hour=9), create_slot(resource_type="teacher")])
+    db.commit()
+    assert db.query(ScheduleSlot).count() == 3
+
+def test_same_resource_hour_twice(db):
+    db.add(create_slot(schedule_entry_id=2))
+    with pytest.raises(exc.IntegrityError):
+        db.commit()
+    db.rollback()
+
+def test_invalid_resource_type(db):
+    db.add(create_slot(resource_type="building"))
+    with pytest.raises(exc.IntegrityError):
+        db.commit()
+    db.rollback()
+
+def test_hour_outside_day(db):
+    db.add(create_slot(hour=20))
+    with pytest.raises(exc.IntegrityError):
+        db.commit()
+    db.rollback()
@@ -0,0 +1,60 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.schedule_entry import ScheduleEntry
+from app.models.teacher import Teacher
+from app.repository.aio.schedule_entry_repository import AsyncScheduleEntryRepository
+from app.repository.aio.teacher_repository import AsyncTeacherRepository
+
+def run_with_session(test):
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            await test(session)
+        await engine.dispose()
+    asyncio.run(main())
+
+def test_async_teacher_add_and_page():
+    async def test(session):
+        repo = AsyncTeacherRepository(session)
+        for name in ["Ana", "Bogdan", "Carmen"]:
+            await repo.add(name)
+        page = await repo.get_page(after_id=1, limit=1)
+        assert [t.name for t in page] == ["Bogdan"]
+        assert (await repo.get_by_id(3)).name == "Carmen"
+        assert len(await repo.get_all()) == 3
+    run_with_session(test)
+
+def test_async_schedule_filters_and_delete():
+    async def test(session):
+        repo = AsyncScheduleEntryRepository(session)
+        ids = await repo.add_many([
+            dict(day_of_week="Monday", start_hour=8, end_hour=10, subject_id=1, room_id=1,
+                 teacher_id=1, class_type="Course", student_group_id=None),
+            dict(day_of_week="Tuesday", start_hour=10, end_hour=12, subject_id=1, room_id=2,
+                 teacher_id=2, class_type="Seminar", student_group_id=3),
+        ])
+        assert [e.id for e in await repo.get_page(day_of_week="Tuesday")] == [ids[1]]
+        assert await repo.delete(ids[0]) is True
+        assert await repo.delete(ids[0]) is False
+    run_with_session(test)
+
+def test_async_add_if_free():
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            repo = AsyncScheduleEntryRepository(session)
+            slot = dict(day_of_week="Monday", start_hour=8, end_hour=10, subject_id=1, room_id=1,
+                        teacher_id=1, class_type="Seminar", student_group_id=1)
+            entry, clash = await repo.add_if_free(**slot)
+            assert clash is None and entry.id == 1
+            assert await repo.add_if_free(**dict(slot, room_id=2)) == (None, "teacher")
+            assert len(await repo.get_all()) == 1
+        await engine.dispose()
+    asyncio.run(main())
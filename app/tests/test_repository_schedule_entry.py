@@ -1,14 +1,21 @@
+import threading
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 
+from app.core.contracts import set_contract_mode
 from app.core.database import Base
 from app.models.teacher import Teacher
 from app.models.room import Room
 from app.models.subject import Subject
 from app.models.student_year import StudentYear
 from app.models.student_group import StudentGroup
+from app.models.schedule_entry import ScheduleEntry
+from app.models.schedule_slot import ScheduleSlot
 from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.repository.student_group_repository import StudentGroupRepository
 
 # Setup in-memory SQLite test DB
 engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
@@ -144,4 +151,217 @@ def test_add_with_extremely_long_day_of_week(repo):
 def test_add_with_invalid_class_type(repo):
     entry = repo.add(day_of_week="Thursday", start_hour=8, end_hour=10, subject_id=1,
                      room_id=1, teacher_id=1, class_type="Workshop", student_group_id=1)
-    assert entry.class_type in ["Course", "Seminar", "Laboratory"], "Invalid class type"
\ No newline at end of file
+    assert entry.class_type in ["Course", "Seminar", "Laboratory"], "Invalid class type"
+
+
+def _count_queries(bind):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(bind, "before_cursor_execute", listener)
+    return statements, lambda: event.remove(bind, "before_cursor_execute", listener)
+
+def test_expanded_page_and_timetable_are_one_query():
+    local_engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=local_engine)
+    session = sessionmaker(bind=local_engine)()
+    years = [StudentYear(year=1), StudentYear(year=2)]
+    session.add_all(years)
+    session.flush()
+    teachers = [Teacher(name=f"T{i}") for i in range(10)]
+    rooms = [Room(name=f"R{i}", is_course_room=i % 5 == 0) for i in range(10)]
+    groups = [StudentGroup(student_year_id=years[i // 3].id, letter=f"A{i % 3}") for i in range(6)]
+    session.add_all(teachers + rooms + groups)
+    session.flush()
+    subjects = [Subject(name=f"S{i}", course_teacher_id=teachers[i].id, student_year_id=years[i // 5].id) for i in range(10)]
+    session.add_all(subjects)
+    session.commit()
+    repo = ScheduleEntryRepository(session)
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    # Entries i and i + 30 share a slot, so they use the second year's rooms, teachers and groups
+    repo.add_many([
+        dict(day_of_week=days[i % 5], start_hour=8 + 2 * (i // 5 % 6), end_hour=10 + 2 * (i // 5 % 6),
+             subject_id=subjects[i % 5 + 5 * (i // 30)].id, room_id=rooms[i % 5 + 5 * (i // 30)].id,
+             teacher_id=teachers[i % 5 + 5 * (i // 30)].id, class_type="Course" if i % 3 == 0 else "Seminar",
+             student_group_id=None if i % 3 == 0 else groups[i % 3 + 3 * (i // 30)].id)
+        for i in range(60)
+    ])
+    session.expunge_all()
+
+    statements, stop = _count_queries(local_engine)
+    page = repo.get_page(limit=50, expand=True)
+    timetable = repo.get_group_timetable(1, "A1", expand=True)
+    assert [e.subject.name for e in page] and all(e.room.name and e.teacher.name for e in page + timetable)
+    assert all(e.student_group is None or e.student_group.letter for e in page + timetable)
+    stop()
+    assert len(page) == 50 and timetable
+    assert len(statements) == 2
+    session.close()
+
+def test_iter_room_mismatches():
+    local_engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=local_engine)
+    session = sessionmaker(bind=local_engine)()
+    year = StudentYear(year=1)
+    teacher = Teacher(name="T")
+    course_room, lab_room = Room(name="C", is_course_room=True), Room(name="L", is_course_room=False)
+    session.add_all([year, teacher, course_room, lab_room])
+    session.flush()
+    group = StudentGroup(student_year_id=year.id, letter="A1")
+    subject = Subject(name="S", course_teacher_id=teacher.id, student_year_id=year.id)
+    session.add_all([group, subject])
+    session.commit()
+    repo = ScheduleEntryRepository(session)
+    common = dict(start_hour=8, end_hour=10, subject_id=subject.id, teacher_id=teacher.id)
+    repo.add_many([
+        dict(common, day_of_week="Monday", room_id=course_room.id, class_type="Course", student_group_id=None),
+        dict(common, day_of_week="Tuesday", room_id=lab_room.id, class_type="Course", student_group_id=None),
+        dict(common, day_of_week="Wednesday", room_id=course_room.id, class_type="Seminar", student_group_id=group.id),
+        dict(common, day_of_week="Thursday", room_id=lab_room.id, class_type="Seminar", student_group_id=group.id),
+    ])
+
+    assert list(repo.iter_room_mismatches(batch_size=1)) == [
+        (2, "Tuesday", lab_room.id, "Course", False),
+        (3, "Wednesday", course_room.id, "Seminar", True),
+    ]
+    session.close()
+
+def _timetable_db(url):
+    """Engine with the schema, one year with groups A1/A2, two course rooms and a subject."""
+    local_engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=local_engine)
+    session = sessionmaker(bind=local_engine)()
+    year = StudentYear(year=1)
+    session.add_all([year, Teacher(name="T1"), Teacher(name="T2"), Teacher(name="T3"),
+                     Room(name="R1", is_course_room=True), Room(name="R2", is_course_room=True)])
+    session.flush()
+    session.add_all([StudentGroup(student_year_id=year.id, letter="A1"), StudentGroup(student_year_id=year.id, letter="A2"),
+                     Subject(name="S", course_teacher_id=1, student_year_id=year.id)])
+    session.commit()
+    session.close()
+    return local_engine
+
+def _slot(**overrides):
+    fields = dict(day_of_week="Monday", start_hour=8, end_hour=10, subject_id=1, room_id=1, teacher_id=1,
+                  class_type="Seminar", student_group_id=1)
+    fields.update(overrides)
+    return fields
+
+def test_add_if_free_names_the_clash():
+    session = sessionmaker(bind=_timetable_db("sqlite:///:memory:"))()
+    repo = ScheduleEntryRepository(session)
+
+    course, clash = repo.add_if_free(**_slot(class_type="Course", student_group_id=None))
+    assert clash is None and course.id == 1
+    assert course.course_year_id == 1  # resolved with the slots, for the occupancy map
+    assert repo.add_if_free(**_slot(start_hour=9, end_hour=11, teacher_id=2)) == (None, "room")
+    assert repo.add_if_free(**_slot(room_id=2)) == (None, "teacher")
+    # The year's course blocks its groups
+    assert repo.add_if_free(**_slot(room_id=2, teacher_id=2, student_group_id=2)) == (None, "group")
+    seminar, clash = repo.add_if_free(**_slot(start_hour=10, end_hour=12, room_id=2, teacher_id=2))
+    assert clash is None and seminar.course_year_id is None
+    # ... and a new course is blocked by a group of its year
+    assert repo.find_clash("Monday", 11, 13, room_id=1, teacher_id=3, subject_id=1) == "group"
+    assert len(repo.get_all()) == 2
+    session.close()
+
+def test_add_if_free_is_race_free(tmp_path):
+    local_engine = _timetable_db(f"sqlite:///{tmp_path / 'race.db'}")
+    barrier = threading.Barrier(8)
+    results = []
+
+    def book(teacher_id):
+        session = sessionmaker(bind=local_engine)()
+        try:
+            barrier.wait()
+            results.append(ScheduleEntryRepository(session).add_if_free(**_slot(teacher_id=teacher_id % 3 + 1))[1])
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(None) == 1 and results.count("room") == 7
+    session = sessionmaker(bind=local_engine)()
+    assert len(ScheduleEntryRepository(session).get_all()) == 1
+    session.close()
+
+def test_slots_follow_add_and_delete():
+    session = sessionmaker(bind=_timetable_db("sqlite:///:memory:"))()
+    repo = ScheduleEntryRepository(session)
+
+    course = repo.add(**_slot(class_type="Course", student_group_id=None))
+    slots = {(s.resource_type, s.resource_id, s.hour) for s in session.query(ScheduleSlot)}
+    # Room, teacher, the year and both of its groups, for each of the two hours
+    assert slots == {(kind, resource_id, hour) for kind, resource_id in
+                     [("room", 1), ("teacher", 1), ("year", 1), ("group", 1), ("group", 2)] for hour in (8, 9)}
+    assert repo.delete(course.id) is True
+    assert session.query(ScheduleSlot).count() == 0
+    session.close()
+
+def test_group_added_later_is_blocked_by_its_year_course():
+    session = sessionmaker(bind=_timetable_db("sqlite:///:memory:"))()
+    repo = ScheduleEntryRepository(session)
+    course, _ = repo.add_if_free(**_slot(class_type="Course", student_group_id=None))
+
+    late = StudentGroupRepository(session).add(student_year_id=1, letter="A3")
+    assert repo.add_if_free(**_slot(room_id=2, teacher_id=2, student_group_id=late.id)) == (None, "group")
+    assert repo.delete(course.id) is True
+    assert session.query(ScheduleSlot).count() == 0
+    session.close()
+
+def test_delete_skips_the_verifying_query_without_contracts():
+    local_engine = _timetable_db("sqlite:///:memory:")
+    session = sessionmaker(bind=local_engine)()
+    repo = ScheduleEntryRepository(session)
+    first, second = repo.add(**_slot()), repo.add(**_slot(start_hour=10, end_hour=12))
+
+    statements, stop = _count_queries(local_engine)
+    try:
+        assert repo.delete(first.id) is True
+        checked = len(statements)
+        set_contract_mode("off")
+        assert repo.delete(second.id) is True
+    finally:
+        set_contract_mode("full")
+        stop()
+    assert len(statements) - checked == checked - 1
+    session.close()
+
+def test_add_many_rejects_a_double_booking_as_a_whole():
+    session = sessionmaker(bind=_timetable_db("sqlite:///:memory:"))()
+    repo = ScheduleEntryRepository(session)
+
+    with pytest.raises(IntegrityError):
+        repo.add_many([_slot(), _slot(day_of_week="Tuesday"), _slot(teacher_id=2, student_group_id=2)])
+    assert repo.get_all() == [] and session.query(ScheduleSlot).count() == 0
+    session.close()
+
+def test_add_many_returns_ids_in_entry_order():
+    session = sessionmaker(bind=_timetable_db("sqlite:///:memory:"))()
+    repo = ScheduleEntryRepository(session)
+    entries = [_slot(day_of_week=day, start_hour=hour, end_hour=hour + 2, room_id=room, teacher_id=room,
+                     student_group_id=room)
+               for day in ("Friday", "Monday") for hour in (14, 8) for room in (2, 1)]
+
+    ids = repo.add_many(entries)
+    stored = {e.id: (e.day_of_week, e.start_hour, e.room_id) for e in repo.get_all()}
+    assert [stored[i] for i in ids] == [(e["day_of_week"], e["start_hour"], e["room_id"]) for e in entries]
+    slots = {(s.resource_type, s.resource_id, s.day_of_week, s.hour): s.schedule_entry_id
+             for s in session.query(ScheduleSlot)}
+    assert slots[("room", 2, "Friday", 15)] == ids[0] and slots[("teacher", 1, "Monday", 8)] == ids[7]
+    session.close()
+
+def test_rebuild_slots_counts_stored_double_bookings():
+    session = sessionmaker(bind=_timetable_db("sqlite:///:memory:"))()
+    repo = ScheduleEntryRepository(session)
+    repo.add_many([_slot(), _slot(day_of_week="Tuesday")])
+    # Written behind the repository's back, as an old import would have
+    session.execute(insert(ScheduleEntry.__table__), [_slot(teacher_id=2, student_group_id=2)])
+    session.commit()
+
+    assert repo.rebuild_slots(batch_size=3) == {"entries": 3, "slots": 16, "conflicting": 1}
+    assert repo.find_clash("Monday", 8, 10, room_id=2, teacher_id=3, subject_id=1, student_group_id=2) == "group"
+    session.close()
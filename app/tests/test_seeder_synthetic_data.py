@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import migrate
+from app.models.schedule_entry import ScheduleEntry
+from app.models.subject import Subject
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.seeder.synthetic_data import faculty_size, generate_university
+from app.services.timetable_service import TimetableService
+
+SMALL = dict(teachers=30, rooms=20, groups_per_year=6, subjects_per_year=4, seminar_teachers=3)
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    migrate(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _schedule(db) -> list[tuple]:
+    return db.execute(select(ScheduleEntry.day_of_week, ScheduleEntry.start_hour, ScheduleEntry.subject_id,
+                             ScheduleEntry.room_id, ScheduleEntry.teacher_id, ScheduleEntry.class_type,
+                             ScheduleEntry.student_group_id).order_by(ScheduleEntry.id)).all()
+
+
+def test_generated_faculties_are_conflict_free():
+    db = _session()
+    totals = generate_university(db, faculties=3, seed=7, **SMALL)
+
+    assert totals["faculties"] == 3 and totals["teachers"] == 90 and totals["groups"] == 54
+    assert totals["entries"] + totals["unplaced"] == 3 * faculty_size(6, 4)
+    assert db.scalar(select(func.count()).select_from(ScheduleEntry)) == totals["entries"]
+    assert list(TimetableService(db).audit_schedule()) == []
+    assert ScheduleEntryRepository(db).rebuild_slots()["conflicting"] == 0
+    db.close()
+
+
+def test_seminars_are_taught_by_the_subjects_seminar_lab_teachers():
+    db = _session()
+    generate_university(db, faculties=1, seed=1, **SMALL)
+
+    for subject in db.scalars(select(Subject)):
+        seminar_lab_teachers = {teacher.id for teacher in subject.seminar_lab_teachers}
+        assert len(seminar_lab_teachers) == 3
+        for entry in db.scalars(select(ScheduleEntry).where(ScheduleEntry.subject_id == subject.id)):
+            if entry.class_type == "Course":
+                assert entry.teacher_id == subject.course_teacher_id and entry.student_group_id is None
+            else:
+                assert entry.teacher_id in seminar_lab_teachers
+    db.close()
+
+
+def test_generation_is_deterministic_and_bounded_by_entries():
+    first, second, other = _session(), _session(), _session()
+    generate_university(first, entries=100, seed=3, **SMALL)
+    generate_university(second, entries=100, seed=3, **SMALL)
+    generate_university(other, entries=100, seed=4, **SMALL)
+
+    assert len(_schedule(first)) == 100
+    assert _schedule(first) == _schedule(second)
+    assert _schedule(first) != _schedule(other)
+    with pytest.raises(AssertionError):
+        generate_university(first, faculties=1, **SMALL)  # only fills an empty database
+    for db in (first, second, other):
+        db.close()
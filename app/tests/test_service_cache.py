@@ -0,0 +1,59 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.async_timetable_service import AsyncTimetableService
+from app.services.cache_service import CachedPage, ReferenceCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_hit_until_ttl_expires():
+    clock = FakeClock()
+    cache = ReferenceCache(ttl=10, clock=clock)
+    assert cache.get("rooms", (None, None)) is None
+    cache.put("rooms", (None, None), CachedPage(b"[]"))
+    assert cache.get("rooms", (None, None)).body == b"[]"
+    clock.now = 11
+    assert cache.get("rooms", (None, None)) is None
+    assert cache.stats()["rooms"] == {"hits": 1, "misses": 2, "invalidations": 0, "entries": 0}
+
+def test_invalidate_drops_only_that_collection():
+    cache = ReferenceCache(ttl=60)
+    cache.put("teachers", (None, None), CachedPage(b"[1]"))
+    cache.put("teachers", (0, 10), CachedPage(b"[2]", next_after_id=10))
+    cache.put("rooms", (None, None), CachedPage(b"[3]"))
+    cache.invalidate("teachers")
+    assert cache.get("teachers", (0, 10)) is None
+    assert cache.get("rooms", (None, None)).body == b"[3]"
+    assert cache.stats()["teachers"]["invalidations"] == 1
+
+def test_zero_ttl_disables_caching():
+    cache = ReferenceCache(ttl=0)
+    cache.put("years", (None, None), CachedPage(b"[]"))
+    assert cache.get("years", (None, None)) is None
+
+def test_reference_page_serializes_once_and_invalidates_on_create():
+    service = AsyncTimetableService(MagicMock())
+    service.cache = ReferenceCache(ttl=60)
+    teacher = MagicMock(id=1)
+    teacher.name = "Ana"
+    service.teacher_repo = MagicMock()
+    service.teacher_repo.get_page = AsyncMock(return_value=[teacher])
+    service.teacher_repo.add = AsyncMock(return_value=teacher)
+
+    async def scenario():
+        first = await service.list_reference_page("teachers", limit=1)
+        second = await service.list_reference_page("teachers", limit=1)
+        assert first is second
+        assert json.loads(first.body) == [{"name": "Ana", "id": 1}]
+        assert first.next_after_id == 1
+        await service.create_teacher(MagicMock(name="Ana"))
+        await service.list_reference_page("teachers", limit=1)
+
+    asyncio.run(scenario())
+    assert service.teacher_repo.get_page.await_count == 2
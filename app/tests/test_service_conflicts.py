@@ -0,0 +1,33 @@
+from app.services.conflict_service import entry_intervals, overlapping_pairs, sweep_conflicts
+from app.services.occupancy_service import GROUP, ROOM, TEACHER, YEAR
+
+def test_overlapping_pairs_sweep():
+    intervals = [(8, 10, "a", False), (9, 11, "b", False), (10, 12, "c", False), (8, 20, "d", False)]
+    pairs = {frozenset(pair) for pair in overlapping_pairs(intervals)}
+    assert pairs == {frozenset(p) for p in ["ab", "ad", "bd", "bc", "cd"]}
+    # Touching intervals do not overlap
+    assert list(overlapping_pairs([(8, 10, "a", False), (10, 12, "b", False)])) == []
+
+def test_shared_intervals_are_not_paired():
+    intervals = [(8, 10, "course1", True), (8, 10, "course2", True), (9, 11, "seminar", False)]
+    assert set(overlapping_pairs(intervals)) == {("course1", "seminar"), ("course2", "seminar")}
+
+def test_course_occupies_year_and_group_timelines():
+    keys = dict(entry_intervals(1, "Monday", 8, 10, room_id=5, teacher_id=6, year_id=2, year_groups={2: [7, 8]}))
+    assert keys[(ROOM, 5, "Monday")] == (8, 10, 1, False)
+    assert keys[(YEAR, 2, "Monday")] == (8, 10, 1, False)
+    assert keys[(GROUP, 7, "Monday")] == keys[(GROUP, 8, "Monday")] == (8, 10, 1, True)
+
+def test_sweep_conflicts_reports_each_pair_once():
+    timelines = {}
+    entries = [
+        (1, "Monday", 8, 10, 1, 1, None, 1),
+        (2, "Monday", 8, 10, 2, 2, None, 1),  # second course of the same year
+        (3, "Monday", 9, 11, 1, 3, 7, 1),
+    ]
+    for ref, day, start, end, room_id, teacher_id, group_id, year_id in entries:
+        for key, interval in entry_intervals(ref, day, start, end, room_id, teacher_id, group_id, year_id, {1: [7, 8]}):
+            timelines.setdefault(key, []).append(interval)
+    clashes = sorted((kind, first, second) for kind, _, first, second in sweep_conflicts(timelines))
+    assert clashes == [(GROUP, 1, 2), (GROUP, 1, 3), (GROUP, 2, 3), (ROOM, 1, 3)]
+    assert all(kind != TEACHER for kind, _, _ in clashes)
@@ -0,0 +1,237 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import migrate
+from app.models.room import Room
+from app.repository.room_repository import RoomRepository
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.repository.student_group_repository import StudentGroupRepository
+from app.repository.student_year_repository import StudentYearRepository
+from app.repository.subject_repository import SubjectRepository
+from app.repository.teacher_repository import TeacherRepository
+from app.services.occupancy_service import (
+    OccupancyMap, ROOM, TEACHER, GROUP, YEAR, days_mask, get_occupancy, slot_mask, window_starts, iter_windows,
+)
+from app.services.async_timetable_service import AsyncTimetableService
+from app.services.timetable_service import TimetableService
+from app.schemas.schedule_entry import ScheduleEntryCreate
+
+@pytest.fixture
+def occupancy():
+    occupancy = OccupancyMap()
+    occupancy.load_reference(groups=[(1, 1), (2, 1)], rooms=[])
+    occupancy.add(10, "Monday", 8, 10, room_id=1, teacher_id=1, student_group_id=1)
+    return occupancy
+
+def test_slot_mask_layout():
+    assert slot_mask("Monday", 8, 10) == 0b11
+    assert slot_mask("Tuesday", 8, 9) == 1 << 12
+    assert slot_mask("Friday", 18, 20) == 0b11 << (4 * 12 + 10)
+
+def test_slot_mask_rejects_weekend():
+    with pytest.raises(AssertionError):
+        slot_mask("Sunday", 8, 10)
+
+def test_conflicts_by_resource(occupancy):
+    assert occupancy.find_conflict("Monday", 9, 11, room_id=1, teacher_id=2, student_group_id=2) == ROOM
+    assert occupancy.find_conflict("Monday", 9, 11, room_id=2, teacher_id=1, student_group_id=2) == TEACHER
+    assert occupancy.find_conflict("Monday", 9, 11, room_id=2, teacher_id=2, student_group_id=1) == GROUP
+    assert occupancy.find_conflict("Monday", 10, 12, room_id=1, teacher_id=1, student_group_id=1) is None
+
+def test_year_course_blocks_its_groups(occupancy):
+    occupancy.add(11, "Tuesday", 10, 12, room_id=3, teacher_id=3, year_id=1)
+    assert occupancy.busy(YEAR, 1) == slot_mask("Tuesday", 10, 12)
+    assert occupancy.find_conflict("Tuesday", 11, 13, room_id=4, teacher_id=4, student_group_id=2) == GROUP
+    # A year-wide course also clashes with any of the year's group classes
+    assert occupancy.find_conflict("Monday", 8, 10, room_id=4, teacher_id=4, year_id=1) == GROUP
+
+def test_remove_frees_slots(occupancy):
+    assert occupancy.remove(10) is True
+    assert occupancy.busy(ROOM, 1) == 0
+    assert occupancy.find_conflict("Monday", 8, 10, room_id=1, teacher_id=1, student_group_id=1) is None
+    assert occupancy.remove(10) is False
+
+def test_remove_keeps_preexisting_overlap(occupancy):
+    # Overlapping rows imported outside the API must stay marked after one of them is deleted
+    occupancy.add(12, "Monday", 9, 11, room_id=1, teacher_id=5)
+    occupancy.remove(10)
+    assert occupancy.busy(ROOM, 1) == slot_mask("Monday", 9, 11)
+
+def test_free_windows_skip_busy_and_day_boundaries(occupancy):
+    windows = occupancy.free_windows(occupancy.busy(ROOM, 1))
+    assert ("Monday", 8, 10) not in windows
+    assert ("Monday", 9, 11) not in windows
+    assert ("Monday", 10, 12) in windows
+    assert all(end <= 20 for _, _, end in windows)
+    assert len(windows) == 5 * 11 - 2
+
+def test_window_starts_full_day_busy():
+    busy = slot_mask("Wednesday", 8, 20)
+    starts = window_starts(busy)
+    assert all(day != "Wednesday" for day, _, _ in iter_windows(starts))
+
+def test_common_windows_intersect_resources(occupancy):
+    occupancy.add(11, "Monday", 12, 14, room_id=2, teacher_id=2, student_group_id=2)
+    windows = occupancy.common_windows(teacher_id=1, student_group_id=2, within=days_mask("Monday", "Monday"))
+    starts = [start for _, start, _, _ in windows]
+    assert starts == [10, 14, 15, 16, 17, 18]
+    assert all(rooms is None for *_, rooms in windows)
+
+def test_common_windows_list_free_rooms_of_type(occupancy):
+    windows = occupancy.common_windows(teacher_id=3, room_ids=[1, 2], within=days_mask("Monday", "Monday"))
+    rooms_at = {start: rooms for _, start, _, rooms in windows}
+    assert rooms_at[8] == [2] and rooms_at[9] == [2]
+    assert rooms_at[10] == [1, 2]
+    assert occupancy.common_windows(room_ids=[]) == []
+
+def test_rank_free_rooms_by_utilization(occupancy):
+    occupancy.load_reference(groups=[(1, 1), (2, 1)], rooms=[(1, False), (2, False), (3, False), (4, True)])
+    occupancy.add(11, "Tuesday", 8, 10, room_id=2, teacher_id=2)
+    occupancy.add(12, "Wednesday", 8, 12, room_id=2, teacher_id=2)
+    occupancy.add(13, "Monday", 14, 16, room_id=3, teacher_id=3)
+    # Room 1 is taken at 9 on Monday; rooms 3 and 2 are free, 3 being the less used
+    assert occupancy.rank_free_rooms("Monday", 9, 11, is_course_room=False) == [(3, 2), (2, 6)]
+    assert occupancy.rank_free_rooms("Monday", 10, 12, is_course_room=False) == [(1, 2), (3, 2), (2, 6)]
+    assert occupancy.rank_free_rooms("Monday", 10, 12, is_course_room=True) == [(4, 0)]
+
+def test_days_mask_bounds():
+    assert days_mask() == slot_mask("Monday", 8, 20) | days_mask("Tuesday", "Friday")
+    assert days_mask("Wednesday", "Wednesday") == slot_mask("Wednesday", 8, 20)
+
+def test_load_rebuilds_from_rows():
+    db = MagicMock()
+    db.query.return_value.join.return_value.all.return_value = [
+        (1, "Monday", 8, 10, 1, 1, 1, 1),
+        (2, "Monday", 8, 10, 2, 2, None, 1),
+    ]
+    db.query.return_value.all.return_value = [(1, 1)]
+    occupancy = OccupancyMap()
+    occupancy.load(db)
+    assert occupancy.loaded
+    assert occupancy.busy(ROOM, 2) == slot_mask("Monday", 8, 10)
+    assert occupancy.busy(YEAR, 1) == slot_mask("Monday", 8, 10)
+    assert occupancy.group_busy(1) == slot_mask("Monday", 8, 10)
+
+def test_map_follows_writes_of_other_processes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    other = Session()  # stands in for another worker or a script
+    teacher = TeacherRepository(other).add(name="T1")
+    room = RoomRepository(other).add(name="R1", is_course_room=False)
+    year = StudentYearRepository(other).add(year=1)
+    group = StudentGroupRepository(other).add(student_year_id=year.id, letter="A1")
+    subject = SubjectRepository(other).add(course_teacher_id=teacher.id, student_year_id=year.id, name="S")
+
+    with Session() as db:
+        first = get_occupancy(db)
+    assert first.rooms_of_type(False) == [room.id] and first.busy(ROOM, room.id) == 0
+    entry = ScheduleEntryRepository(other).add(day_of_week="Monday", start_hour=8, end_hour=10,
+                                               subject_id=subject.id, room_id=room.id, teacher_id=teacher.id,
+                                               class_type="Seminar", student_group_id=group.id)
+    lab = RoomRepository(other).add(name="R2", is_course_room=False)
+    with Session() as db:
+        second = get_occupancy(db)
+    assert second is not first
+    assert second.busy(ROOM, room.id) == slot_mask("Monday", 8, 10)
+    assert second.rooms_of_type(False) == [room.id, lab.id]
+
+    # A write applied to the map and counted keeps it current
+    with Session() as db:
+        assert ScheduleEntryRepository(db).delete(entry.id)
+        second.remove(entry.id)
+        second.advance("schedule")
+    with Session() as db:
+        assert get_occupancy(db) is second
+    other.close()
+
+def test_recommendations_include_rooms_added_by_other_writers(tmp_path):
+    path = tmp_path / "db.sqlite"
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+
+    async def recommend():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with async_sessionmaker(async_engine)() as db:
+            result = await AsyncTimetableService(db).recommend_rooms("Monday", 8, "Seminar")
+        await async_engine.dispose()
+        return [r["room_id"] for r in result]
+
+    with Session() as db:
+        first = RoomRepository(db).add(name="R1", is_course_room=False).id
+    assert asyncio.run(recommend()) == [first]
+    with Session() as db:
+        second = RoomRepository(db).add(name="R2", is_course_room=False).id
+        RoomRepository(db).add(name="Hall", is_course_room=True)
+    assert asyncio.run(recommend()) == [first, second]
+
+def test_service_updates_occupancy_on_delete():
+    service = TimetableService(MagicMock())
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.delete.return_value = True
+    service.occupancy = OccupancyMap()
+    service.occupancy.add(7, "Friday", 12, 14, room_id=1, teacher_id=1)
+
+    assert service.delete_schedule_entry(7) is True
+    assert service.occupancy.busy(ROOM, 1) == 0
+
+def test_service_rejects_group_double_booking():
+    service = TimetableService(MagicMock())
+    service.room_repo = MagicMock()
+    service.room_repo.get_by_id.return_value = Room(id=2, name="L2", is_course_room=False)
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.add_if_free.return_value = (None, "group")
+    service.occupancy = OccupancyMap()
+
+    entry = ScheduleEntryCreate(
+        day_of_week="Friday",
+        start_hour=12,
+        end_hour=14,
+        subject_id=1,
+        room_id=2,
+        teacher_id=2,
+        class_type="Seminar",
+        student_group_id=3
+    )
+    with pytest.raises(HTTPException) as exc_info:
+        service.create_schedule_entry(entry)
+    assert exc_info.value.status_code == 400
+    assert "Student group is already scheduled" in exc_info.value.detail
+
+def test_slot_freed_by_another_worker_is_bookable_at_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    migrate(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        teacher = TeacherRepository(db).add(name="T1").id
+        room = RoomRepository(db).add(name="L1", is_course_room=False).id
+        year = StudentYearRepository(db).add(year=1).id
+        group = StudentGroupRepository(db).add(student_year_id=year, letter="A1").id
+        subject = SubjectRepository(db).add(course_teacher_id=teacher, student_year_id=year, name="S").id
+    entry = ScheduleEntryCreate(day_of_week="Monday", start_hour=8, end_hour=10, subject_id=subject, room_id=room,
+                                teacher_id=teacher, class_type="Seminar", student_group_id=group)
+
+    with Session() as db:
+        service = TimetableService(db)
+        booked = service.create_schedule_entry(entry).id
+        stale = service.occupancy
+    with Session() as db:  # another worker deletes it; this process's bitmaps still hold it
+        assert ScheduleEntryRepository(db).delete(booked)
+    assert stale.busy(ROOM, room) == slot_mask("Monday", 8, 10)
+
+    with Session() as db:
+        service = TimetableService(db)
+        service.occupancy = stale
+        rebooked = service.create_schedule_entry(entry)
+        assert ScheduleEntryRepository(db).get_by_id(rebooked.id) is not None
+        with pytest.raises(HTTPException) as exc_info:
+            service.create_schedule_entry(entry)
+    assert exc_info.value.status_code == 400
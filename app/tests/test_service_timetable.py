@@ -2,9 +2,13 @@ import pytest
 from fastapi import HTTPException
 from unittest.mock import MagicMock, patch
 from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
 
+from app.models.room import Room
 from app.services.timetable_service import TimetableService
 from app.schemas.schedule_entry import ScheduleEntryCreate
+from app.services.occupancy_service import OccupancyMap
+from app.schemas.timetable import MAX_TIME_BUDGET, MAX_WORKERS, TimetableGenerateRequest
 
 @pytest.fixture
 def mock_db():
@@ -112,16 +116,12 @@ def test_end_hour_between_8_and_20(service):
 
 def test_teacher_already_occupied(service):
 
-    # Inject mocked repositories
+    # Inject mocked repositories; the slot table reports the teacher's slot as taken
     service.schedule_repo = MagicMock()
-
-    existing_entry = MagicMock()
-    existing_entry.day_of_week = "Tuesday"
-    existing_entry.start_hour = 11
-    existing_entry.end_hour = 13
-    existing_entry.teacher_id = 5
-
-    service.schedule_repo.get_all = MagicMock(return_value=[existing_entry])  
+    service.schedule_repo.add_if_free.return_value = (None, "teacher")
+    service.room_repo = MagicMock()
+    service.room_repo.get_by_id.return_value = Room(id=2, name="L2", is_course_room=False)
+    service.occupancy = OccupancyMap()
 
     new_entry = ScheduleEntryCreate(
         day_of_week="Tuesday",
@@ -144,14 +144,10 @@ def test_teacher_already_occupied(service):
 def test_room_already_occupied(service):
     
     service.schedule_repo = MagicMock()
-   
-    existing_entry = MagicMock()
-    existing_entry.day_of_week = "Monday"
-    existing_entry.start_hour = 8
-    existing_entry.end_hour = 10
-    existing_entry.room_id = 1
-
-    service.schedule_repo.get_all.return_value = [existing_entry]
+    service.schedule_repo.add_if_free.return_value = (None, "room")
+    service.room_repo = MagicMock()
+    service.room_repo.get_by_id.return_value = Room(id=1, name="C1", is_course_room=True)
+    service.occupancy = OccupancyMap()
 
     new_entry = ScheduleEntryCreate(
         day_of_week="Monday",
@@ -284,3 +280,249 @@ def test_schedule_entry_not_found(service):
 
 
 
+
+def test_generate_timetable(service):
+    service.occupancy = OccupancyMap()
+    service.subject_repo = MagicMock()
+    service.room_repo = MagicMock()
+    service.student_group_repo = MagicMock()
+    service.schedule_repo = MagicMock()
+
+    teacher = MagicMock(id=2)
+    subject = MagicMock(id=1, student_year_id=1, course_teacher_id=1, seminar_lab_teachers=[teacher])
+    service.subject_repo.get_all_with_teachers.return_value = [subject]
+    service.room_repo.get_all.return_value = [MagicMock(id=1, is_course_room=True), MagicMock(id=2, is_course_room=False)]
+    service.student_group_repo.get_all.return_value = [MagicMock(id=1, student_year_id=1), MagicMock(id=2, student_year_id=1)]
+    service.schedule_repo.add_many.return_value = [11, 12, 13]
+
+    result = service.generate_timetable(TimetableGenerateRequest(seed=1, persist=True))
+
+    assert result["unplaced"] == []
+    assert len(result["entries"]) == 3
+    assert result["persisted"] is True
+    service.schedule_repo.add_many.assert_called_once()
+    # Persisted entries are tracked by the occupancy map
+    course = next(e for e in result["entries"] if e["class_type"] == "Course")
+    assert service.occupancy.find_conflict(course["day_of_week"], course["start_hour"], course["end_hour"],
+                                           room_id=1, teacher_id=99, student_group_id=None) == "room"
+
+def test_generate_timetable_conflicting_persist_is_409(service):
+    service.occupancy = OccupancyMap()
+    service.subject_repo = MagicMock()
+    service.room_repo = MagicMock()
+    service.student_group_repo = MagicMock()
+    service.schedule_repo = MagicMock()
+
+    subject = MagicMock(id=1, student_year_id=1, course_teacher_id=1, seminar_lab_teachers=[MagicMock(id=2)])
+    service.subject_repo.get_all_with_teachers.return_value = [subject]
+    service.room_repo.get_all.return_value = [MagicMock(id=1, is_course_room=True), MagicMock(id=2, is_course_room=False)]
+    service.student_group_repo.get_all.return_value = [MagicMock(id=1, student_year_id=1)]
+    # schedule_slots rejects a slot another writer booked after the snapshot
+    service.schedule_repo.add_many.side_effect = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.generate_timetable(TimetableGenerateRequest(seed=1, persist=True))
+    assert exc_info.value.status_code == 409
+    assert service.occupancy.snapshot() == {}
+
+def test_generate_request_bounds_solver_resources():
+    for bad in (dict(workers=0), dict(workers=MAX_WORKERS + 1), dict(time_budget=0),
+                dict(time_budget=MAX_TIME_BUDGET + 1)):
+        with pytest.raises(ValidationError):
+            TimetableGenerateRequest(**bad)
+    assert TimetableGenerateRequest(workers=MAX_WORKERS, time_budget=MAX_TIME_BUDGET).workers == MAX_WORKERS
+
+def test_generate_timetable_requires_rooms(service):
+    service.subject_repo = MagicMock()
+    service.room_repo = MagicMock()
+    service.student_group_repo = MagicMock()
+    service.subject_repo.get_all_with_teachers.return_value = [MagicMock(id=1)]
+    service.room_repo.get_all.return_value = []
+    service.student_group_repo.get_all.return_value = []
+
+    with pytest.raises(HTTPException) as exc_info:
+        service.generate_timetable(TimetableGenerateRequest())
+    assert exc_info.value.status_code == 400
+
+def _bulk_service(service):
+    service.occupancy = OccupancyMap()
+    service.occupancy.add(1, "Monday", 8, 10, room_id=1, teacher_id=1, student_group_id=1)
+    service.room_repo = MagicMock()
+    service.room_repo.get_room_types.return_value = {1: True, 2: False, 3: False}
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.add_many.side_effect = lambda rows: list(range(100, 100 + len(rows)))
+    return service
+
+def _bulk_row(**overrides):
+    row = dict(day_of_week="Tuesday", start_hour=8, end_hour=10, subject_id=1, room_id=2,
+               teacher_id=2, class_type="Seminar", student_group_id=2)
+    row.update(overrides)
+    return row
+
+def test_bulk_create_reports_per_row_errors(service):
+    _bulk_service(service)
+    rows = [
+        _bulk_row(),
+        _bulk_row(room_id=3, teacher_id=3),                              # same group, same time as row 0
+        _bulk_row(day_of_week="Monday", room_id=1, class_type="Course", teacher_id=4, student_group_id=4),  # room taken in DB
+        _bulk_row(end_hour=11),                                          # 3 hours
+        _bulk_row(room_id=42),                                           # unknown room
+        {"day_of_week": "Friday"},                                       # schema error
+        ValueError("Invalid JSON line."),
+        _bulk_row(day_of_week="Wednesday"),
+    ]
+    result = service.bulk_create_schedule_entries(rows)
+
+    assert result["created"] == 2
+    assert result["ids"] == [100, 101]
+    details = {e["index"]: e["detail"] for e in result["errors"]}
+    assert details[1] == "Student group is already scheduled at that time."
+    assert details[2] == "Room is already occupied at that time."
+    assert details[3] == "Classes must be 2 hours long."
+    assert details[4] == "Room not found."
+    assert 5 in details and details[6] == "Invalid JSON line."
+    service.schedule_repo.add_many.assert_called_once()
+    # Inserted rows are tracked under their real IDs
+    assert service.occupancy.remove(100) and service.occupancy.remove(101)
+
+def test_bulk_create_all_or_nothing(service):
+    _bulk_service(service)
+    result = service.bulk_create_schedule_entries([_bulk_row(), _bulk_row(class_type="Course")], all_or_nothing=True)
+
+    assert result["created"] == 0
+    assert result["errors"] == [{"index": 1, "detail": "Courses must be held in course rooms."}]
+    service.schedule_repo.add_many.assert_called_once_with([])
+    # Nothing from the rejected batch reaches the map
+    assert service.occupancy.find_conflict("Tuesday", 8, 10, room_id=2, teacher_id=2, student_group_id=2) is None
+
+def test_bulk_create_keeps_uncommitted_rows_out_of_the_shared_map(service):
+    _bulk_service(service)
+    shared = service.occupancy
+    before = shared.snapshot()
+
+    def add_many(rows):
+        # Other readers of the map must not see the batch while it is written
+        assert shared.snapshot() == before
+        raise IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+
+    service.schedule_repo.add_many.side_effect = add_many
+    with pytest.raises(HTTPException) as exc_info:
+        service.bulk_create_schedule_entries([_bulk_row(), _bulk_row(day_of_week="Wednesday")])
+    assert exc_info.value.status_code == 409
+    assert shared.snapshot() == before
+
+def test_list_schedule_entries_pushes_filters_down(service):
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.get_page.return_value = []
+
+    assert service.list_schedule_entries(after_id=5, limit=20, day_of_week="Monday", room_id=3) == []
+    service.schedule_repo.get_page.assert_called_once_with(after_id=5, limit=20, expand=False, day_of_week="Monday", room_id=3)
+
+def test_list_schedule_entries_rejects_invalid_day(service):
+    with pytest.raises(HTTPException) as exc_info:
+        service.list_schedule_entries(day_of_week="Sunday")
+    assert exc_info.value.status_code == 400
+
+def test_export_schedule_entries_formats(service):
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.iter_batches.side_effect = lambda *a, **k: iter([
+        [(1, "Monday", 8, 10, 1, 1, 1, "Course", None)],
+        [(2, "Tuesday", 10, 12, 2, 3, 1, "Seminar", 4)],
+    ])
+
+    ndjson = b"".join(service.export_schedule_entries("ndjson")).decode().splitlines()
+    assert len(ndjson) == 2
+    assert '"student_group_id":4' in ndjson[1]
+
+    csv_lines = b"".join(service.export_schedule_entries("csv", room_id=1)).decode().splitlines()
+    assert csv_lines[0].startswith("id,day_of_week,start_hour")
+    assert csv_lines[1] == "1,Monday,8,10,1,1,1,Course,"
+    service.schedule_repo.iter_batches.assert_called_with(1000, room_id=1)
+
+def test_export_schedule_entries_validates_before_streaming(service):
+    service.schedule_repo = MagicMock()
+    with pytest.raises(HTTPException):
+        service.export_schedule_entries("csv", class_type="Workshop")
+    service.schedule_repo.iter_batches.assert_not_called()
+
+def test_group_timetable_sorted_by_slot(service):
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.get_group_timetable.return_value = [
+        MagicMock(id=1, day_of_week="Wednesday", start_hour=8),
+        MagicMock(id=2, day_of_week="Monday", start_hour=14),
+        MagicMock(id=3, day_of_week="Monday", start_hour=10),
+    ]
+    result = service.get_group_timetable(1, "A1")
+    assert [e.id for e in result] == [3, 2, 1]
+    service.schedule_repo.get_group_timetable.assert_called_once_with(1, "A1", False)
+
+def test_group_timetable_unknown_group(service):
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.get_group_timetable.return_value = None
+    with pytest.raises(HTTPException) as exc_info:
+        service.get_group_timetable(2, "Z9")
+    assert exc_info.value.status_code == 404
+
+def test_validate_schedule_changes_reports_every_clash(service):
+    service.room_repo = MagicMock()
+    service.room_repo.get_room_types.return_value = {1: True, 2: False, 3: False}
+    service.student_group_repo = MagicMock()
+    service.student_group_repo.get_year_ids.return_value = {1: 1, 2: 1}
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.get_slot_rows.return_value = [
+        (10, "Monday", 8, 10, 1, 1, None, 1),  # year 1 course
+        (11, "Monday", 10, 12, 2, 2, 2, 1),
+        (12, "Tuesday", 8, 10, 3, 3, 1, 1),
+    ]
+    seminar = dict(subject_id=1, class_type="Seminar")
+    changes = [
+        ScheduleEntryCreate(day_of_week="Monday", start_hour=9, end_hour=11, room_id=3, teacher_id=4, student_group_id=1, **seminar),
+        ScheduleEntryCreate(day_of_week="Monday", start_hour=10, end_hour=12, room_id=2, teacher_id=5, student_group_id=1, **seminar),
+        ScheduleEntryCreate(day_of_week="Tuesday", start_hour=8, end_hour=10, room_id=3, teacher_id=3, student_group_id=2, **seminar),
+        ScheduleEntryCreate(day_of_week="Tuesday", start_hour=8, end_hour=10, room_id=1, teacher_id=6, student_group_id=2, **seminar),
+    ]
+
+    result = service.validate_schedule_changes(changes, delete=[12, 99])
+
+    assert result["valid"] is False
+    assert {(e.get("index"), e["detail"], e.get("clashes_with_id"), e.get("clashes_with_index"), e.get("delete_id"))
+            for e in result["errors"]} == {
+        (None, "Schedule entry not found.", None, None, 99),
+        (0, "Student group is already scheduled at that time.", 10, None, None),
+        (1, "Room is already occupied at that time.", 11, None, None),
+        (1, "Student group is already scheduled at that time.", None, 0, None),
+        (3, "Labs and seminars must be in lab rooms.", None, None, None),
+    }
+    # Entry 12 is deleted by the same change set, so index 2 may take its slot
+    service.schedule_repo.add_many.assert_not_called()
+
+def test_audit_schedule_reports_clashes_and_room_types(service):
+    service.student_group_repo = MagicMock()
+    service.student_group_repo.get_year_ids.return_value = {1: 1, 2: 1}
+    service.schedule_repo = MagicMock()
+    service.schedule_repo.iter_room_mismatches.return_value = iter([
+        (20, "Monday", 3, "Course", False),
+        (21, "Tuesday", 9, "Lab", None),
+    ])
+    service.schedule_repo.get_slot_rows.return_value = [
+        (10, "Monday", 8, 10, 1, 1, None, 1),  # year 1 course
+        (11, "Monday", 9, 11, 2, 1, 2, 1),     # same teacher, group 2 of year 1
+        (12, "Monday", 10, 12, 2, 3, 1, 1),    # same room as 11
+        (13, "Tuesday", 8, 10, 1, 1, None, 1),
+    ]
+
+    issues = sorted(service.audit_schedule(), key=lambda issue: (issue[0], issue[4]))
+
+    assert issues == [
+        ("group_clash", "Monday", "group", 2, 10, 11, "Student group is already scheduled at that time."),
+        ("room_clash", "Monday", "room", 2, 11, 12, "Room is already occupied at that time."),
+        ("room_type", "Monday", "room", 3, 20, None, "Courses must be held in course rooms."),
+        ("room_type", "Tuesday", "room", 9, 21, None, "Room not found."),
+        ("teacher_clash", "Monday", "teacher", 1, 10, 11, "Teacher is already scheduled at that time."),
+    ]
+
+def test_audit_report_streams_csv(service):
+    service.audit_schedule = MagicMock(return_value=iter([("room_type", "Monday", "room", 3, 20, None, "Room not found.")]))
+    lines = b"".join(service.audit_report("csv")).decode().splitlines()
+    assert lines == ["issue,day_of_week,resource_type,resource_id,entry_id,other_entry_id,detail",
+                     "room_type,Monday,room,3,20,,Room not found."]
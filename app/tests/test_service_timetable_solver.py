@@ -0,0 +1,101 @@
+import pytest
+
+from app.services.timetable_solver import TimetableProblem, solve_multistart, solve_timetable
+from app.services.occupancy_service import slot_mask
+
+def make_problem(groups_per_year=4, lab_rooms=2, busy=None):
+    subjects = [
+        {"id": 1, "student_year_id": 1, "course_teacher_id": 1, "seminar_lab_teacher_ids": [2, 3]},
+        {"id": 2, "student_year_id": 1, "course_teacher_id": 2, "seminar_lab_teacher_ids": [4]},
+        {"id": 3, "student_year_id": 2, "course_teacher_id": 5, "seminar_lab_teacher_ids": []},
+    ]
+    groups = [(g, 1) for g in range(1, groups_per_year + 1)]
+    groups += [(g, 2) for g in range(groups_per_year + 1, 2 * groups_per_year + 1)]
+    rooms = [(1, True)] + [(10 + r, False) for r in range(lab_rooms)]
+    return TimetableProblem(subjects, rooms, groups, busy=busy)
+
+def assert_conflict_free(problem, entries):
+    course_rooms = {room_id for room_id, is_course in problem.rooms if is_course}
+    year_of_subject = {s.subject_id: s.year_id for s in problem.sessions}
+    taken = set()
+    for e in entries:
+        assert e["end_hour"] - e["start_hour"] == 2
+        assert 8 <= e["start_hour"] and e["end_hour"] <= 20
+        assert e["day_of_week"] in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+        assert (e["room_id"] in course_rooms) == (e["class_type"] == "Course")
+        if e["student_group_id"] is None:
+            groups = problem.groups_by_year[year_of_subject[e["subject_id"]]]
+        else:
+            groups = [e["student_group_id"]]
+        keys = [("room", e["room_id"]), ("teacher", e["teacher_id"])] + [("group", g) for g in groups]
+        for hour in range(e["start_hour"], e["end_hour"]):
+            for key in keys:
+                slot = (key, e["day_of_week"], hour)
+                assert slot not in taken, f"Double booking of {slot}"
+                taken.add(slot)
+
+def test_sessions_built_per_subject_and_group():
+    problem = make_problem()
+    courses = [s for s in problem.sessions if s.class_type == "Course"]
+    seminars = [s for s in problem.sessions if s.class_type == "Seminar"]
+    assert len(courses) == 3
+    assert len(seminars) == 3 * 4
+    # Subjects without seminar/lab teachers fall back to the course teacher
+    assert all(s.teacher_ids == (5,) for s in seminars if s.subject_id == 3)
+
+def test_solution_is_complete_and_conflict_free():
+    problem = make_problem()
+    solution = solve_timetable(problem, seed=1)
+    assert solution.unplaced == []
+    assert len(solution.entries) == len(problem.sessions)
+    assert_conflict_free(problem, solution.entries)
+
+def test_seminars_use_allowed_teachers():
+    problem = make_problem()
+    solution = solve_timetable(problem, seed=2)
+    for e in solution.entries:
+        if e["subject_id"] == 1 and e["class_type"] == "Seminar":
+            assert e["teacher_id"] in (2, 3)
+
+def test_existing_occupancy_is_respected():
+    busy = {("room", 1): slot_mask("Monday", 8, 20) | slot_mask("Tuesday", 8, 20)}
+    problem = make_problem(busy=busy)
+    solution = solve_timetable(problem, seed=3)
+    for e in solution.entries:
+        if e["room_id"] == 1:
+            assert e["day_of_week"] not in ("Monday", "Tuesday")
+
+def test_same_seed_same_timetable():
+    first = solve_timetable(make_problem(), seed=7)
+    second = solve_timetable(make_problem(), seed=7)
+    assert first.entries == second.entries
+
+def test_infeasible_instance_reports_unplaced():
+    # One lab room has 30 two-hour windows a week, far fewer than the seminars requested
+    problem = make_problem(groups_per_year=20, lab_rooms=1)
+    solution = solve_timetable(problem, seed=1, max_backtracks=50)
+    assert solution.unplaced
+    assert len(solution.entries) + len(solution.unplaced) == len(problem.sessions)
+    assert_conflict_free(problem, solution.entries)
+    assert solution.score[0] == len(solution.unplaced)
+
+def test_invalid_seminar_class_type():
+    with pytest.raises(AssertionError):
+        TimetableProblem([], [], [], seminar_class_type="Workshop")
+
+def test_run_worse_than_bound_is_aborted():
+    problem = make_problem(groups_per_year=20, lab_rooms=1)
+    solution = solve_timetable(problem, seed=1, max_backtracks=0, max_unplaced=0)
+    assert solution.aborted
+    assert len(solution.entries) + len(solution.unplaced) == len(problem.sessions)
+
+def test_multistart_returns_best_conflict_free_timetable():
+    problem = make_problem()
+    solution = solve_multistart(problem, workers=2, time_budget=1.0, seed=5)
+    assert solution.unplaced == []
+    assert solution.restarts >= 1
+    assert_conflict_free(problem, solution.entries)
+
+def test_multistart_rejects_empty_budget():
+    with pytest.raises(AssertionError):
+        solve_multistart(make_problem(), workers=1, time_budget=0)
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.migrations import migrate
+from app.repository.teacher_repository import TeacherRepository
+from app.services.version_service import CollectionVersions, etag_matches, read_versions
+
+def _rows(**versions) -> list[tuple]:
+    return [(collection, version, 0.0) for collection, version in versions.items()]
+
+def test_etag_changes_only_with_its_collections():
+    before = CollectionVersions(_rows(teachers=1, schedule=4), window=0)
+    after = CollectionVersions(_rows(teachers=1, schedule=5), window=0)
+    assert after.headers("teachers")["ETag"] == before.headers("teachers")["ETag"]
+    assert after.headers("schedule")["ETag"] != before.headers("schedule")["ETag"]
+    assert after.headers("schedule", "groups")["ETag"] == 'W/"5-0"'
+    assert after.version("schedule") == 5
+
+def test_last_modified_tracks_latest_bump():
+    versions = CollectionVersions([("rooms", 1, 86400.0), ("years", 0, 0.0)], window=0)
+    assert versions.headers("rooms", "years")["Last-Modified"] == "Fri, 02 Jan 1970 00:00:00 GMT"
+
+def test_etag_rolls_over_each_window():
+    clock = MagicMock(return_value=0.0)
+    versions = CollectionVersions(_rows(groups=1), window=60, clock=clock)
+    first = versions.headers("groups")["ETag"]
+    clock.return_value = 61.0
+    assert versions.headers("groups")["ETag"] != first
+
+def test_etag_matches_weak_comparison_and_lists():
+    assert etag_matches('"a-1"', 'W/"a-1"')
+    assert etag_matches('W/"x", W/"a-1"', 'W/"a-1"')
+    assert etag_matches("*", 'W/"a-1"')
+    assert not etag_matches('W/"a-2"', 'W/"a-1"')
+    assert not etag_matches(None, 'W/"a-1"')
+
+def test_writes_bump_the_shared_counters():
+    engine = create_engine("sqlite://")
+    migrate(engine)
+    writer, reader = sessionmaker(bind=engine)(), sessionmaker(bind=engine)()
+    before = read_versions(reader, "teachers", "schedule")
+    reader.rollback()
+
+    TeacherRepository(writer).add(name="T1")
+    after = read_versions(reader, "teachers", "schedule")
+    assert after.version("teachers") == before.version("teachers") + 1
+    assert after.version("schedule") == before.version("schedule")
+    writer.close()
+    reader.close()
@@ -0,0 +1,211 @@
+"""Concurrent load test of the timetable API with latency percentiles and a regression baseline.
+
+Builds a synthetic database (``benchmarks/synthetic.py``), starts uvicorn on it,
+and drives each scenario with ``--concurrency`` clients over httpx. Per scenario
+it records p50/p95/p99/max latency (ms) and throughput (req/s):
+
+    python -m benchmarks.bench_api --entries 5000 --requests 2000 --concurrency 32 --output bench.json
+    python -m benchmarks.bench_api --baseline bench.json --tolerance 0.25
+
+With ``--baseline`` the run is compared against an earlier JSON result and exits
+with status 1 when a scenario's p95 grew, or its throughput fell, by more than
+the tolerance. ``--url`` targets an already running server instead; its empty
+database, given as ``--database-url``, is filled first.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+PREFIX = "/api/v1/timetable"
+SCENARIOS = ("create_schedule", "schedule_by_group", "list_schedule", "list_teachers", "list_rooms",
+             "list_groups", "list_subjects")
+
+def prepare(url: str, args) -> dict:
+    """Create the schema on ``url`` and fill it; returns the ids the scenarios need."""
+    os.environ["DATABASE_URL"] = url
+    from sqlalchemy.orm import Session
+
+    from app.core.database import engine
+    from app.core.migrations import migrate
+    from benchmarks.synthetic import populate
+
+    migrate(engine)
+    with Session(engine) as db:
+        ids = populate(db, teachers=args.teachers, rooms=args.rooms, groups_per_year=args.groups,
+                       entries=args.entries, spare=args.spare, seed=args.seed)
+    engine.dispose()
+    return ids
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    assert sorted_values, "No samples"  #  Precondition
+    rank = max(1, round(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies: list[float], elapsed: float, statuses: dict) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "throughput": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+def scenario_requests(name: str, ids: dict, count: int, rng: random.Random):
+    """``(method, path, json_body)`` for each request of a scenario."""
+    if name == "create_schedule":
+        from benchmarks.synthetic import free_entries
+        return [("POST", f"{PREFIX}/schedule/", body) for body in free_entries(ids, count)]
+    if name == "schedule_by_group":
+        return [("GET", f"{PREFIX}/schedule/?group_name={rng.choice(ids['group_letters'])}", None) for _ in range(count)]
+    if name == "list_schedule":
+        return [("GET", f"{PREFIX}/schedule/?limit=100&after_id={rng.randrange(max(1, ids['entries'] - 100))}", None)
+                for _ in range(count)]
+    collection = name.removeprefix("list_")
+    return [("GET", f"{PREFIX}/{collection}/?limit=100", None) for _ in range(count)]
+
+async def drive(base_url: str, requests: list, concurrency: int) -> dict:
+    import httpx
+
+    latencies, statuses = [], {}
+    queue = iter(requests)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def worker():
+            for method, path, body in queue:
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, statuses)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@contextmanager
+def server(database_url: str, workers: int):
+    """uvicorn serving ``app.main:app`` on a free local port, stopped on exit."""
+    import httpx
+
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}{PREFIX}/teachers/?limit=1").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose p95 or throughput regressed by more than ``tolerance`` against ``baseline``."""
+    regressions = []
+    for name, base in baseline["results"].items():
+        current = results["results"].get(name)
+        if current is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base['throughput']} -> {current['throughput']} req/s")
+    return regressions
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        ids = prepare(database_url, args)
+        with server(database_url, args.workers) if args.url is None else _existing(args.url) as base_url:
+            results = {}
+            for name in args.scenarios:
+                requests = scenario_requests(name, ids, args.requests, rng)
+                if name != "create_schedule" and args.warmup:
+                    # Fills caches and pools; writes are not repeatable, so they run cold
+                    asyncio.run(drive(base_url, requests[:args.warmup], args.concurrency))
+                results[name] = asyncio.run(drive(base_url, requests, args.concurrency))
+                print(f"{name:>18} {results[name]['throughput']:>9.1f} req/s  p50 {results[name]['p50_ms']:>7.2f}"
+                      f"  p95 {results[name]['p95_ms']:>7.2f}  p99 {results[name]['p99_ms']:>7.2f} ms"
+                      f"  {results[name]['statuses']}")
+    return {
+        "meta": {
+            "entries": ids["entries"], "teachers": args.teachers, "rooms": args.rooms, "groups_per_year": args.groups,
+            "requests": args.requests, "concurrency": args.concurrency, "workers": args.workers,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+@contextmanager
+def _existing(url: str):
+    yield url.rstrip("/")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teachers", type=int, default=250)
+    parser.add_argument("--rooms", type=int, default=250)
+    parser.add_argument("--groups", type=int, default=70, help="Groups per year")
+    parser.add_argument("--entries", type=int, default=5000, help="Schedule entries to generate (upper bound)")
+    parser.add_argument("--spare", type=int, default=70, help="Untouched rooms/teachers/groups for create_schedule")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--database-url", help="Database to fill and serve (default: a temporary SQLite file)")
+    parser.add_argument("--url", help="Benchmark a running server instead of starting uvicorn")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+    if args.url and not args.database_url:
+        parser.error("--url needs the --database-url of that server to fill")
+
+    results = run(args)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
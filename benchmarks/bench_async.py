@@ -0,0 +1,74 @@
+"""Throughput of the async list endpoint versus its sync (threadpool) equivalent.
+
+Runs both handlers in-process against the same SQLite file and fires requests at
+increasing concurrency through httpx's ASGI transport:
+
+    python -m benchmarks.bench_async --requests 2000 --concurrency 1 50 200
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+def build_app(url: str):
+    os.environ["DATABASE_URL"] = url
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+
+    from app.api.v1 import timetable
+    from app.core.database import Base, engine, get_db
+    from app.models.teacher import Teacher
+    from app.models import room, schedule_entry, student_year, subject  # noqa: F401  (register tables)
+    from app.services.timetable_service import TimetableService
+
+    Base.metadata.create_all(engine, tables=[Teacher.__table__])
+    with Session(engine) as db:
+        db.add_all([Teacher(name=f"Teacher {i}") for i in range(200)])
+        db.commit()
+
+    app = FastAPI()
+    app.include_router(timetable.router, prefix="/api/v1/timetable")
+
+    @app.get("/sync/teachers/")
+    def list_teachers_sync(db: Session = Depends(get_db)):
+        return [{"id": t.id, "name": t.name} for t in TimetableService(db).list_teachers(limit=50)]
+
+    return app
+
+async def run(app, path: str, requests: int, concurrency: int) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path)
+                assert response.status_code == 200, response.text
+
+        await client.get(path)  # warm up pools and the lazily created async engine
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 50, 200])
+    args = parser.parse_args()
+
+    async def compare(app):
+        print(f"{'concurrency':>11} {'sync req/s':>11} {'async req/s':>12}")
+        for concurrency in args.concurrency:
+            sync_rate = await run(app, "/sync/teachers/", args.requests, concurrency)
+            async_rate = await run(app, "/api/v1/timetable/teachers/?limit=50", args.requests, concurrency)
+            print(f"{concurrency:>11} {sync_rate:>11.0f} {async_rate:>12.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # One event loop for the whole run: the async engine's pool is bound to it
+        asyncio.run(compare(build_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")))
+
+if __name__ == "__main__":
+    main()
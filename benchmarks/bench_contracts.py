@@ -0,0 +1,95 @@
+"""Cost of the contract checks: the hot paths under CONTRACTS=full, sampled and off.
+
+Fills an in-memory database with ``benchmarks/synthetic.py`` and times each
+operation per mode, reporting the mean time per call (best of ``--rounds``, the
+modes interleaved so drift hits them alike) and the saving against full:
+
+    python -m benchmarks.bench_contracts --entries 20000 --repeat 200 --rounds 5
+"""
+import argparse
+import time
+
+def build(entries: int, seed: int):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.core.database import Base
+    from benchmarks.synthetic import populate
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    ids = populate(session, entries=entries, seed=seed)
+    return session, ids
+
+def operations(db, ids: dict) -> dict:
+    from app.repository.schedule_entry_repository import ScheduleEntryRepository
+    from app.services.timetable_service import TimetableService
+    from benchmarks.synthetic import free_entries
+
+    service = TimetableService(db)
+    repo = ScheduleEntryRepository(db)
+    group_id = ids["spare_groups"][0] - 1  # the last group of a scheduled year
+    entry = free_entries(ids, 1)[0]
+
+    def book_and_delete():
+        schedule_entry, clash = repo.add_if_free(**entry)
+        assert clash is None
+        repo.delete(schedule_entry.id)
+
+    def group_schedule():
+        result = repo.get_by_group_id(group_id)
+        db.expunge_all()  # measure hydration, not identity-map hits
+        return result
+
+    def list_page(method):
+        def run():
+            result = method(limit=1000)
+            db.expunge_all()
+            return result
+        return run
+
+    return {
+        "list_teachers": list_page(service.list_teachers),
+        "list_groups": list_page(service.list_groups),
+        "list_schedule": list_page(repo.get_page),
+        "get_by_group_id": group_schedule,
+        "book_and_delete": book_and_delete,
+    }
+
+def measure(function, repeat: int) -> float:
+    function()  # warm caches and statement compilation
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from app.core.contracts import set_contract_mode
+
+    db, ids = build(args.entries, args.seed)
+    print(f"{ids['entries']} schedule entries, {args.repeat} calls per operation and mode")
+    print(f"{'operation':>16} {'full us':>10} {'sampled us':>11} {'off us':>10} {'saving':>7}")
+    for name, function in operations(db, ids).items():
+        timings = {}
+        for _ in range(args.rounds):
+            for mode in ("full", "sampled", "off"):
+                set_contract_mode(mode, args.sample_rate)
+                elapsed = measure(function, args.repeat) * 1e6
+                timings[mode] = min(elapsed, timings.get(mode, elapsed))
+        set_contract_mode("full")
+        saving = 1 - timings["off"] / timings["full"]
+        print(f"{name:>16} {timings['full']:>10.1f} {timings['sampled']:>11.1f} {timings['off']:>10.1f} {saving:>7.1%}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Micro-benchmarks of the timetable hot paths on a synthetic in-memory database.
+
+Needs pytest-benchmark; files are named ``bench_*`` so the regular test run skips them:
+
+    python -m pytest benchmarks/bench_service.py --benchmark-autosave
+    python -m pytest benchmarks/bench_service.py --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.schedule_entry import ScheduleEntry
+from app.models.schedule_slot import ScheduleSlot
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.schemas.schedule_entry import ScheduleEntryCreate
+from app.services.occupancy_service import OccupancyMap
+from app.services.timetable_service import TimetableService
+from benchmarks.synthetic import free_entries, populate
+
+@pytest.fixture(scope="module")
+def dataset():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    ids = populate(session, entries=5000)
+    yield session, ids
+    session.close()
+    engine.dispose()
+
+def test_occupancy_load(benchmark, dataset):
+    db, _ = dataset
+    benchmark(OccupancyMap().load, db)
+
+def test_occupancy_find_conflict(benchmark, dataset):
+    db, ids = dataset
+    occupancy = OccupancyMap()
+    occupancy.load(db)
+    entry = free_entries(ids, 1)[0]
+    assert benchmark(occupancy.find_conflict, entry["day_of_week"], entry["start_hour"], entry["end_hour"],
+                     room_id=entry["room_id"], teacher_id=entry["teacher_id"],
+                     student_group_id=entry["student_group_id"]) is None
+
+def test_add_if_free_and_delete(benchmark, dataset):
+    db, ids = dataset
+    repo = ScheduleEntryRepository(db)
+    entry = free_entries(ids, 1)[0]
+
+    def book_and_release():
+        schedule_entry, clash = repo.add_if_free(**entry)
+        assert clash is None
+        repo.delete(schedule_entry.id)
+
+    benchmark(book_and_release)
+
+def test_find_clash(benchmark, dataset):
+    db, ids = dataset
+    entry = {k: v for k, v in free_entries(ids, 1)[0].items() if k != "class_type"}
+    assert benchmark(ScheduleEntryRepository(db).find_clash, **entry) is None
+
+def test_list_schedule_page(benchmark, dataset):
+    db, _ = dataset
+    service = TimetableService(db)
+    assert len(benchmark(service.list_schedule_entries, after_id=2000, limit=100)) == 100
+
+def test_group_timetable(benchmark, dataset):
+    db, ids = dataset
+    service = TimetableService(db)
+    assert benchmark(service.get_group_timetable, 1, ids["group_letters"][0])
+
+def test_validate_schedule_changes(benchmark, dataset):
+    db, ids = dataset
+    changes = [ScheduleEntryCreate(**entry) for entry in free_entries(ids, 500)]
+    result = benchmark(TimetableService(db).validate_schedule_changes, changes, [])
+    assert result["valid"]
+
+def test_audit_schedule(benchmark, dataset):
+    db, _ = dataset
+    assert benchmark(lambda: list(TimetableService(db).audit_schedule())) == []
+
+def test_bulk_create_schedule_entries(benchmark, dataset):
+    db, ids = dataset
+    rows = free_entries(ids, 2000)
+    service = TimetableService(db)
+    created = []
+
+    def remove_created():
+        # Every round imports into the same schedule, and later benchmarks need the spare slots free
+        for result in created:
+            db.execute(delete(ScheduleSlot).where(ScheduleSlot.schedule_entry_id.in_(result["ids"])))
+            db.execute(delete(ScheduleEntry).where(ScheduleEntry.id.in_(result["ids"])))
+            db.commit()
+            for schedule_id in result["ids"]:
+                service.occupancy.remove(schedule_id)
+        created.clear()
+
+    def setup():
+        remove_created()
+        return ([dict(row) for row in rows],), {}
+
+    def bulk_create(batch):
+        created.append(service.bulk_create_schedule_entries(batch))
+
+    try:
+        benchmark.pedantic(bulk_create, setup=setup, rounds=10)
+        assert created[0]["created"] == len(rows)
+    finally:
+        remove_created()
@@ -0,0 +1,121 @@
+"""Cold start of an API worker: import, startup hooks and first request, in fresh processes.
+
+Fills a SQLite file with ``benchmarks/synthetic.py`` (migrated the way a
+deployment is), then starts ``--runs`` new interpreters that each import
+``app.main``, run the app's lifespan startup and serve one request in-process.
+``--legacy`` also times the startup this app used to do on every boot (create_all
+plus the seeder's six full-table loads) on the same database, for comparison:
+
+    python -m benchmarks.bench_startup --entries 20000 --runs 10 --legacy
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+def prepare(url: str, entries: int):
+    os.environ["DATABASE_URL"] = url
+    from sqlalchemy.orm import Session
+
+    from app.core.database import engine
+    from app.core.migrations import migrate
+    from benchmarks.synthetic import populate
+
+    migrate(engine)
+    with Session(engine) as db:
+        populate(db, entries=entries)
+    engine.dispose()
+
+def legacy_startup():
+    """What ``on_startup`` did before migrations: create_all and a full load of six tables."""
+    from app.core.database import Base, SessionLocal, engine
+    from app.repository.room_repository import RoomRepository
+    from app.repository.schedule_entry_repository import ScheduleEntryRepository
+    from app.repository.student_group_repository import StudentGroupRepository
+    from app.repository.student_year_repository import StudentYearRepository
+    from app.repository.subject_repository import SubjectRepository
+    from app.repository.teacher_repository import TeacherRepository
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        for repo in (TeacherRepository, StudentYearRepository, StudentGroupRepository, RoomRepository,
+                     SubjectRepository, ScheduleEntryRepository):
+            repo(db).get_all()
+
+def child(legacy: bool) -> dict:
+    """One cold start, measured inside the new process."""
+    import asyncio
+
+    start = time.perf_counter()
+    from app.main import app
+    imported = time.perf_counter()
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    statements = []
+    event.listen(Engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    async def boot() -> tuple[float, float, int]:
+        import httpx
+
+        begin = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            if legacy:
+                legacy_startup()
+            started = time.perf_counter()
+            queries = len(statements)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.get("/api/v1/timetable/teachers/?limit=1")
+                assert response.status_code == 200, response.text
+            return started - begin, time.perf_counter() - started, queries
+
+    startup, first_request, queries = asyncio.run(boot())
+    return {
+        "import_ms": (imported - start) * 1000,
+        "startup_ms": startup * 1000,
+        "first_request_ms": first_request * 1000,
+        "startup_queries": queries,
+    }
+
+def cold_starts(url: str, runs: int, legacy: bool) -> list[dict]:
+    env = dict(os.environ, DATABASE_URL=url)
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--child"] + (["--legacy"] if legacy else [])
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def report(label: str, results: list[dict]):
+    medians = {key: statistics.median(r[key] for r in results) for key in results[0]}
+    total = medians["import_ms"] + medians["startup_ms"] + medians["first_request_ms"]
+    print(f"{label:>8}  import {medians['import_ms']:7.1f}  startup {medians['startup_ms']:7.1f}"
+          f"  first request {medians['first_request_ms']:6.1f}  total {total:7.1f} ms"
+          f"  ({medians['startup_queries']:.0f} startup queries)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000, help="Schedule entries in the database")
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts per variant (medians are reported)")
+    parser.add_argument("--legacy", action="store_true", help="Also time the old create_all + seeder startup")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.legacy)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        prepare(url, args.entries)
+        report("current", cold_starts(url, args.runs, legacy=False))
+        if args.legacy:
+            report("legacy", cold_starts(url, args.runs, legacy=True))
+
+if __name__ == "__main__":
+    main()
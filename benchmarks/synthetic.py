@@ -0,0 +1,123 @@
+"""Synthetic timetables for benchmarks: N teachers, rooms, groups and a conflict-free schedule.
+
+Everything is written with bulk inserts and is deterministic for a given seed.
+Spare resources (lab rooms, teachers and one year of groups the schedule never
+touches) are created next to it so write benchmarks can book free slots.
+"""
+import random
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.room import Room
+from app.models.student_group import StudentGroup
+from app.models.student_year import StudentYear
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.repository.schedule_entry_repository import ScheduleEntryRepository
+from app.seeder.synthetic_data import GROUP_LETTERS, WINDOWS, insert_ids
+
+def populate(db: Session, teachers: int = 250, rooms: int = 250, groups_per_year: int = 70, years: int = 3,
+             subjects_per_year: int = 10, entries: int = 5000, spare: int = 70, seed: int = 0) -> dict:
+    """Fill an empty database and return the ids benchmarks need.
+
+    Each year gets one course per subject in turn; the remaining windows hold
+    seminars of its groups. Rooms and teachers are picked greedily among those
+    still free in the window, so the schedule never double-books. ``entries`` is
+    an upper bound: generation stops when the resources run out.
+    """
+    assert teachers >= 2 and rooms >= 2, "Need at least two teachers and two rooms"  #  Precondition
+    assert 1 <= groups_per_year <= len(GROUP_LETTERS) and spare <= len(GROUP_LETTERS), "At most 260 groups per year"  #  Precondition
+    rng = random.Random(seed)
+
+    teacher_ids = insert_ids(db, Teacher, [dict(name=f"Teacher {i}") for i in range(teachers + spare)])
+    course_rooms = max(1, rooms // 4)
+    room_ids = insert_ids(db, Room, [dict(name=f"Room {i}", is_course_room=i < course_rooms)
+                                      for i in range(rooms + spare)])
+    year_ids = insert_ids(db, StudentYear, [dict(year=i % 3 + 1) for i in range(years + 1)])
+    group_rows = [dict(student_year_id=year_id, letter=GROUP_LETTERS[i])
+                  for year_id in year_ids for i in range(groups_per_year if year_id != year_ids[-1] else spare)]
+    insert_ids(db, StudentGroup, group_rows)
+    subject_ids = insert_ids(db, Subject, [
+        dict(name=f"Subject {y}-{i}", student_year_id=year_id, course_teacher_id=teacher_ids[(y * subjects_per_year + i) % teachers])
+        for y, year_id in enumerate(year_ids) for i in range(subjects_per_year)
+    ])
+    db.commit()
+
+    groups = db.execute(select(StudentGroup.id, StudentGroup.student_year_id).order_by(StudentGroup.id)).all()
+    groups_by_year = {}
+    for group_id, year_id in groups:
+        groups_by_year.setdefault(year_id, []).append(group_id)
+    subjects_by_year = {year_id: subject_ids[y * subjects_per_year:(y + 1) * subjects_per_year]
+                        for y, year_id in enumerate(year_ids)}
+    scheduled_years = year_ids[:-1]
+    lab_rooms = room_ids[course_rooms:rooms]
+
+    schedule = []
+    for w, (day, hour) in enumerate(rng.sample(WINDOWS, len(WINDOWS))):
+        if len(schedule) >= entries:
+            break
+        free_teachers = teacher_ids[:teachers]
+        rng.shuffle(free_teachers)
+        free_rooms = {True: room_ids[:course_rooms], False: list(lab_rooms)}
+        busy_teachers = set()
+
+        def take_teacher(preferred=None):
+            if preferred is not None and preferred not in busy_teachers:
+                busy_teachers.add(preferred)
+                return preferred
+            while free_teachers:
+                teacher_id = free_teachers.pop()
+                if teacher_id not in busy_teachers:
+                    busy_teachers.add(teacher_id)
+                    return teacher_id
+            return None
+
+        for y, year_id in enumerate(scheduled_years):
+            if len(schedule) >= entries:
+                break
+            common = dict(day_of_week=day, start_hour=hour, end_hour=hour + 2)
+            # Every sixth window of a year is a course; its groups have nothing else then
+            if w % 6 == y % 6 and free_rooms[True]:
+                subject_id = subjects_by_year[year_id][(w // 6) % subjects_per_year]
+                teacher_id = take_teacher(teacher_ids[(y * subjects_per_year + (w // 6) % subjects_per_year) % teachers])
+                if teacher_id is not None:
+                    schedule.append(dict(common, subject_id=subject_id, room_id=free_rooms[True].pop(),
+                                         teacher_id=teacher_id, class_type="Course", student_group_id=None))
+                continue
+            for group_id in groups_by_year[year_id]:
+                if len(schedule) >= entries or not free_rooms[False]:
+                    break
+                teacher_id = take_teacher()
+                if teacher_id is None:
+                    break
+                schedule.append(dict(common, subject_id=rng.choice(subjects_by_year[year_id]),
+                                     room_id=free_rooms[False].pop(), teacher_id=teacher_id,
+                                     class_type=rng.choice(["Seminar", "Laboratory"]), student_group_id=group_id))
+
+    repo = ScheduleEntryRepository(db)
+    for start in range(0, len(schedule), 5000):
+        repo.add_many(schedule[start:start + 5000])
+
+    spare_year = year_ids[-1]
+    return {
+        "entries": len(schedule),
+        "group_letters": sorted({GROUP_LETTERS[i] for i in range(groups_per_year)}),
+        "spare_rooms": room_ids[rooms:],
+        "spare_teachers": teacher_ids[teachers:],
+        "spare_groups": groups_by_year[spare_year],
+        "spare_subject": subjects_by_year[spare_year][0],
+    }
+
+def free_entries(ids: dict, count: int) -> list[dict]:
+    """``count`` schedule entries that only use spare resources and never clash with each other."""
+    capacity = len(WINDOWS) * min(len(ids["spare_rooms"]), len(ids["spare_teachers"]), len(ids["spare_groups"]))
+    assert count <= capacity, f"Only {capacity} free entries available; raise spare"  #  Precondition
+    result = []
+    for n in range(count):
+        resource, window = divmod(n, len(WINDOWS))
+        day, hour = WINDOWS[window]
+        result.append(dict(day_of_week=day, start_hour=hour, end_hour=hour + 2, subject_id=ids["spare_subject"],
+                           room_id=ids["spare_rooms"][resource], teacher_id=ids["spare_teachers"][resource],
+                           class_type="Seminar", student_group_id=ids["spare_groups"][resource]))
+    return result